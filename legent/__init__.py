@@ -1,26 +1,79 @@
-from legent.server.server import serve_scene, launch
-from legent.utils.io import load_json, store_json, save_image, scene_string, time_string, get_latest_folder, get_latest_folder_with_suffix, pack_scenes, unpack_scenes, find_files_by_extension
-from legent.environment.env import Environment
-from legent.action.action import Action, ResetInfo, ActionFinish
-from legent.action.observation import Observation
-from legent.server.scene_generator import generate_scene
+"""The public API of LEGENT. The names are imported on first use (PEP 562), so that `import legent` does not import the
+environment, gRPC, the scene generation and the agents, which the processes that only serve scenes or load JSON do not need.
+"""
 import argparse
-from legent.environment.env_utils import download_env
-from legent.dataset.task import TaskCreator
-from legent.dataset.controller import Controller
-from legent.dataset.trajectory import TrajectorySaver
-from legent.agent.agent import AgentClient
-from legent.agent.gpt4v_agent import GPT4VAgentClient
-from legent.dataset.eval import task_done
-from legent.action.action import parse_action
-from legent.action.api import SaveTopDownView, TakePhotoWithVisiblityInfo
-from legent.asset.utils import get_mesh_size, get_mesh_vertical_size, convert_obj_to_gltf
+import importlib
 import time
+from typing import TYPE_CHECKING
+
+_LAZY_ATTRIBUTES = {
+    "legent.server.server": ["serve_scene", "launch"],
+    "legent.utils.io": ["load_json", "store_json", "save_image", "scene_string", "time_string", "get_latest_folder", "get_latest_folder_with_suffix", "pack_scenes", "unpack_scenes", "find_files_by_extension"],
+    "legent.utils.scene_codec": ["encode_scene", "decode_scene", "load_scene", "store_scene", "convert_scenes"],
+    "legent.environment.env": ["Environment"],
+    "legent.environment.parallel_env": ["VectorEnvironment"],
+    "legent.environment.async_env": ["AsyncEnvironment"],
+    "legent.action.action": ["Action", "ActionSequence", "ResetInfo", "ActionFinish", "parse_action"],
+    "legent.action.observation": ["Observation"],
+    "legent.server.scene_generator": ["generate_scene"],
+    "legent.server.scene_prefetcher": ["ScenePrefetcher"],
+    "legent.server.scene_cache": ["SceneCache", "get_default_scene_cache", "set_default_scene_cache"],
+    "legent.scene_generation.artifacts": ["ArtifactSink", "RingArtifactSink", "FileArtifactSink", "get_default_artifact_sink", "set_default_artifact_sink"],
+    "legent.environment.env_utils": ["download_env"],
+    "legent.dataset.task": ["TaskCreator"],
+    "legent.dataset.controller": ["Controller"],
+    "legent.dataset.trajectory": ["TrajectorySaver"],
+    "legent.agent.agent": ["AgentClient"],
+    "legent.agent.gpt4v_agent": ["GPT4VAgentClient"],
+    "legent.dataset.eval": ["task_done"],
+    "legent.action.api": ["SaveTopDownView", "TakePhotoWithVisiblityInfo"],
+    "legent.asset.utils": ["get_mesh_size", "get_mesh_vertical_size", "convert_obj_to_gltf"],
+}
+_ATTRIBUTE_MODULES = {name: module for module, names in _LAZY_ATTRIBUTES.items() for name in names}
+
+__all__ = list(_ATTRIBUTE_MODULES)
+
+
+def __getattr__(name):
+    module = _ATTRIBUTE_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value  # the next accesses do not call __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from legent.server.server import serve_scene, launch
+    from legent.utils.io import load_json, store_json, save_image, scene_string, time_string, get_latest_folder, get_latest_folder_with_suffix, pack_scenes, unpack_scenes, find_files_by_extension
+    from legent.utils.scene_codec import encode_scene, decode_scene, load_scene, store_scene, convert_scenes
+    from legent.environment.env import Environment
+    from legent.environment.parallel_env import VectorEnvironment
+    from legent.environment.async_env import AsyncEnvironment
+    from legent.action.action import Action, ActionSequence, ResetInfo, ActionFinish, parse_action
+    from legent.action.observation import Observation
+    from legent.server.scene_generator import generate_scene
+    from legent.server.scene_prefetcher import ScenePrefetcher
+    from legent.server.scene_cache import SceneCache, get_default_scene_cache, set_default_scene_cache
+    from legent.scene_generation.artifacts import ArtifactSink, RingArtifactSink, FileArtifactSink, get_default_artifact_sink, set_default_artifact_sink
+    from legent.environment.env_utils import download_env
+    from legent.dataset.task import TaskCreator
+    from legent.dataset.controller import Controller
+    from legent.dataset.trajectory import TrajectorySaver
+    from legent.agent.agent import AgentClient
+    from legent.agent.gpt4v_agent import GPT4VAgentClient
+    from legent.dataset.eval import task_done
+    from legent.action.api import SaveTopDownView, TakePhotoWithVisiblityInfo
+    from legent.asset.utils import get_mesh_size, get_mesh_vertical_size, convert_obj_to_gltf
 
 
 def main():
     parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
-    parser.add_argument("function", help="serve/launch/download")
+    parser.add_argument("function", help="serve/launch/download/convert")
     parser.add_argument(
         "--scene",
         default="",
@@ -53,15 +106,29 @@ def main():
     )
     parser.add_argument("--thu", action="store_true", help="download from tsinghua cloud rather than huggingface hub")
     parser.add_argument("--dev", action="store_true", help="download dev version from tsinghua cloud")
+    parser.add_argument("--input_dir", default="", action="store", help="the directory of the scene files to convert")
+    parser.add_argument("--output_dir", default="", action="store", help="the directory of the converted scene files")
+    parser.add_argument("--to", default="binary", choices=["binary", "json"], help="convert the scene files to the binary scene format or to JSON")
 
     args = parser.parse_args()
     if args.function == "serve":
+        from legent.server.scene_server import serve_scene
+
         serve_scene(args.scene)
         while True:
             time.sleep(60)
             pass
     elif args.function == "launch":
+        from legent.server.server import launch
+
         launch(args.env_path, args.ssh, args.scene, False, True, args.api_key, args.base_url)
     elif args.function == "download":
+        from legent.environment.env_utils import download_env
+
         download_env(args.thu, download_dev_version=args.dev)
         download_env(args.thu, download_env_data=True)
+    elif args.function == "convert":
+        from legent.utils.scene_codec import convert_scenes
+
+        outputs = convert_scenes(args.input_dir, args.output_dir or args.input_dir, args.to)
+        print(f"Converted {len(outputs)} scenes to {args.to} in {args.output_dir or args.input_dir}")
@@ -1,6 +1,5 @@
-from typing import Dict, List
-from legent.protobuf.communicator_pb2 import ActionProto
-from legent.server.scene_generator import generate_scene
+from typing import Dict, List, Optional
+from legent.protobuf.communicator_pb2 import ActionProto, ActionSequenceProto
 import json
 import re
 import os
@@ -81,10 +80,38 @@ class ActionFinish(Action):
         return "finish()"
 
 
+class ActionSequence:
+
+    def __init__(self, actions: List[Action], capture: Optional[List[bool]] = None, api_calls: List[str] = []) -> None:
+        """A list of actions executed by the client one after another in a single round trip.
+
+        Args:
+            actions (List[Action]): The actions. Their api_calls are ignored.
+            capture (List[bool], optional): capture[i] tells whether to capture the frame after actions[i]. Defaults to capturing all of them.
+                The captured frames are returned in Observation.frames, in order, and Observation.image is the last one.
+                The game states are those after the last action.
+            api_calls (List[str], optional): APIs called after all the actions have been executed.
+        """
+        self.actions = actions
+        self.capture = [True] * len(actions) if capture is None else capture
+        if len(self.capture) != len(self.actions):
+            raise ValueError(f"Got {len(self.capture)} capture flags for {len(self.actions)} actions.")
+        self.api_calls = api_calls
+
+    def build(self) -> ActionProto:
+        return ActionProto(
+            type="SEQUENCE",
+            action_sequence=ActionSequenceProto(actions=[action.build() for action in self.actions], capture=self.capture),
+            api_calls=json.dumps({"calls": self.api_calls}),
+        )
+
+
 class ResetInfo:
 
     def __init__(self, scene: Dict = None, api_calls: List[str] = []) -> None:
         if not scene:
+            from legent.server.scene_generator import generate_scene
+
             scene = generate_scene()
         # TODO: process all relative paths
         for instance in scene["instances"]:
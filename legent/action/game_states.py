@@ -0,0 +1,101 @@
+from typing import Dict, List, Tuple
+
+# Binary game states layout (game_states_encoding "binary").
+#
+# ObservationProto.float_observations holds the dynamic fields as float32, in this order:
+#   1. the characters, 3 floats (x, y, z) per field, in the order of CHARACTER_FIELDS (30 floats)
+#   2. the instance positions (N x 3), then the instance rotations (N x 3), then the instance forwards (N x 3)
+# ObservationProto.int_observations holds [player_grab_instance, agent_grab_instance].
+#
+# The static fields ({"instances": [{"prefab": ...}, ...]}) are sent as JSON in ObservationProto.game_states
+# only when they change, i.e. in the observation of a reset. Otherwise game_states is empty.
+CHARACTER_FIELDS: List[Tuple[str, str]] = [
+    ("player", "position"),
+    ("player", "rotation"),
+    ("player", "forward"),
+    ("agent", "position"),
+    ("agent", "rotation"),
+    ("agent", "forward"),
+    ("player_camera", "position"),
+    ("player_camera", "forward"),
+    ("agent_camera", "position"),
+    ("agent_camera", "forward"),
+]
+INSTANCE_FIELDS: List[str] = ["position", "rotation", "forward"]
+CHARACTER_FLOATS = 3 * len(CHARACTER_FIELDS)
+
+
+def _xyz(v: Dict) -> List[float]:
+    return [v["x"], v["y"], v["z"]]
+
+
+def _vec(v) -> Dict[str, float]:
+    return {"x": v[0], "y": v[1], "z": v[2]}
+
+
+def encode_game_states(game_states: Dict) -> Tuple[List[float], List[int], Dict]:
+    """Split a game states dict into the packed float and int arrays and the static fields (see the layout above).
+
+    Returns:
+        Tuple[List[float], List[int], Dict]: float_observations, int_observations and the static fields.
+    """
+    floats = []
+    for name, field in CHARACTER_FIELDS:
+        floats.extend(_xyz(game_states[name][field]))
+    instances = game_states["instances"]
+    for field in INSTANCE_FIELDS:
+        for instance in instances:
+            floats.extend(_xyz(instance[field]))
+    ints = [game_states["player_grab_instance"], game_states["agent_grab_instance"]]
+    static = {"instances": [{"prefab": instance["prefab"]} for instance in instances]}
+    return floats, ints, static
+
+
+class GameStates:
+    """Struct-of-arrays view of the game states.
+
+    All the arrays are float32 views into a single buffer:
+        player_position, player_rotation, player_forward, agent_position, agent_rotation, agent_forward,
+        player_camera_position, player_camera_forward, agent_camera_position, agent_camera_forward: arrays of shape (3,)
+        instance_positions, instance_rotations, instance_forwards: arrays of shape (N, 3)
+    The other attributes are instance_prefabs (list of N str), player_grab_instance and agent_grab_instance (int, -1 for none).
+
+    For example, the distances from the agent to all the instances on the xz plane are
+        np.linalg.norm((states.instance_positions - states.agent_position)[:, [0, 2]], axis=1)
+    """
+
+    def __init__(self, floats, ints, static: Dict) -> None:
+        import numpy as np
+
+        self.buffer = np.array(floats[:], dtype=np.float32)  # slicing a repeated field gives a list, which numpy converts much faster
+        self._static_instances: List[Dict] = static["instances"]
+        self.instance_prefabs: List[str] = [instance["prefab"] for instance in self._static_instances]
+        n = len(self.instance_prefabs)
+        if self.buffer.size != CHARACTER_FLOATS + 9 * n:
+            raise ValueError(f"Binary game states have {self.buffer.size} floats, but {CHARACTER_FLOATS + 9 * n} are expected for {n} instances.")
+
+        characters = self.buffer[:CHARACTER_FLOATS].reshape(-1, 3)
+        for i, (name, field) in enumerate(CHARACTER_FIELDS):
+            setattr(self, f"{name}_{field}", characters[i])
+        instances = self.buffer[CHARACTER_FLOATS:].reshape(3, n, 3)
+        self.instance_positions, self.instance_rotations, self.instance_forwards = instances[0], instances[1], instances[2]
+        self.player_grab_instance: int = int(ints[0])
+        self.agent_grab_instance: int = int(ints[1])
+
+    @classmethod
+    def from_dict(cls, game_states: Dict) -> "GameStates":
+        floats, ints, static = encode_game_states(game_states)
+        return cls(floats, ints, static)
+
+    def to_dict(self) -> Dict:
+        """Build the same dict as the JSON game states."""
+        characters = self.buffer[:CHARACTER_FLOATS].reshape(-1, 3).tolist()
+        game_states = {"instances": []}
+        for (name, field), v in zip(CHARACTER_FIELDS, characters):
+            game_states.setdefault(name, {})[field] = _vec(v)
+        positions, rotations, forwards = self.instance_positions.tolist(), self.instance_rotations.tolist(), self.instance_forwards.tolist()
+        for static, position, rotation, forward in zip(self._static_instances, positions, rotations, forwards):
+            game_states["instances"].append({**static, "position": _vec(position), "rotation": _vec(rotation), "forward": _vec(forward)})
+        game_states["player_grab_instance"] = self.player_grab_instance
+        game_states["agent_grab_instance"] = self.agent_grab_instance
+        return game_states
@@ -1,54 +1,140 @@
 from legent.protobuf.communicator_pb2 import ObservationProto
+from legent.action.game_states import GameStates
+from functools import cached_property
 import json
 import io
 
 
 class Observation:
-    def __init__(self, obs: ObservationProto):
-        from PIL import Image
-        import numpy as np
+    def __init__(self, obs: ObservationProto, frame_buffer=None, static_game_states=None):
+        """
+        The fields are decoded lazily from the raw proto the first time they are accessed, and then memoized.
+        For example, a controller that only reads game_states never decodes the image, and the animation frames
+        of a use_animation=True step are only decoded if frames is read.
 
+        Args:
+            obs (ObservationProto): The raw observation sent by the game client.
+            frame_buffer (SharedFrameBuffer, optional): The shared frame buffer negotiated in the INIT config. If the client sent frame_slots,
+                the frames are read-only views into this buffer instead of decoded PNG images.
+            static_game_states (dict, optional): The static fields of the game states sent at the last reset (game_states_encoding "binary").
+                If given and the client sent float_observations, the game states are decoded from the packed arrays instead of JSON.
+        """
+        self._obs = obs
+        self._frame_buffer = frame_buffer
+        self._static_game_states = static_game_states
+        self._image_future = None
         self.type = obs.type
-        image_stream = io.BytesIO(obs.image)
-        # TODO: Remove try-except block and use identifier instead.
-        try:
-            self.image = np.array(Image.open(image_stream))
-            self.frames = [self.image]
-        except:
-            self.frames = self.unpack_image_sequence(obs.image)
-            self.image = self.frames[-1]
         self.text = obs.text
-        self.game_states = json.loads(obs.game_states)
-        if obs.api_returns:
-            self.api_returns = json.loads(obs.api_returns)
+
+    @cached_property
+    def image(self):
+        if self._image_future is not None:
+            return self._image_future.result()
+        return self._decode_last_image()
+
+    def decode_in_background(self, executor) -> None:
+        """Start decoding the image on the executor (e.g. a ThreadPoolExecutor). Reading image then waits for it instead of decoding again."""
+        if self._image_future is None and "image" not in self.__dict__:
+            self._image_future = executor.submit(self._decode_last_image)
+
+    def without_frames(self) -> "Observation":
+        """A copy without the image and the frames, whose other fields are still decoded lazily. It is cheap to pickle, e.g. to
+        send the game states to another process without decoding them there."""
+        obs = ObservationProto()
+        obs.CopyFrom(self._obs)
+        obs.ClearField("image")
+        obs.ClearField("frame_slots")
+        return Observation(obs, static_game_states=self._static_game_states)
+
+    def _decode_last_image(self):
+        if self._uses_frame_buffer():
+            return self._frame_buffer.view(self._obs.frame_slots[-1])
+        chunks = self._image_chunks
+        if not chunks:
+            return None
+        return self._decode_image(chunks[-1])
+
+    @cached_property
+    def frames(self):
+        if self._uses_frame_buffer():
+            return [self._frame_buffer.view(slot) for slot in self._obs.frame_slots]
+        chunks = self._image_chunks
+        if not chunks:
+            return []
+        # The last frame is the image. Reuse it if it has been decoded.
+        return [self._decode_image(chunk) for chunk in chunks[:-1]] + [self.image]
+
+    @cached_property
+    def game_states(self):
+        if self._uses_binary_game_states():
+            return self.game_states_arrays.to_dict()
+        if not self._obs.game_states:
+            raise ValueError("The observation has no game states. With game_states_encoding \"binary\", the static fields of the game states are sent at reset, so call reset() first.")
+        return json.loads(self._obs.game_states)
+
+    @cached_property
+    def game_states_arrays(self) -> GameStates:
+        """The game states as numpy struct-of-arrays (see GameStates), e.g. game_states_arrays.instance_positions of shape (N, 3)."""
+        if self._uses_binary_game_states():
+            return GameStates(self._obs.float_observations, self._obs.int_observations, self._static_game_states)
+        return GameStates.from_dict(self.game_states)
+
+    @cached_property
+    def api_returns(self):
+        if self._obs.api_returns:
+            return json.loads(self._obs.api_returns)
         else:
-            self.api_returns = None
-    
-    def unpack_image_sequence(self, bytes_data):
-        import io
-        from PIL import Image
-        import struct
-        import numpy as np
+            return None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self._image_future is not None:
+            state["image"] = self.image
+            state["_image_future"] = None
+        return state
+
+    def _uses_binary_game_states(self) -> bool:
+        return bool(self._obs.float_observations) and self._static_game_states is not None
+
+    def _uses_frame_buffer(self) -> bool:
+        return bool(self._obs.frame_slots) and self._frame_buffer is not None
 
-        image_sequence_data = bytes_data
-        frames = []
+    @cached_property
+    def _image_chunks(self):
+        """Split ObservationProto.image into the encoded frames without decoding them.
+
+        The image is either a single encoded image, or a sequence of length-prefixed frames (see unpack_image_sequence).
+        """
+        from PIL import Image, UnidentifiedImageError
+
+        data = self._obs.image
+        if not data:
+            return []
+        try:
+            Image.open(io.BytesIO(data))  # only reads the header
+            return [data]
+        except UnidentifiedImageError:
+            return list(self._split_image_sequence(data))
 
-        # Create a BytesIO stream from the binary data
-        image_stream = io.BytesIO(image_sequence_data)
+    @staticmethod
+    def _split_image_sequence(bytes_data):
+        import struct
 
-        # Loop through the sequence and extract each image
-        while image_stream.tell() < len(image_sequence_data):
+        view = memoryview(bytes_data)
+        offset = 0
+        while offset + 4 <= len(view):
             # Read the size of the next frame
-            size_data = image_stream.read(4)
-            if not size_data:
-                break
-            frame_size = struct.unpack('I', size_data)[0]
-
-            # Read the image data for the frame
-            frame_data = image_stream.read(frame_size)
-
-            # Open the frame as an image
-            frame_stream = io.BytesIO(frame_data)
-            frame = np.array(Image.open(frame_stream))
-            frames.append(frame)
-        return frames
\ No newline at end of file
+            frame_size = struct.unpack_from("I", view, offset)[0]
+            offset += 4
+            yield view[offset : offset + frame_size]
+            offset += frame_size
+
+    @staticmethod
+    def _decode_image(data):
+        from PIL import Image
+        import numpy as np
+
+        return np.array(Image.open(io.BytesIO(data)))
+
+    def unpack_image_sequence(self, bytes_data):
+        return [self._decode_image(frame_data) for frame_data in self._split_image_sequence(bytes_data)]
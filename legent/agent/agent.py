@@ -1,8 +1,6 @@
 import threading
-import requests
 import queue
 import io
-from PIL import Image
 from legent.action.action import Action, ActionFinish, parse_action
 from legent.utils.io import log, parse_ssh, SSHTunnel
 
@@ -61,11 +59,16 @@ class AgentClient:
         return Action()
 
     def clear_history(self):
+        import requests
+
         url = f"http://127.0.0.1:{self.MODEL_PORT}/clear_history"
         response = requests.get(url)
         return Action()
 
     def request_action(self, obs):
+        import requests
+        from PIL import Image
+
         image = Image.fromarray(obs.image)
         buffered = io.BytesIO()
         image.save(buffered, format="PNG")
@@ -1,7 +1,6 @@
 from legent.agent.agent import AgentClient
 import base64
 from io import BytesIO
-from PIL import Image
 from typing import List
 import numpy as np
 from legent.action.action import parse_action, Action
@@ -14,6 +13,8 @@ def encode_image_file(image_path):
 
 
 def encode_image_array(image_np):
+    from PIL import Image
+
     image_pil = Image.fromarray(image_np)
     buffer = BytesIO()
     image_pil.save(buffer, format="PNG")
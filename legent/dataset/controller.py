@@ -1,4 +1,4 @@
-from legent.action.action import Action
+from legent.action.action import Action, ActionSequence
 from legent.action.observation import Observation
 from typing import List, Optional, Dict
 import numpy as np
@@ -26,6 +26,19 @@ class Actions:
         """
         pass
 
+    def plan_ahead(self, obs: Observation, action: Action, max_actions: int) -> List[Action]:
+        """Get the actions following `action` whose outcome is known without observing, so that they can be sent together in one round trip.
+
+        Args:
+            obs (Observation): The observation `action` was computed from.
+            action (Action): The next action.
+            max_actions (int): The maximum number of actions to return.
+
+        Returns:
+            List[Action]: The actions after `action`. Empty if they depend on the next observation (the default).
+        """
+        return []
+
 
 class TrajectoryNotValidError(Exception):
     """If a trajectory is useful for traing, this error will be raised.
@@ -62,6 +75,31 @@ class PathFollower(Actions):
         camera = obs.game_states["agent_camera"]
         return self._get_next_action(agent_info["position"], camera["forward"])
 
+    def plan_ahead(self, obs: Observation, action: Action, max_actions: int) -> List[Action]:
+        # Teleport actions are executed exactly, so the path can be followed without observing the position of the agent after each of them.
+        # This only holds for PathFollower itself. The subclasses check the observations.
+        if not self.use_teleport or type(self) is not PathFollower:
+            return []
+        position = vec_xz(obs.game_states["agent"]["position"])
+        forward = vec_xz(obs.game_states["agent_camera"]["forward"])
+        actions = []
+        while len(actions) < max_actions:
+            position, forward = self._simulate(position, forward, action)
+            action = self._get_next_action({"x": position[0], "z": position[1]}, {"x": forward[0], "z": forward[1]})
+            if action is None:
+                break
+            actions.append(action)
+        return actions
+
+    @staticmethod
+    def _simulate(position, forward, action: Action):
+        """The position and forward direction (on the xz plane) after a teleport action: move forward, then rotate to the right."""
+        forward = forward / np.linalg.norm(forward)
+        position = position + forward * action.teleport_forward
+        angle = np.radians(action.rotate_right)
+        forward = np.array([forward[0] * np.cos(angle) + forward[1] * np.sin(angle), -forward[0] * np.sin(angle) + forward[1] * np.cos(angle)])
+        return position, forward
+
     def _get_next_action(self, position, forward) -> Optional[Action]:
         """Get next action.
 
@@ -265,10 +303,13 @@ class Speak(Actions):
 
 class Controller:
     # Convert a solution to control
-    def __init__(self, env: Environment, solution: List[str]) -> None:
+    def __init__(self, env: Environment, solution: List[str], use_action_sequences: bool = False) -> None:
         self.solution_steps: List[Actions]
         self.actions_queue = []
         self.env = env
+        # Send the actions that can be planned without observing (e.g. teleporting along a path) as one ActionSequence.
+        # The client must support the "SEQUENCE" action type, so it is off by default and each step sends one action.
+        self.use_action_sequences = use_action_sequences
 
         def parse_arg(input_string):
             return re.search(r"\(\"?(.*?)\"?\)", input_string).group(1)
@@ -323,15 +364,32 @@ class Controller:
             action = self.actions.get_next_action(obs)
         return action  # None means the actions has ended.
 
-    def collect_trajectory(self, task_setting, traj_id=None, add_finish_action=True, return_invalid=False):
+    def collect_trajectory(self, task_setting, traj_id=None, add_finish_action=True, return_invalid=False, max_steps=40):
         traj = Trajectory(traj_id, task_setting)
 
-        obs = self.env.step()
-        for i in range(40):
+        obs = self.env.submit_step().result()
+        while traj.steps < max_steps:
             try:
                 action = self.get_next_action(obs)
             except TrajectoryNotValidError:  # invalid trajectory: the agent does not see the object
                 break
+            # The actions that can be planned without observing (e.g. teleporting along a path) are sent with this one in a single round trip.
+            max_actions = max_steps - traj.steps - 1
+            if self.env.frame_buffer_slots is not None:
+                # NOTE: the frames of the sequence must fit in the shared memory ring buffer.
+                max_actions = min(max_actions, self.env.frame_buffer_slots - 1)
+            planned = self.actions.plan_ahead(obs, action, max_actions) if self.use_action_sequences and action is not None else []
+            if planned:
+                # Store the image of obs first. With frame_transport "shm", the frames of the sequence may overwrite it.
+                traj.add_image(obs.image)
+                traj.add_action(action)
+                obs = self.env.submit_step(ActionSequence([action] + planned)).result()
+                for image, action in zip(obs.frames[:-1], planned):
+                    traj.add_image(image)
+                    traj.add_action(action)
+                continue
+            # The action only depends on the game states, so send it before using the image. The image is decoded while the client executes the action.
+            next_obs = self.env.submit_step(action) if action is not None else None
             if (action is not None) or add_finish_action:
                 traj.add_image(obs.image)
                 traj.add_action(action)
@@ -345,7 +403,7 @@ class Controller:
                 if done:
                     return traj
                 break  # invalid trajectory: the agent does come to the user within a distance
-            obs = self.env.step(action)
+            obs = next_obs.result()
         if return_invalid:
             return traj
         return None  # discard the invalid trajectory
@@ -5,7 +5,6 @@ import re
 import time
 from typing import Literal
 import numpy as np
-from legent.server.scene_generator import generate_scene, prefabs
 from legent.utils.config import TASKS_FOLDER
 from legent.utils.io import store_json, load_json_from_toolkit, time_string, scene_string, log_green, log
 from legent.utils.math import is_point_on_box
@@ -59,6 +58,7 @@ class TaskCreator(ChatBase):
 
     def create_task_for_scene_by_hardcoding(self, task_type=Literal["come", "goto", "take", "bring", "put", "where", "exist"], scene=None, room_num=2):
         # TODO: verified the correctness of all cases
+        from legent.server.scene_generator import generate_scene
 
         def get_random_object(scene):
             object_candidates = []
@@ -79,6 +79,8 @@ class TaskCreator(ChatBase):
             return target_id, target_name
 
         def get_on_which_object(scene, object_id):
+            from legent.server.scene_generator import prefabs
+
             on_candidates = []
             object_pos = scene["instances"][object_id]["position"]
             on_id, on_name = None, None
@@ -158,6 +160,8 @@ class TaskCreator(ChatBase):
         return samples
 
     def create_task_for_scene_by_prompting(self, task_type=Literal["come", "goto", "take", "bring", "put", "where", "exist"], scene=None, sample_num=1):
+        from legent.server.scene_generator import generate_scene
+
         if not scene:
             scene = generate_scene()
 
@@ -236,6 +240,8 @@ For example (The examples are from other scenes. The number means object_id):
         return all_samples
 
     def create_scene_for_task_by_hardcoding(self, task_type="where", object_cands=None, receptacle_cands=None, room_num=1):
+        from legent.server.scene_generator import generate_scene
+
         # TODO: add goto task to this function
         if task_type == "where":
             if object_cands is None:
@@ -1,4 +1,5 @@
 import os
+import numpy as np
 from legent.utils.io import save_image, load_json, store_json, time_string
 from legent.action.action import ActionFinish
 from legent.utils.config import DATASET_FOLDER
@@ -15,7 +16,8 @@ class Trajectory:
         self.steps = 0
 
     def add_image(self, image_array):
-        self.images.append(image_array)
+        # NOTE: copy the image, which is a read-only view into the shared memory ring buffer when frame_transport is "shm" and is overwritten by the later frames.
+        self.images.append(np.array(image_array))
 
     def add_action(self, action):
         if action is None:
@@ -0,0 +1,76 @@
+from typing import Optional, Dict
+import asyncio
+from legent.environment.env import _EnvironmentCore
+from legent.environment.communicator import AsyncRpcCommunicator
+from legent.action.action import Action, ResetInfo
+from legent.action.observation import Observation
+from legent.server.scene_generator import generate_scene
+
+
+class AsyncEnvironment(_EnvironmentCore):
+    def __init__(self, env_path: Optional[str] = None, run_options: Dict = {}, **kwargs):
+        """The asyncio version of Environment, built on grpc.aio. It takes the same arguments as Environment, but only has the async API
+        (it is not an Environment, whose step and reset are blocking).
+
+        The environment is started with `await env.start()`, or by using it as an async context manager. Then `await env.step(action)`
+        and `await env.reset(info)` take and return the same Action, ResetInfo and Observation as Environment. While waiting for the game client,
+        the event loop is free, so that one python process can drive many clients (each on its own port) concurrently:
+
+            async with AsyncEnvironment(env_path="auto", run_options={"port": 50051}) as env1, AsyncEnvironment(env_path="auto", run_options={"port": 50052}) as env2:
+                obs1, obs2 = await asyncio.gather(env1.reset(), env2.reset())
+        """
+        super().__init__(env_path, run_options, **kwargs)
+
+    def _create_communicator(self, port: int, run_options: Dict) -> AsyncRpcCommunicator:
+        return AsyncRpcCommunicator(port, liveness_check_interval=run_options.get("liveness_check_interval", 1.0))
+
+    def _launch_client(self, env_path: Optional[str], port: int, run_options: Dict, rendering_options: Dict) -> None:
+        # The client is launched in start(), after the server has started listening.
+        self._launch_args = (env_path, port, run_options, rendering_options)
+
+    def _initialize(self, env_config: Dict) -> None:
+        self._env_config = env_config
+
+    async def start(self) -> "AsyncEnvironment":
+        await self._communicator.start()
+        try:
+            super()._launch_client(*self._launch_args)
+        except Exception:
+            await self.close()
+            raise
+        # Keep the static game states of the response.
+        self._make_observation(await self._communicator.initialize(self._poll_process, self._env_config))
+        return self
+
+    async def __aenter__(self) -> "AsyncEnvironment":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def step(self, inputs: Optional[Action] = None) -> Observation:
+        outputs = await self._communicator.exchange(self._build_inputs(inputs), self._poll_process)
+        return self._make_observation(outputs)
+
+    async def reset(self, inputs: Optional[ResetInfo] = None) -> Observation:
+        if inputs is None:
+            # Generate the scene in a thread, so that the other environments keep running meanwhile.
+            scene = await asyncio.get_running_loop().run_in_executor(None, self._scene_source or generate_scene)
+            inputs = ResetInfo(scene=scene)
+        return await self.step(inputs)
+
+    async def close(self) -> None:
+        """
+        Close the communicator and environment subprocess (if necessary).
+        """
+        await self._communicator.close()
+        # Waiting for the game process to exit is blocking.
+        await asyncio.get_running_loop().run_in_executor(None, self._close_process)
+        self._close_frame_buffer()
+
+    async def loop(self) -> None:
+        try:
+            while True:
+                await self.step()
+        finally:
+            await self.close()
@@ -1,6 +1,8 @@
 import grpc
+import grpc.aio
 from typing import Callable, Optional
-from multiprocessing import Pipe
+import asyncio
+import queue
 import time
 from concurrent.futures import ThreadPoolExecutor
 from legent.protobuf.communicator_pb2_grpc import CommunicatorServicer, add_CommunicatorServicer_to_server
@@ -10,15 +12,14 @@ import json
 
 class CommunicatorServicerImplementation(CommunicatorServicer):
     def __init__(self):
-        self.parent_conn, self.child_conn = Pipe()
-
-    def Initialize(self, request, context):
-        self.child_conn.send(request)
-        return self.child_conn.recv()
+        # The gRPC handler thread and the main thread are in the same process,
+        # so the protobuf objects are handed over as they are, without serialization.
+        self.observations: queue.Queue = queue.Queue()
+        self.actions: queue.Queue = queue.Queue()
 
     def GetAction(self, request, context):
-        self.child_conn.send(request)
-        return self.child_conn.recv()
+        self.observations.put(request)
+        return self.actions.get()
 
 
 # Function to call while waiting for a connection timeout.
@@ -27,13 +28,17 @@ PollCallback = Callable[[], None]
 
 
 class RpcCommunicator:
-    def __init__(self, port: int):
+    def __init__(self, port: int, liveness_check_interval: float = 1.0, timeout_wait: float = 600):
         """
         Python side of the grpc communication. Python is the server and game is the client
 
         :int port: Port number to communicate with game environment.
+        :float liveness_check_interval: Interval (in seconds) to check whether the game environment is still alive while waiting for a response.
+        :float timeout_wait: Timeout (in seconds) to wait for a response before exiting.
         """
         self.port = port
+        self.liveness_check_interval = liveness_check_interval
+        self.timeout_wait = timeout_wait
         self.server = None
         self.unity_to_external = None
         self.is_open = False
@@ -71,24 +76,23 @@ class RpcCommunicator:
                 "or use a different port."
             )
 
-    def poll_for_timeout(self, poll_callback: Optional[PollCallback] = None) -> None:
+    def receive(self, poll_callback: Optional[PollCallback] = None) -> ObservationProto:
         """
-        Polls the GRPC parent connection for data, to be used before calling recv.  This prevents
-        us from hanging indefinitely in the case where the environment process has died or was not
-        launched.
+        Waits for the next observation from the game environment. This prevents us from hanging indefinitely
+        in the case where the environment process has died or was not launched.
 
         Additionally, a callback can be passed to periodically check the state of the environment.
         This is used to detect the case when the environment dies without cleaning up the connection,
         so that we can stop sooner and raise a more appropriate error.
         """
-        # TODO: remove timeout 
-        timeout_wait = 600  # Timeout (in seconds) to wait for a response before exiting.
-        deadline = time.monotonic() + timeout_wait
-        callback_timeout_wait = timeout_wait // 200
+        # TODO: remove timeout
+        deadline = time.monotonic() + self.timeout_wait
         while time.monotonic() < deadline:
-            if self.unity_to_external.parent_conn.poll(callback_timeout_wait):
-                # Got an acknowledgment from the connection
-                return
+            try:
+                # Returns as soon as the observation arrives. The interval only bounds how late a dead environment is detected.
+                return self.unity_to_external.observations.get(timeout=self.liveness_check_interval)
+            except queue.Empty:
+                pass
             if poll_callback:
                 # Fire the callback - if it detects something wrong, it should raise an exception.
                 poll_callback()
@@ -99,20 +103,17 @@ class RpcCommunicator:
     def initialize(
         self, poll_callback: Optional[PollCallback] = None, env_config={}
     ) -> ObservationProto:
-        self.poll_for_timeout(poll_callback)
-        init_obs = self.unity_to_external.parent_conn.recv()
+        self.receive(poll_callback)
         inputs = ActionProto(type="INIT", json_actions=json.dumps(env_config))
-        self.unity_to_external.parent_conn.send(inputs)
-        self.unity_to_external.parent_conn.recv()
-        return init_obs
+        self.unity_to_external.actions.put(inputs)
+        # The response to INIT, e.g. with the static game states of the scene loaded at startup (game_states_encoding "binary").
+        return self.receive(poll_callback)
 
     def exchange(
         self, inputs: ActionProto, poll_callback: Optional[PollCallback] = None
     ) -> Optional[ObservationProto]:
-        self.unity_to_external.parent_conn.send(inputs)
-        self.poll_for_timeout(poll_callback)
-        output = self.unity_to_external.parent_conn.recv()
-        return output
+        self.unity_to_external.actions.put(inputs)
+        return self.receive(poll_callback)
 
     def close(self):
         """
@@ -120,7 +121,98 @@ class RpcCommunicator:
         """
         if self.is_open:
             message_input = ActionProto(type="CLOSE")
-            self.unity_to_external.parent_conn.send(message_input)
-            self.unity_to_external.parent_conn.close()
+            self.unity_to_external.actions.put(message_input)
             self.server.stop(False)
             self.is_open = False
+
+
+class AsyncCommunicatorServicerImplementation(CommunicatorServicer):
+    def __init__(self):
+        self.observations: asyncio.Queue = asyncio.Queue()
+        self.actions: asyncio.Queue = asyncio.Queue()
+
+    async def GetAction(self, request, context):
+        await self.observations.put(request)
+        return await self.actions.get()
+
+
+class AsyncRpcCommunicator:
+    def __init__(self, port: int, liveness_check_interval: float = 1.0, timeout_wait: float = 600):
+        """
+        The asyncio version of RpcCommunicator, built on grpc.aio. The server is created in start(), which must run in the event loop.
+
+        :int port: Port number to communicate with game environment.
+        :float liveness_check_interval: Interval (in seconds) to check whether the game environment is still alive while waiting for a response.
+        :float timeout_wait: Timeout (in seconds) to wait for a response before exiting.
+        """
+        self.port = port
+        self.liveness_check_interval = liveness_check_interval
+        self.timeout_wait = timeout_wait
+        self.server = None
+        self.unity_to_external = None
+        self.is_open = False
+
+    async def start(self):
+        """
+        Creates and starts the GRPC server.
+        """
+        try:
+            self.server = grpc.aio.server(
+                options=(
+                    ("grpc.so_reuseport", 1),
+                    ('grpc.max_receive_message_length', 500 * 1024 * 1024),  # 500MB, default is 4MB
+                    ('grpc.max_send_message_length', 500 * 1024 * 1024)
+                ),
+            )
+            self.unity_to_external = AsyncCommunicatorServicerImplementation()
+            add_CommunicatorServicer_to_server(self.unity_to_external, self.server)
+            self.server.add_insecure_port("[::]:" + str(self.port))
+            await self.server.start()
+            self.is_open = True
+        except Exception:
+            raise Exception(
+                "Worker In Use:\n"
+                f"Couldn't start communication because port {self.port} is still in use. "
+                "You may need to manually close a previously opened environment "
+                "or use a different port."
+            )
+
+    async def receive(self, poll_callback: Optional[PollCallback] = None) -> ObservationProto:
+        """
+        Waits for the next observation from the game environment, without blocking the event loop. See RpcCommunicator.receive.
+        """
+        deadline = time.monotonic() + self.timeout_wait
+        while time.monotonic() < deadline:
+            try:
+                return await asyncio.wait_for(self.unity_to_external.observations.get(), timeout=self.liveness_check_interval)
+            except asyncio.TimeoutError:
+                pass
+            if poll_callback:
+                poll_callback()
+        raise Exception("Time out. The game environment took too long to respond.\n")
+
+    async def initialize(
+        self, poll_callback: Optional[PollCallback] = None, env_config={}
+    ) -> ObservationProto:
+        await self.receive(poll_callback)
+        inputs = ActionProto(type="INIT", json_actions=json.dumps(env_config))
+        await self.unity_to_external.actions.put(inputs)
+        # The response to INIT, e.g. with the static game states of the scene loaded at startup (game_states_encoding "binary").
+        return await self.receive(poll_callback)
+
+    async def exchange(
+        self, inputs: ActionProto, poll_callback: Optional[PollCallback] = None
+    ) -> Optional[ObservationProto]:
+        await self.unity_to_external.actions.put(inputs)
+        return await self.receive(poll_callback)
+
+    async def close(self):
+        """
+        Sends a shutdown signal to the unity environment, and closes the grpc connection.
+        """
+        if self.is_open:
+            message_input = ActionProto(type="CLOSE")
+            await self.unity_to_external.actions.put(message_input)
+            # A short grace period, so that a pending GetAction receives the CLOSE action.
+            await self.server.stop(1)
+            self.is_open = False
@@ -1,28 +1,73 @@
-from typing import Optional, Dict
+from typing import Callable, Optional, Dict
 import subprocess
+from concurrent.futures import Future, ThreadPoolExecutor
 from legent.environment.env_utils import launch_executable, download_env, get_default_env_path
 from legent.environment.communicator import RpcCommunicator
-from legent.action.action import Action, ResetInfo
+from legent.environment.frame_buffer import SharedFrameBuffer
+from legent.action.action import Action, ActionSequence, ResetInfo
 from legent.action.observation import Observation
-from legent.server.scene_generator import generate_scene
+from legent.protobuf.communicator_pb2 import ActionProto, ObservationProto
 from legent.utils.config import CLIENT_FOLDER, DEFAULT_GRPC_PORT
+import json
 import os
 
 
-class Environment:
-    def __init__(self, env_path: Optional[str] = None, run_options: Dict = {}, use_animation=True, camera_resolution_width=448, camera_resolution_height=448, camera_field_of_view=120, rendering_options: Dict = {}, action_mode=0):
+class _EnvironmentCore:
+    """The parts of Environment and AsyncEnvironment that do not depend on how they talk to the client: the config, the
+    frame buffer, the game process, and the conversion of the actions and observations. The subclasses create the
+    communicator and expose the step API."""
+
+    def __init__(self, env_path: Optional[str] = None, run_options: Dict = {}, use_animation=True, camera_resolution_width=448, camera_resolution_height=448, camera_field_of_view=120, rendering_options: Dict = {}, action_mode=0, frame_transport="png", frame_buffer_slots=16, game_states_encoding="json", scene_source: Optional[Callable[[], Dict]] = None):
         """Initialize the environment.
 
         Args:
             action_mode (int, optional): 0 is low-level action mode, 1 is options-based action mode. Defaults to 0.
+            frame_transport (str, optional): "png" sends PNG-encoded frames in ObservationProto.image. "shm" lets the client write raw RGB frames
+                into a shared memory ring buffer, and Observation.image becomes a read-only view into it (valid for the next frame_buffer_slots frames).
+                The client must run on the same machine. Defaults to "png".
+            frame_buffer_slots (int, optional): Number of frames in the shared memory ring buffer. Only used when frame_transport is "shm".
+                It should be larger than the number of animation frames in one step. Defaults to 16.
+            game_states_encoding (str, optional): "json" sends the whole game states as a JSON string on every step. "binary" sends the positions, rotations
+                and forwards as packed float arrays, and the static fields (e.g. the prefabs of the instances) only at reset. Observation.game_states
+                is still available, and Observation.game_states_arrays gives the arrays without building the dict. It pays off with a C++/upb protobuf
+                backend; the pure-python protobuf parses packed floats slower than json parses the string. Defaults to "json".
+            scene_source (Callable[[], Dict], optional): Returns the scene used by reset() when no ResetInfo is given, e.g. a ScenePrefetcher
+                that generates the scenes in the background. Defaults to None, which calls generate_scene().
         """
         self._process: Optional[subprocess.Popen] = None
+        self._frame_buffer: Optional[SharedFrameBuffer] = None
+        if frame_transport == "shm":
+            self._frame_buffer = SharedFrameBuffer(camera_resolution_width, camera_resolution_height, slots=frame_buffer_slots)
+        elif frame_transport != "png":
+            raise ValueError(f"Unknown frame_transport: {frame_transport}. Must be 'png' or 'shm'.")
+        if game_states_encoding not in ["json", "binary"]:
+            raise ValueError(f"Unknown game_states_encoding: {game_states_encoding}. Must be 'json' or 'binary'.")
+        self._game_states_encoding = game_states_encoding
+        self._static_game_states: Optional[Dict] = None
+        self._scene_source = scene_source
         # RPC is a one-to-one communication method, with each pair of python worker and game client using the same port.
         # If there are multiple environments, multiple different ports are required.
         port = run_options.get("port", DEFAULT_GRPC_PORT)
-        self._communicator = RpcCommunicator(port)
+        self._communicator = self._create_communicator(port, run_options)
         welcome()
+        try:
+            self._launch_client(env_path, port, run_options, rendering_options)
+        except Exception:
+            self.close()
+            raise
+        env_config = {"use_animation": use_animation, "camera_resolution_width": camera_resolution_width, "camera_resolution_height": camera_resolution_height, "camera_field_of_view": camera_field_of_view, "background": rendering_options.get("background", 1), "use_shadows": rendering_options.get("use_shadows", 1), "use_default_light": rendering_options.get("use_default_light", 1), "style": rendering_options.get("style", 1), "action_mode": action_mode}
+        if self._frame_buffer is not None:
+            env_config.update({"frame_transport": "shm", "frame_buffer_name": self._frame_buffer.name, "frame_buffer_slots": frame_buffer_slots})
+        if game_states_encoding == "binary":
+            env_config["game_states_encoding"] = "binary"
+        self._initialize(env_config)
 
+    @property
+    def frame_buffer_slots(self) -> Optional[int]:
+        """The number of frames in the shared memory ring buffer, None if frame_transport is "png"."""
+        return self._frame_buffer.slots if self._frame_buffer is not None else None
+
+    def _launch_client(self, env_path: Optional[str], port: int, run_options: Dict, rendering_options: Dict) -> None:
         # If the environment name is None, a new environment will not be launched
         # and the communicator will directly try to connect to an existing unity environment (Unity Editor, or an executable file manually open).
         if env_path == "auto":  # TODO: check if up to date
@@ -30,16 +75,11 @@ class Environment:
                 download_env()
             env_path = get_default_env_path()
         if env_path is not None:
-            try:
-                run_args = ["--width", str(run_options.get("width", 640)), "--height", str(run_options.get("height", 480)), "--port", str(port)]
-                rendering_args = ["--background", str(rendering_options.get("background", 1)), "--use_shadows", str(rendering_options.get("use_shadows", 1)),"--use_default_light", str(rendering_options.get("use_default_light", 1)), "--style", str(rendering_options.get("style", 1))]
-                self._process = launch_executable(file_name=env_path, args=run_args + rendering_args)
-            except Exception:
-                self.close()
-                raise
+            run_args = ["--width", str(run_options.get("width", 640)), "--height", str(run_options.get("height", 480)), "--port", str(port)]
+            rendering_args = ["--background", str(rendering_options.get("background", 1)), "--use_shadows", str(rendering_options.get("use_shadows", 1)),"--use_default_light", str(rendering_options.get("use_default_light", 1)), "--style", str(rendering_options.get("style", 1))]
+            self._process = launch_executable(file_name=env_path, args=run_args + rendering_args)
         else:
             print(f"Listening on port {port}. " f"Start inference or training by launching the LEGENT environment client.")
-        self._communicator.initialize(self._poll_process, {"use_animation": use_animation, "camera_resolution_width": camera_resolution_width, "camera_resolution_height": camera_resolution_height, "camera_field_of_view": camera_field_of_view, "background": rendering_options.get("background", 1), "use_shadows": rendering_options.get("use_shadows", 1), "use_default_light": rendering_options.get("use_default_light", 1), "style": rendering_options.get("style", 1), "action_mode": action_mode})
 
     def _poll_process(self) -> None:
         """
@@ -51,38 +91,111 @@ class Environment:
         if poll_res is not None:
             raise Exception("Game client exited")
 
-    def step(self, inputs: Optional[Action] = None) -> Observation:
-        # TODO: refine code comments
+    def _build_inputs(self, inputs) -> ActionProto:
         if inputs is None:
             inputs = Action()
-        if isinstance(inputs, Action):
+        if isinstance(inputs, ActionSequence) and self._frame_buffer is not None and sum(inputs.capture) > self._frame_buffer.slots:
+            raise ValueError(f"Cannot capture {sum(inputs.capture)} frames in one step with frame_buffer_slots={self._frame_buffer.slots}.")
+        if isinstance(inputs, Action) or isinstance(inputs, ActionSequence) or isinstance(inputs, ResetInfo):
             inputs = inputs.build()
-        outputs = self._communicator.exchange(inputs, self._poll_process)
-        return Observation(outputs)
+        return inputs
+
+    def _make_observation(self, outputs: ObservationProto) -> Observation:
+        if self._game_states_encoding == "binary" and outputs.float_observations and outputs.game_states:
+            # The static fields changed (e.g. after a reset). They are only sent this time.
+            self._static_game_states = json.loads(outputs.game_states)
+        return Observation(outputs, self._frame_buffer, self._static_game_states)
+
+    def _close_process(self) -> None:
+        if self._process is not None:
+            # Wait a bit for the process to shutdown, but kill it if it takes too long
+            timeout = 300  # Number of seconds to wait for the environment to shut down beforeforce-killing it.
+            try:
+                self._process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+            # Set to None so we don't try to close multiple times.
+            self._process = None
+
+    def _close_frame_buffer(self) -> None:
+        if self._frame_buffer is not None:
+            self._frame_buffer.close()
+            self._frame_buffer = None
+
+
+class Environment(_EnvironmentCore):
+    # The executors of submit_step, created by its first call.
+    _step_executor: Optional[ThreadPoolExecutor] = None
+    _decode_executor: Optional[ThreadPoolExecutor] = None
+
+    def _create_communicator(self, port: int, run_options: Dict) -> RpcCommunicator:
+        # How often (in seconds) to check that the game process is still alive while waiting for its response.
+        return RpcCommunicator(port, liveness_check_interval=run_options.get("liveness_check_interval", 1.0))
+
+    def _initialize(self, env_config: Dict) -> None:
+        # Keep the static game states of the response.
+        self._make_observation(self._communicator.initialize(self._poll_process, env_config))
+
+    def step(self, inputs: Optional[Action] = None) -> Observation:
+        # TODO: refine code comments
+        if self._step_executor is not None:
+            # Keep the order with the steps submitted before.
+            return self.submit_step(inputs, decode_image=False).result()
+        return self._step(inputs)
+
+    def _step(self, inputs: Optional[Action] = None) -> Observation:
+        outputs = self._communicator.exchange(self._build_inputs(inputs), self._poll_process)
+        return self._make_observation(outputs)
+
+    def submit_step(self, inputs: Optional[Action] = None, decode_image: bool = True) -> "Future[Observation]":
+        """Submit a step without waiting for it, and return a future of its Observation.
+
+        The submitted steps are executed one by one in the order of submission, so the futures are resolved in order. This lets the caller
+        send step k+1 while it is still using observation k. If decode_image is True, the image of the observation starts being decoded on
+        a worker thread as soon as it arrives, while Observation.image waits for it.
+
+        Example (the image of step k is decoded while the client executes step k+1):
+            obs = env.submit_step(action).result()
+            next_obs = env.submit_step(policy(obs.game_states))
+            images.append(obs.image)
+            obs = next_obs.result()
+        """
+        if self._step_executor is None:
+            self._step_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="legent_step")
+            self._decode_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="legent_decode")
+
+        def step():
+            obs = self._step(inputs)
+            if decode_image:
+                obs.decode_in_background(self._decode_executor)
+            return obs
+
+        return self._step_executor.submit(step)
 
     def reset(self, inputs: Optional[ResetInfo] = None) -> Observation:
         # NOTE: This design is different from most RL environments, as
         # all terminal decisions are made by the backend, allowing reset() and step() to be called in the same way.
         if inputs is None:
-            inputs = ResetInfo(scene=generate_scene())
-        if isinstance(inputs, Action) or isinstance(inputs, ResetInfo):
-            inputs = inputs.build()
+            from legent.server.scene_generator import generate_scene
+
+            inputs = ResetInfo(scene=self._scene_source() if self._scene_source else generate_scene())
         return self.step(inputs)
 
     def close(self) -> None:
         """
         Close the communicator and environment subprocess (if necessary).
         """
+        self._close_executors()
         self._communicator.close()
-        if self._process is not None:
-            # Wait a bit for the process to shutdown, but kill it if it takes too long
-            timeout = 300  # Number of seconds to wait for the environment to shut down beforeforce-killing it.
-            try:
-                self._process.wait(timeout=timeout)
-            except subprocess.TimeoutExpired:
-                self._process.kill()
-            # Set to None so we don't try to close multiple times.
-            self._process = None
+        self._close_process()
+        self._close_frame_buffer()
+
+    def _close_executors(self) -> None:
+        # Finish the submitted steps first.
+        for executor in [self._step_executor, self._decode_executor]:
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self._step_executor, self._decode_executor = None, None
 
     def loop(self) -> None:
         try:
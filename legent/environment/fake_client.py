@@ -0,0 +1,233 @@
+from typing import Dict, List, Optional
+from multiprocessing import Process
+import json
+import io
+import math
+import struct
+import time
+import grpc
+from legent.protobuf.communicator_pb2 import ActionProto, ObservationProto
+from legent.protobuf.communicator_pb2_grpc import CommunicatorStub
+from legent.environment.frame_buffer import SharedFrameBuffer
+from legent.action.game_states import encode_game_states
+from legent.utils.config import DEFAULT_GRPC_PORT
+
+
+MOVE_DISTANCE_PER_STEP = 0.1  # for use_teleport = False
+
+
+def _vec(v: List[float]) -> Dict[str, float]:
+    return {"x": float(v[0]), "y": float(v[1]), "z": float(v[2])}
+
+
+def _forward(rotation_y: float) -> List[float]:
+    rad = math.radians(rotation_y)
+    return [math.sin(rad), 0.0, math.cos(rad)]
+
+
+class FakeClient:
+    """A pure-Python stand-in for the LEGENT game client.
+
+    It speaks the same gRPC protocol as the Unity client: it calls GetAction with the current observation and applies the returned action.
+    Rendering is replaced by a synthetic frame and physics by a simple kinematic model of the agent, so that the python side
+    (transport, observation decoding, controllers) can be tested and benchmarked on machines without a GPU or the client installed.
+
+    Emulated:
+        - INIT config, including frame_transport "png" and "shm", and game_states_encoding "json" and "binary".
+        - RESET with a scene dict. Instances, the player and the agent are placed as specified.
+        - Agent rotate_right and teleport_forward (or move_forward), and grab.
+        - SEQUENCE actions, with the captured frames returned as a length-prefixed sequence (or in several frame slots).
+        - APIs: PathToUser, PathToObject (a straight path) and ObjectInView (a field-of-view test without occlusion).
+    """
+
+    def __init__(self, port: int = DEFAULT_GRPC_PORT, host: str = "localhost", round_trip_latency: float = 0) -> None:
+        self.port = port
+        self.host = host
+        self.round_trip_latency = round_trip_latency  # seconds added to every round trip, e.g. the frame time of the game engine
+        self.config: Dict = {}
+        self.width, self.height = 448, 448
+        self.frame_buffer: Optional[SharedFrameBuffer] = None
+        self.steps = 0
+        self._base_frame = None
+
+        self.instances: List[Dict] = []
+        self.player = {"position": [0.0, 0.05, 0.0], "rotation_y": 0.0}
+        self.agent = {"position": [0.0, 0.05, 2.0], "rotation_y": 180.0}
+        self.agent_grab_instance = -1
+        self.api_returns: Dict = {}
+        self._static_changed = True
+        self._captured_frames: Optional[List] = None  # frames captured during a SEQUENCE action
+
+    def run(self) -> None:
+        channel = grpc.insecure_channel(
+            f"{self.host}:{self.port}",
+            options=[("grpc.max_receive_message_length", 500 * 1024 * 1024), ("grpc.max_send_message_length", 500 * 1024 * 1024)],
+        )
+        stub = CommunicatorStub(channel)
+        try:
+            # The python server may not be listening yet.
+            action: ActionProto = stub.GetAction(ObservationProto(type="STEP"), wait_for_ready=True)
+            while action.type != "CLOSE":
+                self.apply(action)
+                if self.round_trip_latency:
+                    time.sleep(self.round_trip_latency)
+                action = stub.GetAction(self.observe())
+        except grpc.RpcError:
+            # The python side has been shut down.
+            pass
+        finally:
+            channel.close()
+            if self.frame_buffer is not None:
+                self.frame_buffer.close()
+
+    def apply(self, action: ActionProto) -> None:
+        self.api_returns = {}
+        if action.type == "INIT":
+            self.initialize(json.loads(action.json_actions))
+        elif action.type == "RESET":
+            self.reset(json.loads(action.json_actions))
+        elif action.type == "STEP":
+            self.move_agent(action)
+        elif action.type == "SEQUENCE":
+            self._captured_frames = []
+            for sub_action, capture in zip(action.action_sequence.actions, action.action_sequence.capture):
+                self.move_agent(sub_action)
+                if capture:
+                    self._captured_frames.append(self._next_frame())
+        if action.api_calls:
+            for call in json.loads(action.api_calls)["calls"]:
+                self.api_returns.update(self.call_api(call["api"], call["args"]))
+
+    def initialize(self, config: Dict) -> None:
+        import numpy as np
+
+        self.config = config
+        self.width = config.get("camera_resolution_width", 448)
+        self.height = config.get("camera_resolution_height", 448)
+        if config.get("frame_transport", "png") == "shm":
+            self.frame_buffer = SharedFrameBuffer(self.width, self.height, slots=config["frame_buffer_slots"], name=config["frame_buffer_name"], create=False)
+
+        # A smooth gradient with some texture noise, so that PNG encoding costs about as much as for a rendered scene.
+        rng = np.random.default_rng(0)
+        ys, xs = np.mgrid[0 : self.height, 0 : self.width]
+        base = np.stack([xs * 255 // max(1, self.width - 1), ys * 255 // max(1, self.height - 1), (xs + ys) % 256], axis=-1)
+        base = base + rng.integers(0, 24, size=base.shape)
+        self._base_frame = np.clip(base, 0, 255).astype(np.uint8)
+
+    def reset(self, scene: Dict) -> None:
+        self.instances = [
+            {"prefab": instance["prefab"], "position": list(instance["position"]), "rotation_y": instance["rotation"][1]}
+            for instance in scene.get("instances", [])
+        ]
+        for name in ["player", "agent"]:
+            if name in scene:
+                getattr(self, name).update({"position": list(scene[name]["position"]), "rotation_y": scene[name]["rotation"][1]})
+        self.agent_grab_instance = -1
+        self._static_changed = True
+
+    def move_agent(self, action: ActionProto) -> None:
+        float_actions = list(action.float_actions) + [0] * (10 - len(action.float_actions))
+        move_forward, rotate_right, grab, teleport_forward = float_actions[1], float_actions[2], float_actions[5], float_actions[6]
+        use_teleport = bool(action.int_actions[0]) if action.int_actions else False
+
+        distance = teleport_forward if use_teleport else move_forward * MOVE_DISTANCE_PER_STEP
+        forward = _forward(self.agent["rotation_y"])
+        self.agent["position"][0] += forward[0] * distance
+        self.agent["position"][2] += forward[2] * distance
+        self.agent["rotation_y"] = (self.agent["rotation_y"] + rotate_right) % 360
+        if grab:
+            self.agent_grab_instance = -1 if self.agent_grab_instance != -1 else self._nearest_instance()
+
+    def _nearest_instance(self) -> int:
+        if not self.instances:
+            return -1
+        ax, _, az = self.agent["position"]
+        distances = [(p["position"][0] - ax) ** 2 + (p["position"][2] - az) ** 2 for p in self.instances]
+        return distances.index(min(distances))
+
+    def call_api(self, api: str, args: str) -> Dict:
+        if api == "PathToUser":
+            return {"corners": [_vec(self.agent["position"]), _vec(self.player["position"])]}
+        elif api == "PathToObject":
+            return {"corners": [_vec(self.agent["position"]), _vec(self.instances[int(args)]["position"])]}
+        elif api == "ObjectInView":
+            target = self.instances[int(args)]["position"]
+            ax, _, az = self.agent["position"]
+            forward = _forward(self.agent["rotation_y"])
+            angle = math.degrees(math.atan2(target[0] - ax, target[2] - az) - math.atan2(forward[0], forward[2]))
+            angle = (angle + 180) % 360 - 180
+            return {"in_view": abs(angle) < self.config.get("camera_field_of_view", 120) / 2}
+        return {}
+
+    def render(self):
+        import numpy as np
+
+        return np.roll(self._base_frame, self.steps % self.width, axis=1)
+
+    def game_states(self) -> Dict:
+        def character(info):
+            forward = _forward(info["rotation_y"])
+            camera_position = [info["position"][0], info["position"][1] + 1.5, info["position"][2]]
+            return {"position": _vec(info["position"]), "rotation": _vec([0, info["rotation_y"], 0]), "forward": _vec(forward)}, {"position": _vec(camera_position), "forward": _vec(forward)}
+
+        player, player_camera = character(self.player)
+        agent, agent_camera = character(self.agent)
+        return {
+            "instances": [
+                {"prefab": instance["prefab"], "position": _vec(instance["position"]), "rotation": _vec([0, instance["rotation_y"], 0]), "forward": _vec(_forward(instance["rotation_y"]))}
+                for instance in self.instances
+            ],
+            "player": player,
+            "agent": agent,
+            "player_camera": player_camera,
+            "agent_camera": agent_camera,
+            "player_grab_instance": -1,
+            "agent_grab_instance": self.agent_grab_instance,
+        }
+
+    def _next_frame(self):
+        self.steps += 1
+        return self.render()
+
+    def observe(self) -> ObservationProto:
+        from PIL import Image
+
+        if self._captured_frames is not None:
+            frames, self._captured_frames = self._captured_frames, None
+        else:
+            frames = [self._next_frame()]
+        obs = ObservationProto(type="STEP", api_returns=json.dumps(self.api_returns) if self.api_returns else "")
+        if self.config.get("game_states_encoding", "json") == "binary":
+            floats, ints, static = encode_game_states(self.game_states())
+            obs.float_observations.extend(floats)
+            obs.int_observations.extend(ints)
+            if self._static_changed:
+                obs.game_states = json.dumps(static)
+                self._static_changed = False
+        else:
+            obs.game_states = json.dumps(self.game_states())
+        if self.frame_buffer is not None:
+            obs.frame_slots.extend(self.frame_buffer.write(frame) for frame in frames)
+        else:
+            images = []
+            for frame in frames:
+                stream = io.BytesIO()
+                Image.fromarray(frame).save(stream, format="PNG")
+                images.append(stream.getvalue())
+            if len(images) == 1:
+                obs.image = images[0]
+            else:
+                # The same length-prefixed format as the animation frames (see Observation.unpack_image_sequence).
+                obs.image = b"".join(struct.pack("I", len(image)) + image for image in images)
+        return obs
+
+
+def run_fake_client(port: int = DEFAULT_GRPC_PORT, round_trip_latency: float = 0) -> None:
+    FakeClient(port, round_trip_latency=round_trip_latency).run()
+
+
+def launch_fake_client(port: int = DEFAULT_GRPC_PORT, round_trip_latency: float = 0) -> Process:
+    """Run a FakeClient in a background process, playing the role of the game client for an Environment listening on the port."""
+    process = Process(target=run_fake_client, args=(port, round_trip_latency), daemon=True)
+    process.start()
+    return process
@@ -0,0 +1,78 @@
+from typing import Optional
+from multiprocessing import shared_memory, resource_tracker
+import os
+import uuid
+
+
+def _attach_untracked(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing segment without registering it to the resource tracker.
+
+    The creator owns the segment. Otherwise the resource tracker of the attached process would unlink it when that process exits.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # python >= 3.13
+    except TypeError:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedFrameBuffer:
+    """A ring of raw RGB frames in shared memory (backed by /dev/shm on Linux).
+
+    The python side creates the buffer and announces its name in the INIT config. The game client attaches to it,
+    writes each rendered frame into the next slot and only sends the slot indices in ObservationProto.frame_slots,
+    so frames cross the process boundary without PNG encoding/decoding.
+
+    A frame returned by view() is a read-only numpy view into the buffer. It stays valid until its slot is written
+    again, i.e. for the next `slots` frames. Copy it if you need to keep it longer.
+    """
+
+    def __init__(self, width: int, height: int, slots: int = 16, name: Optional[str] = None, create: bool = True) -> None:
+        self.width = width
+        self.height = height
+        self.slots = slots
+        self.frame_shape = (height, width, 3)
+        self.frame_nbytes = height * width * 3
+        if create:
+            if name is None:
+                name = f"legent_frames_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=self.frame_nbytes * slots)
+        else:
+            self._shm = _attach_untracked(name)
+        self.name = self._shm.name
+        self._owner = create
+        self._next_slot = 0
+
+    def view(self, slot: int):
+        import numpy as np
+
+        frame = np.ndarray(self.frame_shape, dtype=np.uint8, buffer=self._shm.buf, offset=slot * self.frame_nbytes)
+        frame.flags.writeable = False
+        return frame
+
+    def write(self, frame) -> int:
+        """Write a (height, width, 3) uint8 frame into the next slot of the ring and return the slot index."""
+        import numpy as np
+
+        slot = self._next_slot
+        target = np.ndarray(self.frame_shape, dtype=np.uint8, buffer=self._shm.buf, offset=slot * self.frame_nbytes)
+        target[...] = frame
+        self._next_slot = (slot + 1) % self.slots
+        return slot
+
+    def close(self) -> None:
+        try:
+            self._shm.close()
+        except BufferError:
+            # Observations still hold views into the buffer. The mapping is released when they are garbage collected.
+            pass
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+            self._owner = False
@@ -1,15 +1,17 @@
-from typing import Dict, NamedTuple, List
-from multiprocessing import Process, Pipe, Queue
-from multiprocessing.connection import Connection
-from queue import Empty as EmptyQueueException
-from legent.protobuf.communicator_pb2 import ActionProto, ObservationProto
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from multiprocessing import Process, Pipe
+from multiprocessing.connection import Connection, wait
+import traceback
+import time
+from legent.action.action import Action, ResetInfo
+from legent.action.observation import Observation
 from legent.environment.env import Environment
 from legent.utils.config import DEFAULT_GRPC_PORT
 
-
-class EnvResponse(NamedTuple):
-    worker_id: int
-    observations: ObservationProto
+# scene_source(env_id) returns the scene dict used to reset the env_id-th environment.
+SceneSource = Callable[[int], Dict]
+# done_fn(obs) tells whether the episode has ended after this observation.
+DoneFn = Callable[[Observation], bool]
 
 
 class EnvWorker:
@@ -20,134 +22,231 @@ class EnvWorker:
         self.waiting_obs = False
         self.alive = True
 
-    def send(self, actions: ActionProto) -> None:
-        self.conn.send(actions)
+    def send(self, command: str, data=None) -> None:
+        self.conn.send((command, data))
+
+    def recv(self) -> Tuple:
+        response = self.conn.recv()
+        self.waiting_obs = False
+        if response[0] == "error":
+            self.alive = False
+            raise RuntimeError(f"Environment {self.worker_id} failed:\n{response[1]}")
+        return response
+
+
+def _observation_to_result(obs: Observation, env_kwargs: Dict):
+    import numpy as np
 
-    def recv(self) -> EnvResponse:
-        return self.conn.recv()
+    image = obs.image
+    if image is None:
+        image = np.zeros((env_kwargs.get("camera_resolution_height", 448), env_kwargs.get("camera_resolution_width", 448), 3), dtype=np.uint8)
+    # NOTE: the game states and the API returns are decoded by the caller if it reads them, not on every step of the worker.
+    info = {"text": obs.text, "observation": obs.without_frames()}
+    return np.ascontiguousarray(image), info
 
 
-def worker(parent_conn: Connection, step_queue: Queue, worker_id: int, run_options: Dict) -> None:
+def worker(parent_conn: Connection, worker_id: int, env_path: Optional[str], run_options: Dict, env_kwargs: Dict, scene_source: Optional[SceneSource], done_fn: Optional[DoneFn], max_episode_steps: Optional[int]) -> None:
+    env = None
     try:
-        # Each worker has its own Environment.
-        run_options["port"] = DEFAULT_GRPC_PORT + worker_id
-        env = Environment(file_name=run_options["file_name"], run_options=run_options)
+        # Each worker has its own Environment, and thus its own port.
+        env = Environment(env_path=env_path, run_options=run_options, **env_kwargs)
+        episode_steps = 0
+
+        def reset():
+            nonlocal episode_steps
+            episode_steps = 0
+            start = time.perf_counter()
+            obs = env.reset(ResetInfo(scene=scene_source(worker_id)) if scene_source else None)
+            image, info = _observation_to_result(obs, env_kwargs)
+            info.update({"reset_latency": time.perf_counter() - start, "episode_steps": 0, "done": False})
+            return image, info
+
         while True:
-            # The parent_conn only needs to use recv() and does not need to send(), as return values are conveyed through the step_queue.
-            actions: ActionProto = parent_conn.recv()
-            if actions.type == "STEP" or actions.type == "RESET":
-                observations = env.step(actions)
-                step_queue.put(EnvResponse(worker_id, observations))
-            elif actions.type == "CLOSE":
+            command, data = parent_conn.recv()
+            if command == "reset":
+                parent_conn.send(("obs", *reset()))
+            elif command == "step":
+                start = time.perf_counter()
+                obs = env.step(data)
+                latency = time.perf_counter() - start
+                episode_steps += 1
+                done = (done_fn is not None and done_fn(obs)) or (max_episode_steps is not None and episode_steps >= max_episode_steps)
+                image, info = _observation_to_result(obs, env_kwargs)
+                info.update({"step_latency": latency, "episode_steps": episode_steps, "done": done})
+                if done:
+                    # Auto-reset: return the first observation of the next episode, and the last one of this episode in final_image/final_info.
+                    final_image, final_info = image, info
+                    image, info = reset()
+                    info.update({"step_latency": latency, "done": True, "final_image": final_image, "final_info": final_info})
+                parent_conn.send(("obs", image, info))
+            elif command == "close":
                 break
-    except Exception as e:
-        raise
+    except (KeyboardInterrupt, EOFError):
+        pass
+    except Exception:
+        parent_conn.send(("error", traceback.format_exc()))
     finally:
-        env.close()
+        if env is not None:
+            env.close()
         parent_conn.close()
-        step_queue.put(EnvResponse(worker_id, ObservationProto(type="EXITED")))
-        step_queue.close()
 
 
-class ParallelEnvironment:
-    def __init__(self, file_name, num_envs: int = 1, run_options: Dict = {}):
-        run_options["file_name"] = file_name
+class VectorEnvironment:
+    def __init__(self, num_envs: int, env_path: Optional[str] = None, run_options: Dict = {}, scene_source: Optional[SceneSource] = None, done_fn: Optional[DoneFn] = None, max_episode_steps: Optional[int] = None, **env_kwargs):
+        """Run num_envs Environments in worker processes and step them together.
+
+        The environment i listens on port run_options["port"] + i (DEFAULT_GRPC_PORT + i by default). Each worker decodes its own observations,
+        and the images are returned stacked as a (num_envs, camera_resolution_height, camera_resolution_width, 3) uint8 array.
+
+        Args:
+            num_envs (int): Number of environments.
+            env_path (str, optional): Passed to each Environment. "auto" launches one game client per environment, None waits for clients to connect.
+            run_options (Dict, optional): Passed to each Environment, with "port" as the base port.
+            scene_source (SceneSource, optional): scene_source(env_id) returns the scene used to reset the env_id-th environment. It is called in the worker,
+                so it should be picklable if the workers are not forked. Defaults to None, which resets with generate_scene().
+            done_fn (DoneFn, optional): done_fn(obs) tells whether the episode has ended after the observation. Defaults to None.
+            max_episode_steps (int, optional): Episodes are ended after this number of steps. Defaults to None.
+            **env_kwargs: Other arguments of Environment, e.g. camera_resolution_width or frame_transport.
+
+        The environments whose episode has ended (according to done_fn or max_episode_steps) are reset automatically. The step then returns
+        the first observation of the new episode, with info["done"] set, and the last observation of the finished episode in info["final_image"]
+        and info["final_info"].
+
+        Each info is a dict with "text", "observation", "episode_steps" and "done". info["observation"] is the Observation without its image,
+        whose game_states and api_returns are decoded when they are read. The info of a step has "step_latency" (seconds spent in
+        Environment.step of the worker), and the info of a reset (including the automatic ones) has "reset_latency".
+        """
         self.num_envs = num_envs
+        base_port = run_options.get("port", DEFAULT_GRPC_PORT)
 
         self.env_workers: List[EnvWorker] = []
-        self.step_queue: Queue = Queue()
-        # create env workers
         for worker_id in range(num_envs):
             parent_conn, child_conn = Pipe()
+            worker_run_options = {**run_options, "port": base_port + worker_id}
             child_process = Process(
                 target=worker,
-                args=(child_conn, self.step_queue, worker_id, run_options)
+                args=(child_conn, worker_id, env_path, worker_run_options, env_kwargs, scene_source, done_fn, max_episode_steps),
+                daemon=True,
             )
             child_process.start()
-            env_worker = EnvWorker(child_process, worker_id, parent_conn)
-            self.env_workers.append(env_worker)
-        self.workers_alive = self.num_envs
+            child_conn.close()
+            self.env_workers.append(EnvWorker(child_process, worker_id, parent_conn))
+
+        self._latency_count = [0] * num_envs
+        self._latency_sum = [0.0] * num_envs
+        self._latency_max = [0.0] * num_envs
+        self._latency_last = [0.0] * num_envs
+
+    def _record(self, worker_id: int, info: Dict) -> None:
+        if "step_latency" not in info:
+            return
+        latency = info["step_latency"]
+        self._latency_count[worker_id] += 1
+        self._latency_sum[worker_id] += latency
+        self._latency_max[worker_id] = max(self._latency_max[worker_id], latency)
+        self._latency_last[worker_id] = latency
+
+    def _collect(self, worker_ids: List[int]):
+        import numpy as np
+
+        images, infos = [], []
+        for worker_id in worker_ids:
+            _, image, info = self.env_workers[worker_id].recv()
+            self._record(worker_id, info)
+            images.append(image)
+            infos.append(info)
+        return np.stack(images), infos
+
+    def reset(self) -> Tuple["np.ndarray", List[Dict]]:
+        """Reset all the environments.
 
-        self.actions = [None for i in range(num_envs)]
-        self.reset()
-        # welcome()
+        Returns:
+            Tuple[np.ndarray, List[Dict]]: The stacked images and the infos.
+        """
+        self.reset_async(list(range(self.num_envs)))
+        return self._collect(list(range(self.num_envs)))
 
-    def check_waiting(self):
-        for worker_id in range(self.num_envs):
-            env_worker = self.env_workers[worker_id]
-            if not env_worker.alive:
-                continue
-            if self.actions[worker_id] != None:
-                assert not env_worker.waiting_obs
-            else:
-                assert env_worker.waiting_obs
+    def step(self, actions: List[Action]) -> Tuple["np.ndarray", List[Dict]]:
+        """Step all the environments in lockstep. actions[i] is executed by the i-th environment.
 
-    def worker_act(self, worker_id: int, actions: ActionProto):
-        self.actions[worker_id] = actions
+        Returns:
+            Tuple[np.ndarray, List[Dict]]: The stacked images and the infos, in the order of the environments.
+        """
+        if len(actions) != self.num_envs:
+            raise ValueError(f"Expected {self.num_envs} actions, got {len(actions)}.")
+        self.step_async(dict(enumerate(actions)))
+        return self._collect(list(range(self.num_envs)))
 
-    def worker_reset(self, worker_id):
-        self.actions[worker_id] = ActionProto(type="RESET")
+    def reset_async(self, env_ids: List[int]) -> None:
+        for env_id in env_ids:
+            self._send(env_id, "reset")
 
-    def worker_close(self, worker_id):
-        self.actions[worker_id] = ActionProto(type="CLOSE")
+    def step_async(self, actions: Dict[int, Action]) -> None:
+        """Send actions to some of the environments without waiting for the observations. Use step_wait to get them.
 
-    def step(self) -> Dict[int, ObservationProto]:
+        Args:
+            actions (Dict[int, Action]): Maps env ids to actions. The environments must not be waiting for an observation already.
         """
-        Step the environment. Execute actions on specified environments and return observations that have been completed up to now.
-
-        Note that the observations paired with the actions may not be included in the current returns (may be included in the next call or later).
-        The actions and observations should be externally paired by using the worker_id.
+        for env_id, action in actions.items():
+            self._send(env_id, "step", action)
 
-        Args:
-            worker_actions (Dict[int, Dict]): A dictionary that maps worker_ids to actions. The worker_id-th environment will execute worker_actions[worker_id]. 
-                The worker_id that is not included indicates that no action should be executed, and the worker_id-th environment continues to wait for observations.
+    def step_wait(self, min_results: int = 1, timeout: Optional[float] = None) -> Tuple[List[int], "np.ndarray", List[Dict]]:
+        """Wait until at least min_results of the pending environments have returned their observations (async mode).
 
         Returns:
-            Dict[int, ObservationProto]: A dictionary that maps worker_ids to observations. Worker_obs[worker_id] is the observations of worker_id-th environment.
-                Returning {} indicates that all environments have been closed.
+            Tuple[List[int], np.ndarray, List[Dict]]: The env ids, their stacked images and their infos. The env ids are empty if it timed out.
         """
-        self.check_waiting()
+        import numpy as np
+
+        pending = {env_worker.conn: env_worker.worker_id for env_worker in self.env_workers if env_worker.waiting_obs}
+        if not pending:
+            raise RuntimeError("No environment is waiting for an observation. Call step_async or reset_async first.")
+        min_results = min(min_results, len(pending))
+        ready: List[int] = []
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while len(ready) < min_results:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            conns = wait([conn for conn in pending if pending[conn] not in ready], timeout=remaining)
+            if not conns:
+                break
+            ready.extend(pending[conn] for conn in conns)
+        if not ready:
+            return [], np.empty((0,), dtype=np.uint8), []
+        ready.sort()
+        images, infos = self._collect(ready)
+        return ready, images, infos
+
+    def _send(self, env_id: int, command: str, data=None) -> None:
+        env_worker = self.env_workers[env_id]
+        if not env_worker.alive:
+            raise RuntimeError(f"Environment {env_id} has been closed.")
+        if env_worker.waiting_obs:
+            raise RuntimeError(f"Environment {env_id} is still waiting for the observation of its last command.")
+        env_worker.send(command, data)
+        env_worker.waiting_obs = True
+
+    def latency_stats(self) -> List[Dict[str, float]]:
+        """Per-worker step latency (seconds spent in Environment.step by each worker, without the resets): count, mean, max and last."""
+        return [
+            {"count": count, "mean": total / count if count else 0.0, "max": max_latency, "last": last}
+            for count, total, max_latency, last in zip(self._latency_count, self._latency_sum, self._latency_max, self._latency_last)
+        ]
 
-        # Queue steps for any workers which aren't in the "waiting_obs" state.
-        for worker_id in range(self.num_envs):
-            env_worker = self.env_workers[worker_id]
+    def close(self) -> None:
+        for env_worker in self.env_workers:
             if not env_worker.alive:
                 continue
-            if self.actions[worker_id] != None:
-                # assign action to env_worker according to worker_id
-                env_worker.send(self.actions[worker_id])
-                env_worker.waiting_obs = True
-        self.actions = [None for i in range(self.num_envs)]
-
-        worker_obs: Dict[int, ObservationProto] = {}
-        # Poll the step queue for completed steps from environment workers until we retrieve
-        # 1 or more, which we will then return as ObservationProto dict
-        while len(worker_obs) < 1:
             try:
-                while True:
-                    step: EnvResponse = self.step_queue.get_nowait()
-                    assert step.worker_id not in worker_obs
-                    self.env_workers[step.worker_id].waiting_obs = False
-                    worker_obs[step.worker_id] = step.observations
-                    if step.observations.type == "EXITED":
-                        self.env_workers[step.worker_id].alive = False
-                        self.workers_alive -= 1
-                        if self.workers_alive == 0:
-                            return {}
-            except EmptyQueueException:
+                if env_worker.waiting_obs:
+                    env_worker.conn.recv()
+                env_worker.send("close")
+            except (BrokenPipeError, EOFError, ConnectionResetError):
                 pass
-        return worker_obs
-
-    def reset(self) -> None:
-        for worker_id in range(self.num_envs):
-            self.worker_reset(worker_id)
-
-    def close(self) -> None:
-        self.step_queue.close()
-        # Sanity check to kill zombie workers and report an issue if they occur.
-        if self.workers_alive > 0:
-            for env_worker in self.env_workers:
-                if env_worker.process.is_alive():
-                    env_worker.process.terminate()
-                    print("A SubprocessEnvManager worker did not shut down correctly so it was forcefully terminated.")
-        self.step_queue.join_thread()
+            env_worker.alive = False
+        for env_worker in self.env_workers:
+            env_worker.process.join(timeout=300)
+            # Sanity check to kill zombie workers and report an issue if they occur.
+            if env_worker.process.is_alive():
+                env_worker.process.terminate()
+                print("A VectorEnvironment worker did not shut down correctly so it was forcefully terminated.")
+            env_worker.conn.close()
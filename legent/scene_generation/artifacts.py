@@ -0,0 +1,177 @@
+"""Sinks of the debugging artifacts of the scene generation: the last generated scene ("last_scene") and the small objects
+that add_small_objects failed to place ("failed_objects").
+
+The artifacts used to be written to last_scene.json and failed_objects.json in the working directory by every generation,
+which costs tens of milliseconds per scene (json.dump with indent runs in pure Python) and makes the processes that share a
+working directory overwrite each other's files. Now they go to a sink, which drops them by default (batch generation):
+
+    set_default_artifact_sink(RingArtifactSink(16))  # keep the last 16 artifacts in memory
+    scene = generate_scene(room_num=2)
+    failed_objects = get_default_artifact_sink().last("failed_objects")
+
+    set_default_artifact_sink(FileArtifactSink("debug"))  # write debug/last_scene.{pid}.json in a background thread
+
+The scene server, the only generating process of an interactive session, writes last_scene.json and failed_objects.json in
+the working directory as before.
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+import uuid
+from collections import deque
+from typing import Any, List, Optional
+
+
+def _dumps(artifact: Any) -> str:
+    # Serialized by the caller, which may modify the artifact (e.g. the returned scene) afterwards. Without indent, json
+    # uses its C encoder.
+    return json.dumps(artifact, ensure_ascii=False)
+
+
+class ArtifactSink:
+    """The base sink, which drops the artifacts."""
+
+    def put(self, name: str, artifact: Any) -> None:
+        """Receive an artifact. It must be JSON serializable, and may be modified by the caller once put returns."""
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class RingArtifactSink(ArtifactSink):
+    def __init__(self, size: int = 16) -> None:
+        """Keep the last artifacts in memory.
+
+        Args:
+            size (int, optional): The number of artifacts kept, of all names. Defaults to 16.
+        """
+        self.artifacts = deque(maxlen=size)  # (name, JSON of the artifact)
+
+    def put(self, name: str, artifact: Any) -> None:
+        self.artifacts.append((name, _dumps(artifact)))
+
+    def get(self, name: Optional[str] = None) -> List[Any]:
+        """The kept artifacts of the name (all of them if name is None), oldest first."""
+        return [json.loads(data) for artifact_name, data in list(self.artifacts) if name is None or artifact_name == name]
+
+    def last(self, name: str) -> Optional[Any]:
+        """The last artifact of the name, None if none is kept."""
+        for artifact_name, data in reversed(list(self.artifacts)):
+            if artifact_name == name:
+                return json.loads(data)
+        return None
+
+    def clear(self) -> None:
+        self.artifacts.clear()
+
+
+class FileArtifactSink(ArtifactSink):
+    def __init__(self, directory: str = ".", per_process: bool = True, background: bool = True, max_pending: int = 64) -> None:
+        """Write each artifact to {directory}/{name}.{pid}.json, replacing the previous artifact of the name.
+
+        The files are written to a temporary file and renamed, so that a reader never sees a partial artifact.
+
+        Args:
+            directory (str, optional): The directory of the files. Defaults to the working directory.
+            per_process (bool, optional): Add the process id to the file names, so that the processes do not overwrite each
+                other's files. Otherwise the files are {directory}/{name}.json. Defaults to True.
+            background (bool, optional): Write the files in a background thread, so that put only serializes the artifact.
+                Defaults to True.
+            max_pending (int, optional): The number of artifacts waiting for the background thread above which the oldest
+                of them are dropped (counted in self.dropped) rather than slowing the generation. Defaults to 64.
+        """
+        self.directory = directory
+        self.per_process = per_process
+        self.background = background
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self._lock = threading.Lock()
+        atexit.register(self.flush)  # the thread is a daemon, which would not finish the pending writes at exit
+
+    def path(self, name: str) -> str:
+        """The file of the artifacts of the name written by this process."""
+        return os.path.join(self.directory, f"{name}.{os.getpid()}.json" if self.per_process else f"{name}.json")
+
+    def put(self, name: str, artifact: Any) -> None:
+        path = self.path(name)
+        data = _dumps(artifact).encode("utf-8")
+        if not self.background:
+            self._write(path, data)
+            return
+        self._ensure_thread()
+        while True:
+            try:
+                self._queue.put_nowait((path, data))
+                return
+            except queue.Full:
+                pass
+            try:
+                self._queue.get_nowait()  # drop the oldest pending artifact, the newer ones are the useful ones for debugging
+                self._queue.task_done()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+
+    def _ensure_thread(self) -> None:
+        # The thread does not survive a fork, so a forked process starts its own.
+        with self._lock:
+            if self._thread is None or self._thread_pid != os.getpid():
+                if self._thread_pid != os.getpid():
+                    self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                self._thread = threading.Thread(target=self._run, args=(self._queue,), daemon=True)
+                self._thread_pid = os.getpid()
+                self._thread.start()
+
+    def _run(self, pending: "queue.Queue") -> None:
+        while True:
+            item = pending.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            finally:
+                pending.task_done()
+
+    def _write(self, path: str, data: bytes) -> None:
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass  # The artifacts are optional, e.g. the directory may be read-only.
+
+    def flush(self) -> None:
+        """Wait until the pending artifacts are written."""
+        if self._thread is not None and self._thread_pid == os.getpid():
+            self._queue.join()
+
+    def close(self) -> None:
+        """Write the pending artifacts and stop the background thread."""
+        if self._thread is not None and self._thread_pid == os.getpid():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+
+
+_default_artifact_sink: ArtifactSink = ArtifactSink()
+
+
+def get_default_artifact_sink() -> ArtifactSink:
+    """The sink used by the scene generation when none is given."""
+    return _default_artifact_sink
+
+
+def set_default_artifact_sink(sink: Optional[ArtifactSink]) -> None:
+    """Set the sink used by the scene generation when none is given. None drops the artifacts."""
+    global _default_artifact_sink
+    _default_artifact_sink = ArtifactSink() if sink is None else sink
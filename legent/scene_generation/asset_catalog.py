@@ -0,0 +1,101 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from legent.scene_generation.objects import ObjectDB
+
+ANCHOR_TYPES = ["inCorner", "onEdge", "inMiddle"]
+
+
+def sample_index(n: int, np_rng: Optional[np.random.RandomState] = None) -> int:
+    """Sample an index in range(n) uniformly with np_rng (defaults to the global np.random).
+
+    It draws the same way as DataFrame.sample(), so the seeded scenes are the same as with the pandas tables.
+    """
+    np_rng = np.random if np_rng is None else np_rng
+    return int(np_rng.choice(n, size=1, replace=False)[0])
+
+
+def size_mask(sizes: np.ndarray, x_margin: float, z_margin: float, rect_x_length: float, rect_z_length: float, set_rotated: Optional[bool]) -> np.ndarray:
+    """Which of the (N, 2) x/z sizes fit in the rectangle with the margins. set_rotated: False (not rotated), True (rotated) or None (either)."""
+    x_sizes, z_sizes = sizes[:, 0], sizes[:, 1]
+    not_rotated = (x_sizes + x_margin < rect_x_length) & (z_sizes + z_margin < rect_z_length)
+    if set_rotated is False:
+        return not_rotated
+    rotated = (z_sizes + z_margin < rect_x_length) & (x_sizes + x_margin < rect_z_length)
+    if set_rotated is True:
+        return rotated
+    return not_rotated | rotated
+
+
+class FloorAssetCatalog:
+    def __init__(self, room_type: str, split: str, odb: ObjectDB) -> None:
+        """Array-backed tables of the floor assets and asset groups that can spawn in a room type.
+
+        It is built once from ObjectDB.FLOOR_ASSET_DICT and the spawnable asset group table (see ObjectDB.get_floor_asset_catalog),
+        in the same row order, so that sampling from it gives the same results as sampling from the DataFrames.
+        """
+        import pandas as pd
+
+        self.room_type = room_type
+        _, assets = odb.FLOOR_ASSET_DICT[(room_type, split)]
+        asset_groups: pd.DataFrame = odb.get_spawnable_asset_group_info()
+        asset_groups = asset_groups[asset_groups[f"in{room_type}s"] > 0]
+
+        # NOTE: standalone assets. The records are the rows given to Room.place_asset.
+        self.asset_records: List[Dict] = assets.reset_index(drop=False).to_dict(orient="records")
+        self.asset_sizes = assets[["xSize", "zSize"]].to_numpy(dtype=np.float64).reshape(-1, 2)
+        self.asset_anchors: Dict[str, np.ndarray] = {anchor_type: assets[anchor_type].to_numpy(dtype=bool) for anchor_type in ANCHOR_TYPES}
+        self.asset_room_weights = assets[f"in{room_type}s"].to_numpy()
+        # The types in the order of their first asset, as DataFrame.unique() returns them.
+        self.asset_types: List[str] = list(dict.fromkeys(assets["assetType"]))
+        self.asset_type_codes: Dict[str, int] = {asset_type: i for i, asset_type in enumerate(self.asset_types)}
+        self.asset_type_of = np.array([self.asset_type_codes[asset_type] for asset_type in assets["assetType"]], dtype=np.int64)
+
+        # NOTE: asset groups. The records are the rows given to Room.place_asset_group.
+        self.group_records: List[Dict] = asset_groups[["assetGroupName", "assetGroupGenerator", "allowDuplicates"]].to_dict(orient="records")
+        self.group_index: Dict[str, int] = {record["assetGroupName"]: i for i, record in enumerate(self.group_records)}
+        self.group_sizes = asset_groups[["xSize", "zSize"]].to_numpy(dtype=np.float64).reshape(-1, 2)
+        self.group_anchors: Dict[str, np.ndarray] = {anchor_type: asset_groups[anchor_type].to_numpy(dtype=bool) for anchor_type in ANCHOR_TYPES}
+        # group_has[:, group_type_codes[asset_type]] tells which groups contain the asset type.
+        self.group_type_codes: Dict[str, int] = {asset_type: i for i, asset_type in enumerate(odb.OBJECT_DICT.keys())}
+        self.group_has = asset_groups[[f"has{asset_type}" for asset_type in odb.OBJECT_DICT.keys()]].to_numpy(dtype=bool).reshape(len(self.group_records), len(self.group_type_codes))
+
+        # NOTE: whether each asset type can spawn by itself in the room type (the first annotation of the type decides).
+        self.can_spawn_standalone: Dict[str, bool] = {}
+        for asset_type, room_weight in zip(odb.PLACEMENT_ANNOTATIONS.index, odb.PLACEMENT_ANNOTATIONS[f"in{room_type}s"]):
+            self.can_spawn_standalone.setdefault(asset_type, bool(room_weight > 0))
+
+
+class FloorAssetCandidates:
+    def __init__(self, catalog: FloorAssetCatalog) -> None:
+        """The assets and asset groups that can still spawn in one room, as masks over a FloorAssetCatalog."""
+        self.catalog = catalog
+        self.asset_mask = np.ones(len(catalog.asset_records), dtype=bool)
+        self.group_mask = np.ones(len(catalog.group_records), dtype=bool)
+
+    def filter(self, anchor_type: str, x_margin: float, z_margin: float, rect_x_length: float, rect_z_length: float, set_rotated: Optional[bool]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The indices of the asset groups and of the assets that fit the anchor type and the rectangle.
+        """
+        catalog = self.catalog
+        group_mask = self.group_mask & catalog.group_anchors[anchor_type] & size_mask(catalog.group_sizes, x_margin, z_margin, rect_x_length, rect_z_length, set_rotated)
+        asset_mask = self.asset_mask & catalog.asset_anchors[anchor_type] & size_mask(catalog.asset_sizes, x_margin, z_margin, rect_x_length, rect_z_length, set_rotated)
+        return np.flatnonzero(group_mask), np.flatnonzero(asset_mask)
+
+    def groups_with_type(self, group_indices: np.ndarray, asset_type: str) -> np.ndarray:
+        return group_indices[self.catalog.group_has[group_indices, self.catalog.group_type_codes[asset_type]]]
+
+    def assets_with_type(self, asset_indices: np.ndarray, asset_type: str) -> np.ndarray:
+        code = self.catalog.asset_type_codes.get(asset_type, -1)
+        return asset_indices[self.catalog.asset_type_of[asset_indices] == code]
+
+    def remove_asset_group(self, asset_group_name: str) -> None:
+        self.group_mask[self.catalog.group_index[asset_group_name]] = False
+
+    def remove_asset_type(self, asset_type: str) -> None:
+        """Remove the asset groups that contain the asset type, and the assets of the type."""
+        self.group_mask &= ~self.catalog.group_has[:, self.catalog.group_type_codes[asset_type.lower()]]
+        code = self.catalog.asset_type_codes.get(asset_type, -1)
+        self.asset_mask &= self.catalog.asset_type_of != code
@@ -260,11 +260,14 @@ class AssetGroupGenerator:
                 max_y = asset_df["ySize"].max()
 
         # TODO: eventually turn off randomness.
+        # NOTE: the dimensions are cached for all the scenes, so they are sampled with a generator seeded by the
+        # name of the asset group instead of the generator of the scene being generated.
+        rng = random.Random(self.name)
         x_dim_assets = self.sample_object_placement(
-            chosen_asset_ids=chosen_asset_ids["largestXAssets"]
+            chosen_asset_ids=chosen_asset_ids["largestXAssets"], rng=rng
         )
         z_dim_assets = self.sample_object_placement(
-            chosen_asset_ids=chosen_asset_ids["largestZAssets"]
+            chosen_asset_ids=chosen_asset_ids["largestZAssets"], rng=rng
         )
 
         self.cache["dimensions"] = Vector3(
@@ -324,6 +327,7 @@ class AssetGroupGenerator:
         floor_position: float = 0,
         use_thumbnail_assets: bool = False,
         chosen_asset_ids: Optional[Dict[str, Tuple[str, str]]] = None,
+        rng: Optional[random.Random] = None,
     ) -> List[Dict[str, Any]]:
         """Sample object placement.
 
@@ -334,6 +338,7 @@ class AssetGroupGenerator:
             floor_position: The position of the floor.
             use_thumbnail_assets If the randomly chosen asset should be the one
                 shown in the thumbnail specified in the JSON.
+            rng: The random generator. Defaults to the global random module.
 
         Returns:
             A dict mapping each assetId to an (x, y, z) position.
@@ -342,6 +347,7 @@ class AssetGroupGenerator:
             raise NotImplementedError(
                 "Currently, only allow_clipping == True is supported."
             )
+        rng = random if rng is None else rng
 
         out = {
             "objects": [],
@@ -387,7 +393,7 @@ class AssetGroupGenerator:
                 asset_id = asset_metadata["shownAssetId"]
                 asset_type = self.odb.OBJECT_TO_TYPE[asset_id]
             else:
-                asset_type, asset_id = random.choice(asset_metadata["assetIds"])
+                asset_type, asset_id = rng.choice(asset_metadata["assetIds"])
             chosen_asset_ids[name] = (asset_type, asset_id)
 
             # set the y position of the asset
@@ -395,7 +401,7 @@ class AssetGroupGenerator:
 
             # NOTE: add in randomness
             dtheta = asset_metadata["randomness"]["dtheta"]
-            theta_offset = random.random() * dtheta * 2 - dtheta
+            theta_offset = rng.random() * dtheta * 2 - dtheta
             theta = asset_metadata["rotation"] + theta_offset
 
             # calculate the bounding box after rotating the object.
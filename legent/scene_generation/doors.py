@@ -1,5 +1,5 @@
 import random
-from typing import Any, Dict, Iterable, List, Set, Tuple, Union
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
 
 from legent.scene_generation.constants import OUTDOOR_ROOM_ID
 from legent.scene_generation.house import HouseStructure
@@ -75,8 +75,9 @@ def default_add_doors(
     odb: ObjectDB,
     room_spec: RoomSpec,
     house_structure: HouseStructure,
+    rng: Optional[random.Random] = None,
 ):
-    """Add doors to the house."""
+    """Add doors to the house, with rng (defaults to the global random module)."""
 
     boundary_groups = house_structure.boundary_groups
     rowcol_walls = house_structure.rowcol_walls
@@ -87,10 +88,12 @@ def default_add_doors(
         neighboring_rooms=set(boundary_groups.keys()),
         room_spec_neighbors=room_spec_neighbors,
         room_spec=room_spec,
+        rng=rng,
     )
     door_walls = select_door_walls(
         openings=openings,
         rowcol_walls=rowcol_walls,
+        rng=rng,
     )
     
     return door_walls
@@ -159,6 +162,7 @@ def select_openings(
     neighboring_rooms: Set[Tuple[int, int]],
     room_spec_neighbors: List[Dict[int, Any]],
     room_spec: RoomSpec,
+    rng: Optional[random.Random] = None,
 ) -> List[Tuple[int, int]]:
     """Select which neighboring rooms should have doors between them.
 
@@ -167,11 +171,13 @@ def select_openings(
             roomId-2 > roomId-1.
         room_spec_neighbors: specifies which rooms can have connections next to each
             other, based on the room spec.
+        rng: The random generator. Defaults to the global random module.
 
     Returns:
         The neighboring_rooms that can have doors between them.
 
     """
+    rng = random if rng is None else rng
     selected_doors = []
     for group_neighbors in room_spec_neighbors:
         # NOTE: does not need a door if its the only leaf room.
@@ -188,9 +194,9 @@ def select_openings(
                 raise ValueError(
                     f"Failed to connect all rooms in group_neighbors: {group_neighbors}"
                 )
-            next_room_i = random.choice(need_connections_between)
+            next_room_i = rng.choice(need_connections_between)
             other_room_is = [i for i in range(len(group_neighbors)) if i != next_room_i]
-            random.shuffle(other_room_is)
+            rng.shuffle(other_room_is)
             n1_subgroup = group_neighbors[next_room_i]
             for other_room_i in other_room_is:
                 n2_subgroup = group_neighbors[other_room_i]
@@ -200,7 +206,7 @@ def select_openings(
                     for b in n2_subgroup
                 ]
                 combos = randomly_prioritize_room_ids(
-                    room_id_pairs=combos, room_spec=room_spec
+                    room_id_pairs=combos, room_spec=room_spec, rng=rng
                 )
                 for door_combo in combos:
                     if door_combo in neighboring_rooms:
@@ -215,9 +221,10 @@ def select_openings(
 
 
 def randomly_prioritize_room_ids(
-    room_id_pairs: List[Tuple[int, int]], room_spec: RoomSpec
+    room_id_pairs: List[Tuple[int, int]], room_spec: RoomSpec, rng: Optional[random.Random] = None
 ) -> List[Tuple[int, int]]:
     """Random shuffling while moving rooms with avoid_doors_from_metarooms to back."""
+    rng = random if rng is None else rng
     avoid_room_id_pairs = []
     prioritize_room_id_pairs = []
     for room_id_1, room_id_2 in room_id_pairs:
@@ -234,12 +241,13 @@ def randomly_prioritize_room_ids(
         else:
             prioritize_room_id_pairs.append((room_id_1, room_id_2))
 
-    random.shuffle(prioritize_room_id_pairs)
-    random.shuffle(avoid_room_id_pairs)
+    rng.shuffle(prioritize_room_id_pairs)
+    rng.shuffle(avoid_room_id_pairs)
     return prioritize_room_id_pairs + avoid_room_id_pairs
 
 
-def select_door_walls(openings: List[Tuple[int, int]], rowcol_walls):
+def select_door_walls(openings: List[Tuple[int, int]], rowcol_walls, rng: Optional[random.Random] = None):
+    rng = random if rng is None else rng
     chosen_openings = dict()
     for opening in openings:
         candidates = list(rowcol_walls[opening])
@@ -249,22 +257,23 @@ def select_door_walls(openings: List[Tuple[int, int]], rowcol_walls):
         # Weights are the size of each wall. Since each wall has a size along a
         # single axis, Manhattan distance is equivalent to Euclidean distance
         # chosen_opening = random.choices(population=population, weights=weights, k=1)[0]
-        chosen_opening = random.choice(candidates)
+        chosen_opening = rng.choice(candidates)
         chosen_openings[opening] = chosen_opening
         # chosen_openings[opening] = candidates[chosen_opening]
     return chosen_openings
 
 
 def select_outdoor_openings(
-    boundary_groups: BoundaryGroups, room_type_map: Dict[int, str]
+    boundary_groups: BoundaryGroups, room_type_map: Dict[int, str], rng: Optional[random.Random] = None
 ) -> List[Tuple[int, int]]:
     """Select which rooms have doors to the outside."""
+    rng = random if rng is None else rng
     outdoor_candidates = [
         group for group in boundary_groups if OUTDOOR_ROOM_ID in group
     ]
-    random.shuffle(outdoor_candidates)
+    rng.shuffle(outdoor_candidates)
 
-    n_doors_target = random.randint(MIN_DOORS_TO_OUTSIDE, MAX_DOORS_TO_OUTSIDE)
+    n_doors_target = rng.randint(MIN_DOORS_TO_OUTSIDE, MAX_DOORS_TO_OUTSIDE)
     doors_to_outside = []
 
     # NOTE: Check preferred room types
@@ -14,7 +14,10 @@ Things to consider:
       the necessary door(s).
 """
 import random
-from typing import Dict, Sequence, Union
+import time
+from concurrent.futures import Executor
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 
@@ -27,7 +30,7 @@ class InvalidFloorplan(Exception):
 
 
 def select_room(
-    rooms: Sequence[Union[LeafRoom, MetaRoom]]
+    rooms: Sequence[Union[LeafRoom, MetaRoom]], rng: Optional[random.Random] = None
 ) -> Union[LeafRoom, MetaRoom]:
     """
     From the paper:
@@ -38,8 +41,9 @@ def select_room(
         variation is ensured, but the selection still respects the
         desired ratios of room areas.
     """
+    rng = random if rng is None else rng
     total_ratio = sum(r.ratio for r in rooms)
-    r = random.random() * total_ratio
+    r = rng.random() * total_ratio
     for room in rooms:
         r -= room.ratio
         if r <= 0:
@@ -47,7 +51,9 @@ def select_room(
 
 
 def sample_initial_room_positions(
-    rooms: Sequence[Union[LeafRoom, MetaRoom]], floorplan: np.ndarray
+    rooms: Sequence[Union[LeafRoom, MetaRoom]],
+    floorplan: np.ndarray,
+    np_rng: Optional[np.random.RandomState] = None,
 ) -> None:
     """
     From the paper:
@@ -82,6 +88,7 @@ def sample_initial_room_positions(
         set to zero, to avoid several initial positions of different
         rooms to be too close to each other.
     """
+    np_rng = np.random if np_rng is None else np_rng
     grid_weights = np.where(floorplan == EMPTY_ROOM_ID, 1, 0)
     for room in rooms:
         # make sure there is at least one open cell in the floorplan area.
@@ -96,7 +103,7 @@ def sample_initial_room_positions(
         # TODO: these weights could be updated by the adjacency constraints
         # and the hallways.
         # sample a grid cell by weight
-        cell_idx = np.random.choice(
+        cell_idx = np_rng.choice(
             grid_weights.size, p=grid_weights.ravel() / float(grid_weights.sum())
         )
         cell_y, cell_x = np.unravel_index(cell_idx, grid_weights.shape)
@@ -117,7 +124,7 @@ def sample_initial_room_positions(
         ] = 0
 
 
-def grow_rect(room: Union[MetaRoom, LeafRoom], floorplan: np.ndarray) -> bool:
+def grow_rect(room: Union[MetaRoom, LeafRoom], floorplan: np.ndarray, rng: Optional[random.Random] = None) -> bool:
     """
     From the paper:
         The first phase of this algorithm is expanding rooms
@@ -141,6 +148,7 @@ def grow_rect(room: Union[MetaRoom, LeafRoom], floorplan: np.ndarray) -> bool:
         for lower ratio rooms, since size ratios have no relation
         with the total building area. In Fig.3 (b), all rooms have
         reached their maximum size."""
+    rng = random if rng is None else rng
     # NOTE: check if room is already grown beyond the maximum size.
     maximum_size = room.ratio * 4
     if (room.max_x - room.min_x) * (room.max_y - room.min_y) > maximum_size:
@@ -200,7 +208,7 @@ def grow_rect(room: Union[MetaRoom, LeafRoom], floorplan: np.ndarray) -> bool:
     # From the paper: The maximum growth, i.e. the longest line interval, which
     # leads to a rectangular area is picked (randomly, if there are more than
     # one candidates).
-    growth_direction = random.choice(
+    growth_direction = rng.choice(
         [
             growth_direction
             for growth_direction, growth_size in growth_sizes.items()
@@ -225,7 +233,7 @@ def grow_rect(room: Union[MetaRoom, LeafRoom], floorplan: np.ndarray) -> bool:
     return True
 
 
-def grow_l_shape(room, floorplan):
+def grow_l_shape(room, floorplan, rng: Optional[random.Random] = None):
     """
     From the paper:
         Of course, this first phase does not ensure that all available space
@@ -241,6 +249,7 @@ def grow_l_shape(room, floorplan):
         space is directly assigned to the room which fills most of the adjacent
         area.
     """
+    rng = random if rng is None else rng
     # NOTE: Find out how much the rectangle can grow in each direction.
     growth_sizes = {
         "right": (
@@ -298,7 +307,7 @@ def grow_l_shape(room, floorplan):
         return False
 
     # NOTE: Pick a random max growth direction to grow.
-    growth_direction = random.choice(
+    growth_direction = rng.choice(
         [
             growth_direction
             for growth_direction, growth_size in growth_sizes.items()
@@ -326,7 +335,10 @@ def grow_l_shape(room, floorplan):
 
 
 def expand_rooms(
-    rooms: Sequence[Union[LeafRoom, MetaRoom]], floorplan: np.ndarray
+    rooms: Sequence[Union[LeafRoom, MetaRoom]],
+    floorplan: np.ndarray,
+    rng: Optional[random.Random] = None,
+    np_rng: Optional[np.random.RandomState] = None,
 ) -> None:
     """Assign rooms from a given hierarchy to the floorplan.
 
@@ -340,24 +352,28 @@ def expand_rooms(
         rectangular expansions are possible. At this point, the
         process resets rooms to the initial set, but now considers
         expansions that lead to L-shaped rooms (GrowLShape).
+
+    rng and np_rng are the random generators to use, and default to the global ones.
     """
 
     # NOTE: Initial center placement of each room
-    sample_initial_room_positions(rooms, floorplan)
+    sample_initial_room_positions(rooms, floorplan, np_rng)
 
     # NOTE: grow rectangles
-    rooms_to_grow = set(rooms)
+    # NOTE: a list rather than a set, whose order depends on the object ids,
+    # so that the expansion only depends on the random seed.
+    rooms_to_grow = list(rooms)
     while rooms_to_grow:
-        room = select_room(rooms_to_grow)
-        can_grow = grow_rect(room, floorplan)
+        room = select_room(rooms_to_grow, rng)
+        can_grow = grow_rect(room, floorplan, rng)
         if not can_grow:
             rooms_to_grow.remove(room)
 
     # NOTE: grow L-Shape
-    rooms_to_grow = set(rooms)
+    rooms_to_grow = list(rooms)
     while rooms_to_grow:
-        room = select_room(rooms_to_grow)
-        can_grow = grow_l_shape(room, floorplan)
+        room = select_room(rooms_to_grow, rng)
+        can_grow = grow_l_shape(room, floorplan, rng)
         if not can_grow:
             rooms_to_grow.remove(room)
 
@@ -418,10 +434,13 @@ def score_floorplan(room_spec: RoomSpec, floorplan: np.ndarray) -> float:
 
 
 def recursively_expand_rooms(
-    rooms: Sequence[Union[LeafRoom, MetaRoom]], floorplan: np.ndarray
+    rooms: Sequence[Union[LeafRoom, MetaRoom]],
+    floorplan: np.ndarray,
+    rng: Optional[random.Random] = None,
+    np_rng: Optional[np.random.RandomState] = None,
 ) -> None:
     """Assign rooms to the floorplan and expand it if it is a MetaRoom."""
-    expand_rooms(rooms, floorplan)
+    expand_rooms(rooms, floorplan, rng, np_rng)
     for room in rooms:
         if isinstance(room, MetaRoom):
             floorplan_mask = floorplan == room.room_id
@@ -429,14 +448,44 @@ def recursively_expand_rooms(
             recursively_expand_rooms(
                 room.children,
                 floorplan[room.min_y : room.max_y, room.min_x : room.max_x],
+                rng,
+                np_rng,
             )
 
 
+def _generate_candidate(
+    room_spec: RoomSpec,
+    interior_boundary: np.ndarray,
+    seed: Optional[int] = None,
+    rng: Optional[random.Random] = None,
+    np_rng: Optional[np.random.RandomState] = None,
+) -> Tuple[Optional[np.ndarray], float]:
+    """Expand the rooms on a copy of the interior boundary.
+
+    Returns the floorplan and its score, or (None, -inf) if the floorplan is invalid.
+    The seed is given when it runs in a worker process, so that the candidate only
+    depends on the seed drawn by generate_floorplan.
+    """
+    if seed is not None:
+        rng, np_rng = random.Random(seed), np.random.RandomState(seed)
+    floorplan = interior_boundary.copy()
+    try:
+        recursively_expand_rooms(rooms=room_spec.spec, floorplan=floorplan, rng=rng, np_rng=np_rng)
+    except InvalidFloorplan:
+        return None, float("-inf")
+    return floorplan, score_floorplan(room_spec=room_spec, floorplan=floorplan)
+
+
 def generate_floorplan(
     room_spec: np.ndarray,
     interior_boundary: np.ndarray,
     candidate_generations: int = 100,
-) -> np.ndarray:
+    target_score: Optional[float] = None,
+    executor: Optional[Executor] = None,
+    return_stats: bool = False,
+    rng: Optional[random.Random] = None,
+    np_rng: Optional[np.random.RandomState] = None,
+) -> Union[np.ndarray, Tuple[np.ndarray, Dict[str, Any]]]:
     """Generate a floorplan for the given room spec and interior boundary.
 
     Args:
@@ -444,24 +493,59 @@ def generate_floorplan(
         interior_boundary: Interior boundary of the floorplan.
         candidate_generations: Number of candidate generations to generate. The
             best candidate floorplan is returned.
+        target_score: Stop as soon as a candidate reaches this score (see
+            score_floorplan, at most 1), instead of generating all the candidates.
+            Defaults to None (no early stopping).
+        executor: A ProcessPoolExecutor to generate the candidates in. Each candidate
+            is generated with a seed drawn from rng, and the
+            candidates are considered in order, so the result does not depend on the
+            number of workers. Defaults to None (generate them in this process).
+        return_stats: Also return a dict with "candidates" (generated), "invalid",
+            "early_stopped", "seconds", "best_score" and "scores" (of the valid candidates).
+        rng: The random.Random to use. Defaults to None (the global random module).
+        np_rng: The np.random.RandomState to use. Defaults to None (the global np.random).
     """
+    start = time.perf_counter()
+    rng = random if rng is None else rng
     # NOTE: If there is only one room, the floorplan will always be the same.
     if len(room_spec.room_type_map) == 1:
         candidate_generations = 1
 
+    if executor is not None:
+        # NOTE: the dims of a RoomSpec may be a lambda, which cannot be sent to the
+        # workers. The candidates only need the rooms.
+        rooms = SimpleNamespace(spec=room_spec.spec, room_type_map=room_spec.room_type_map)
+        seeds = [rng.getrandbits(32) for _ in range(candidate_generations)]
+        futures = [
+            executor.submit(_generate_candidate, rooms, interior_boundary, seed)
+            for seed in seeds
+        ]
+        candidates = (future.result() for future in futures)
+    else:
+        futures = []
+        candidates = (
+            _generate_candidate(room_spec, interior_boundary, rng=rng, np_rng=np_rng)
+            for _ in range(candidate_generations)
+        )
+
     best_floorplan = None
     best_score = float("-inf")
-    for _ in range(candidate_generations):
-        floorplan = interior_boundary.copy()
-        try:
-            recursively_expand_rooms(rooms=room_spec.spec, floorplan=floorplan)
-        except InvalidFloorplan:
+    scores: List[float] = []
+    generated = 0
+    early_stopped = False
+    for floorplan, score in candidates:
+        generated += 1
+        if floorplan is None:
             continue
-        else:
-            score = score_floorplan(room_spec=room_spec, floorplan=floorplan)
-            if best_floorplan is None or score > best_score:
-                best_floorplan = floorplan
-                best_score = score
+        scores.append(score)
+        if best_floorplan is None or score > best_score:
+            best_floorplan = floorplan
+            best_score = score
+        if target_score is not None and score >= target_score:
+            early_stopped = True
+            break
+    for future in futures:
+        future.cancel()
 
     if best_floorplan is None:
         raise InvalidFloorplan(
@@ -472,4 +556,14 @@ def generate_floorplan(
             f"interior_boundary:\n{interior_boundary}\n, room_spec:\n{room_spec}"
         )
 
+    if return_stats:
+        stats = {
+            "candidates": generated,
+            "invalid": generated - len(scores),
+            "early_stopped": early_stopped,
+            "seconds": time.perf_counter() - start,
+            "best_score": best_score,
+            "scores": scores,
+        }
+        return best_floorplan, stats
     return best_floorplan
@@ -0,0 +1,241 @@
+"""A bank of precomputed floorplans, so that HouseGenerator.generate_structure does not grow the rooms for every scene.
+
+Build it offline for the room specs that generate_scene samples for 1 to 4 rooms and for the room specs of ROOM_SPEC_SAMPLER:
+
+    python -m legent.scene_generation.floorplan_bank --output floorplans.npz --floorplans_per_spec 500
+
+and sample from it with generate_scene(..., floorplan_bank=FloorplanBank("floorplans.npz")) or HouseGenerator(..., floorplan_bank=...).
+"""
+import argparse
+import hashlib
+import random
+import zipfile
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from legent.scene_generation.constants import OUTDOOR_ROOM_ID
+from legent.scene_generation.floorplan import InvalidFloorplan, generate_floorplan
+from legent.scene_generation.interior_boundaries import sample_interior_boundary
+from legent.scene_generation.room_spec import ROOM_SPEC_SAMPLER, MetaRoom, RoomSpec
+from legent.utils.io import log
+
+FLOORPLAN_BANK_VERSION = 2
+
+RATIO_QUANTUM = 0.1
+"""The keys round the share of each room among its siblings to a multiple of it, so that the room specs of generate_scene,
+whose ratios come from random room sizes, share the floorplans of the bank."""
+
+
+def _canonical_rooms(rooms) -> Tuple[str, List[int]]:
+    """The key of the rooms, with the siblings sorted by their keys, and the ids of the leaf rooms in that order."""
+    total = sum(room.ratio for room in rooms)
+    entries = []
+    for room in rooms:
+        share = round(room.ratio / total / RATIO_QUANTUM)
+        if isinstance(room, MetaRoom):
+            key, room_ids = _canonical_rooms(room.children)
+            entries.append((f"{room.room_type}*{share}[{key}]", room_ids))
+        else:
+            entries.append((f"{room.room_type}*{share}", [room.room_id]))
+    entries.sort(key=lambda entry: entry[0])
+    return ",".join(key for key, _ in entries), [room_id for _, room_ids in entries for room_id in room_ids]
+
+
+def get_room_spec_key(room_spec: RoomSpec) -> str:
+    """The key of a room spec in the bank: the layout of its rooms, their types and their quantized ratios (see RATIO_QUANTUM).
+    It does not depend on the order and the ids of the rooms, so the floorplans are stored with canonical room ids."""
+    key, room_ids = _canonical_rooms(room_spec.spec)
+    return f"{len(room_ids)}-rooms-{hashlib.md5(key.encode('utf-8')).hexdigest()[:8]}"
+
+
+def _relabel(floorplan: np.ndarray, room_ids: Sequence[int], new_room_ids: Sequence[int]) -> np.ndarray:
+    relabeled = floorplan.copy()
+    for room_id, new_room_id in zip(room_ids, new_room_ids):
+        relabeled[floorplan == room_id] = new_room_id
+    return relabeled
+
+
+def to_canonical_room_ids(floorplan: np.ndarray, room_spec: RoomSpec) -> np.ndarray:
+    """The floorplan of the room spec with the canonical room ids of the bank: OUTDOOR_ROOM_ID + 1 + k for the k-th room in the order of the key."""
+    _, room_ids = _canonical_rooms(room_spec.spec)
+    return _relabel(floorplan, room_ids, range(OUTDOOR_ROOM_ID + 1, OUTDOOR_ROOM_ID + 1 + len(room_ids)))
+
+
+def from_canonical_room_ids(floorplan: np.ndarray, room_spec: RoomSpec) -> np.ndarray:
+    """A floorplan of the bank with the room ids of the room spec."""
+    _, room_ids = _canonical_rooms(room_spec.spec)
+    return _relabel(floorplan, range(OUTDOOR_ROOM_ID + 1, OUTDOOR_ROOM_ID + 1 + len(room_ids)), room_ids)
+
+
+def get_scene_dims(num_rooms: int, total_size: Optional[int] = None) -> List[Tuple[int, int]]:
+    """The (x_size, z_size) that generate_scene samples for a room spec with num_rooms rooms, or with rooms of total_size units
+    (see get_room_specs in legent.server.scene_generator). Defaults to the 6 units per room of the room specs of ROOM_SPEC_SAMPLER."""
+    n = int(np.sqrt(6 * num_rooms if total_size is None else total_size))
+    return sorted({(max(3, size), max(3, size)) for size in [max(1, n), n + 1]})
+
+
+def _load_npz(path: str, mmap: bool) -> Dict[str, np.ndarray]:
+    """Load the arrays of an uncompressed .npz, memory-mapped if mmap (np.load ignores mmap_mode for .npz files)."""
+    if not mmap:
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path} is compressed and cannot be memory-mapped.")
+            # NOTE: the member data follows its local header, whose name and extra fields may differ from the central directory.
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = np.frombuffer(f.read(4), dtype="<u2")
+            f.seek(info.header_offset + 30 + int(name_length) + int(extra_length))
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            arrays[info.filename[: -len(".npy")]] = np.memmap(f, dtype=dtype, mode="r", offset=f.tell(), shape=shape, order="F" if fortran_order else "C")
+    return arrays
+
+
+class FloorplanBank:
+    def __init__(self, path: str, mmap: bool = True) -> None:
+        """A bank of floorplans saved by save_floorplan_bank.
+
+        All the floorplans are stored in one flat array of cells, so that the file is memory-mapped and a floorplan
+        is only read when it is sampled.
+
+        Args:
+            path (str): The .npz file.
+            mmap (bool, optional): Memory-map the file instead of reading it. Defaults to True.
+        """
+        data = _load_npz(path, mmap)
+        if int(data["version"]) != FLOORPLAN_BANK_VERSION:
+            raise ValueError(f"{path} is a floorplan bank of version {int(data['version'])}, expected {FLOORPLAN_BANK_VERSION}.")
+        self.path = path
+        self.cells = data["cells"]
+        self.offsets = np.asarray(data["offsets"])
+        self.shapes = np.asarray(data["shapes"])
+        self.spec_keys: List[str] = [str(key) for key in data["spec_keys"]]
+        self.missed = set()  # the (room spec key, dims) that the bank has no floorplan of, logged once
+        spec_indices = np.asarray(data["spec_indices"])
+
+        # (room spec key, shape) -> indices of the floorplans
+        self.index: Dict[Tuple[str, Tuple[int, int]], np.ndarray] = {}
+        for spec_index, (z_size, x_size) in {(int(i), tuple(shape)) for i, shape in zip(spec_indices, self.shapes.tolist())}:
+            mask = (spec_indices == spec_index) & (self.shapes[:, 0] == z_size) & (self.shapes[:, 1] == x_size)
+            self.index[(self.spec_keys[spec_index], (z_size, x_size))] = np.flatnonzero(mask)
+
+    def __len__(self) -> int:
+        return len(self.shapes)
+
+    def get(self, i: int) -> np.ndarray:
+        """The i-th floorplan, without the outdoor padding."""
+        return np.asarray(self.cells[self.offsets[i] : self.offsets[i + 1]], dtype=int).reshape(self.shapes[i])
+
+    def sample(self, room_spec: RoomSpec, dims: Optional[Tuple[int, int]] = None, augment: bool = True, rng: Optional[random.Random] = None) -> Optional[np.ndarray]:
+        """Sample a floorplan of the room spec, with its room ids, or return None (and log it once) if the bank has none.
+
+        Args:
+            room_spec (RoomSpec): The room spec.
+            dims (Optional[Tuple[int, int]], optional): The (x_size, z_size) of the house, as in generate_house_structure.
+                Defaults to None (any size).
+            augment (bool, optional): Randomly flip and rotate the floorplan. It is rotated by 90 degrees only if
+                it keeps the dims. Defaults to True.
+            rng (Optional[random.Random], optional): The random generator to sample with. Defaults to None (the global random module).
+        """
+        rng = random if rng is None else rng
+        key = get_room_spec_key(room_spec)
+        if dims is not None:
+            shape = (dims[1], dims[0])
+            candidates = [self.index.get((key, shape)), self.index.get((key, shape[::-1]))]
+        else:
+            candidates = [indices for (spec_key, _), indices in self.index.items() if spec_key == key]
+        candidates = [indices for indices in candidates if indices is not None and len(indices)]
+        if not candidates:
+            if (key, dims) not in self.missed:
+                self.missed.add((key, dims))
+                log(f"The floorplan bank {self.path} has no floorplan of the room spec {room_spec.room_spec_id} ({key}) with dims {dims}. The rooms are grown instead.")
+            return None
+        indices = np.concatenate(candidates)
+
+        floorplan = from_canonical_room_ids(self.get(int(indices[rng.randrange(len(indices))])), room_spec)
+        if dims is not None and floorplan.shape != (dims[1], dims[0]):
+            floorplan = np.rot90(floorplan)
+        if augment:
+            if rng.random() < 0.5:
+                floorplan = np.flip(floorplan, axis=0)
+            if rng.random() < 0.5:
+                floorplan = np.flip(floorplan, axis=1)
+            if (dims is None or floorplan.shape[0] == floorplan.shape[1]) and rng.random() < 0.5:
+                floorplan = np.rot90(floorplan)
+        return np.ascontiguousarray(floorplan)
+
+
+def save_floorplan_bank(path: str, floorplans: Dict[str, Sequence[np.ndarray]]) -> None:
+    """Save the floorplans (without the outdoor padding, with the canonical room ids) of each room spec key to an uncompressed .npz file."""
+    spec_keys = list(floorplans)
+    flat = [(spec_index, floorplan) for spec_index, key in enumerate(spec_keys) for floorplan in floorplans[key]]
+    sizes = [floorplan.size for _, floorplan in flat]
+    np.savez(
+        path,
+        version=np.array(FLOORPLAN_BANK_VERSION),
+        cells=np.concatenate([floorplan.ravel() for _, floorplan in flat]).astype(np.int16) if flat else np.zeros(0, dtype=np.int16),
+        offsets=np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64),
+        shapes=np.array([floorplan.shape for _, floorplan in flat], dtype=np.int32).reshape(-1, 2),
+        spec_keys=np.array(spec_keys, dtype=str),
+        spec_indices=np.array([spec_index for spec_index, _ in flat], dtype=np.int32),
+    )
+
+
+def get_bank_room_specs(room_nums: Sequence[int] = (1, 2, 3, 4), room_specs: Sequence[RoomSpec] = ()) -> Dict[str, Tuple[RoomSpec, List[Tuple[int, int]]]]:
+    """The room spec keys of the room specs that generate_scene samples for room_nums (1 to 4) rooms and of room_specs (e.g. of
+    ROOM_SPEC_SAMPLER), each with a room spec of the key to build the floorplans of and the dims sampled with them."""
+    from legent.server.scene_generator import get_room_specs
+
+    bank_room_specs: Dict[str, Tuple[RoomSpec, set]] = {}
+    for room_num in room_nums:
+        for room_spec, total_size in get_room_specs(room_num):
+            bank_room_specs.setdefault(get_room_spec_key(room_spec), (room_spec, set()))[1].update(get_scene_dims(room_num, total_size))
+    for room_spec in room_specs:
+        bank_room_specs.setdefault(get_room_spec_key(room_spec), (room_spec, set()))[1].update(get_scene_dims(len(room_spec.room_type_map)))
+    return {key: (room_spec, sorted(dims)) for key, (room_spec, dims) in bank_room_specs.items()}
+
+
+def build_floorplans(room_spec: RoomSpec, dims: Optional[Tuple[int, int]], n: int, max_failures: int = 100) -> List[np.ndarray]:
+    """Generate n floorplans of the room spec, as generate_house_structure does, with the canonical room ids of the bank."""
+    floorplans = []
+    failures = 0
+    while len(floorplans) < n and failures < max_failures:
+        interior_boundary = sample_interior_boundary(num_rooms=len(room_spec.room_type_map), dims=dims)
+        try:
+            floorplans.append(to_canonical_room_ids(generate_floorplan(room_spec=room_spec, interior_boundary=interior_boundary), room_spec))
+        except InvalidFloorplan:
+            failures += 1
+    return floorplans
+
+
+if __name__ == "__main__":
+    from tqdm import tqdm
+
+    parser = argparse.ArgumentParser(description="Precompute a bank of floorplans for the room specs of generate_scene and ROOM_SPEC_SAMPLER.")
+    parser.add_argument("--output", type=str, required=True, help="The .npz file to write.")
+    parser.add_argument("--floorplans_per_spec", type=int, default=200, help="Number of floorplans for each room spec key and dims.")
+    parser.add_argument("--room_nums", type=int, nargs="*", default=[1, 2, 3, 4], help="The numbers of rooms (1 to 4) of the room specs of generate_scene to include. Defaults to all.")
+    parser.add_argument("--room_specs", type=str, nargs="*", default=None, help="The room_spec_ids of ROOM_SPEC_SAMPLER to include. Defaults to all.")
+    parser.add_argument("--dims", type=str, nargs="*", default=None, help='The "x_size,z_size" to generate. Defaults to the dims sampled by generate_scene.')
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    room_specs = [ROOM_SPEC_SAMPLER[room_spec_id] for room_spec_id in args.room_specs] if args.room_specs is not None else ROOM_SPEC_SAMPLER.room_specs
+    floorplans = {}
+    for key, (room_spec, dims_list) in tqdm(get_bank_room_specs(args.room_nums, room_specs).items()):
+        if args.dims:
+            dims_list = [tuple(int(size) for size in dims.split(",")) for dims in args.dims]
+        floorplans[key] = []
+        for dims in dims_list:
+            floorplans[key].extend(build_floorplans(room_spec, dims, args.floorplans_per_spec))
+    save_floorplan_bank(args.output, floorplans)
+    print(f"Saved {sum(len(v) for v in floorplans.values())} floorplans of {len(floorplans)} room specs to {args.output}")
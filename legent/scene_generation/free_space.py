@@ -0,0 +1,122 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+COORDINATE_TOLERANCE = 1e-6
+"""Coordinates closer than this are merged into one grid line, so that no sliver rows or columns are created."""
+
+
+class GridFreeSpace:
+    def __init__(self, vertices: Sequence[Tuple[float, float]]) -> None:
+        """The free space of an orthogonal room as an occupancy bitmap on its coordinate-compressed grid.
+
+        The grid lines are the distinct x and z coordinates of the room and of the rectangles subtracted from it,
+        and cell (i, j) is the rectangle [xs[i], xs[i + 1]] x [zs[j], zs[j + 1]]. It is an alternative to
+        OrthogonalPolygon for Room(free_space="grid"): subtracting an asset only splits the rows and columns at its
+        bounds and clears its cells, instead of recomputing the polygon with shapely.
+
+        Args:
+            vertices (Sequence[Tuple[float, float]]): The vertices (x, z) of the room polygon, without holes.
+        """
+        vertices = np.asarray(vertices, dtype=np.float64)
+        self.xs = np.unique(vertices[:, 0])
+        self.zs = np.unique(vertices[:, 1])
+
+        # NOTE: even-odd rule, each vertical edge of the polygon toggles the cells on its left.
+        mid_xs = (self.xs[:-1] + self.xs[1:]) / 2
+        mid_zs = (self.zs[:-1] + self.zs[1:]) / 2
+        inside = np.zeros((len(mid_xs), len(mid_zs)), dtype=bool)
+        for (x0, z0), (x1, z1) in zip(vertices, np.roll(vertices, -1, axis=0)):
+            if x0 == x1 and z0 != z1:
+                inside ^= (mid_xs < x0)[:, None] & ((mid_zs > min(z0, z1)) & (mid_zs < max(z0, z1)))[None, :]
+        self.inside = inside  # the cells of the room
+        self.free = inside.copy()  # the cells of the room that are not occupied
+
+    def _split(self, axis: int, value: float) -> int:
+        """Add a grid line, duplicating the row or column that it splits. Returns the index of the grid line."""
+        lines = self.xs if axis == 0 else self.zs
+        i = int(np.searchsorted(lines, value))
+        if i < len(lines) and lines[i] - value < COORDINATE_TOLERANCE:
+            return i
+        if i > 0 and value - lines[i - 1] < COORDINATE_TOLERANCE:
+            return i - 1
+        lines = np.insert(lines, i, value)
+        if axis == 0:
+            self.xs = lines
+        else:
+            self.zs = lines
+        self.inside = np.insert(self.inside, i, np.take(self.inside, i - 1, axis=axis), axis=axis)
+        self.free = np.insert(self.free, i, np.take(self.free, i - 1, axis=axis), axis=axis)
+        return i
+
+    def subtract_rectangle(self, rectangle: Tuple[float, float, float, float]) -> None:
+        """Mark the (x0, z0, x1, z1) rectangle as occupied. The part outside of the room is ignored."""
+        x0, z0, x1, z1 = rectangle
+        x0, x1 = max(x0, self.xs[0]), min(x1, self.xs[-1])
+        z0, z1 = max(z0, self.zs[0]), min(z1, self.zs[-1])
+        if x1 - x0 < COORDINATE_TOLERANCE or z1 - z0 < COORDINATE_TOLERANCE:
+            return
+        i0, i1 = self._split(0, x0), self._split(0, x1)
+        j0, j1 = self._split(1, z0), self._split(1, z1)
+        self.free[i0:i1, j0:j1] = False
+
+    def _locate(self, point: Tuple[float, float]) -> Tuple[int, int]:
+        x, z = point
+        return int(np.searchsorted(self.xs, x, side="right")) - 1, int(np.searchsorted(self.zs, z, side="right")) - 1
+
+    def is_point_inside(self, point: Tuple[float, float]) -> bool:
+        """Whether the point is inside of the room (occupied or not). Points on the grid lines are in the cell above them."""
+        i, j = self._locate(point)
+        return 0 <= i < self.inside.shape[0] and 0 <= j < self.inside.shape[1] and bool(self.inside[i, j])
+
+    def is_on_boundary(self, p0: Tuple[float, float], p1: Tuple[float, float]) -> bool:
+        """Whether the axis-aligned segment lies on the boundary of the room, i.e. the room is on exactly one side of it."""
+        (x0, z0), (x1, z1) = p0, p1
+        if z0 == z1:
+            lines, cross_lines, cells, (a, b), at = self.xs, self.zs, self.inside, sorted((x0, x1)), z0
+        else:
+            lines, cross_lines, cells, (a, b), at = self.zs, self.xs, self.inside.T, sorted((z0, z1)), x0
+        j = int(np.searchsorted(cross_lines, at - COORDINATE_TOLERANCE))
+        if j == len(cross_lines) or abs(cross_lines[j] - at) > COORDINATE_TOLERANCE:
+            return False
+        mids = (lines[:-1] + lines[1:]) / 2
+        along = (mids > a) & (mids < b)
+        if not along.any() or lines[0] > a + COORDINATE_TOLERANCE or lines[-1] < b - COORDINATE_TOLERANCE:
+            return False
+        before = cells[along, j - 1] if j > 0 else np.zeros(along.sum(), dtype=bool)
+        after = cells[along, j] if j < cells.shape[1] else np.zeros(along.sum(), dtype=bool)
+        return bool(np.all(before != after))
+
+    def get_all_rectangles(self) -> List[Tuple[float, float, float, float]]:
+        """Enumerate the maximal free rectangles, i.e. the free rectangles that cannot be extended in any direction.
+
+        For each range of columns [i0, i1], the free rows of all the columns form runs, and a run is kept if neither
+        the column before i0 nor the one after i1 is free over all of its rows.
+        """
+        free = self.free
+        n_columns, n_rows = free.shape
+        # occupied_before[i, j] is the number of non-free cells in column i below row j
+        occupied_before = np.zeros((n_columns, n_rows + 1), dtype=np.int64)
+        np.cumsum(~free, axis=1, out=occupied_before[:, 1:])
+
+        out = []
+        for i0 in range(n_columns):
+            run = free[i0].copy()
+            for i1 in range(i0, n_columns):
+                if i1 > i0:
+                    run &= free[i1]
+                if not run.any():
+                    break
+                edges = np.diff(run.astype(np.int8), prepend=0, append=0)
+                starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+                maximal = np.ones(len(starts), dtype=bool)
+                if i0 > 0:
+                    maximal &= occupied_before[i0 - 1, ends] - occupied_before[i0 - 1, starts] > 0
+                if i1 < n_columns - 1:
+                    maximal &= occupied_before[i1 + 1, ends] - occupied_before[i1 + 1, starts] > 0
+                for start, end in zip(starts[maximal], ends[maximal]):
+                    out.append((float(self.xs[i0]), float(self.zs[start]), float(self.xs[i1 + 1]), float(self.zs[end])))
+        return out
+
+    def get_free_area(self) -> float:
+        return float(np.sum(np.outer(np.diff(self.xs), np.diff(self.zs))[self.free]))
@@ -1,13 +1,17 @@
 import copy
-import json
 import random
-from typing import Dict, List, Optional, Tuple, Union
+from concurrent.futures import Executor
+from typing import Dict, List, Literal, Optional, Tuple, Union
 
 import numpy as np
 from shapely.geometry import Polygon
 
+from legent.scene_generation.artifacts import ArtifactSink, get_default_artifact_sink
+from legent.scene_generation.asset_catalog import FloorAssetCandidates, sample_index
 from legent.scene_generation.doors import default_add_doors
-from legent.scene_generation.house import generate_house_structure
+from legent.scene_generation.floorplan_bank import FloorplanBank
+from legent.scene_generation.house import generate_house_structure, get_house_structure
+from legent.scene_generation.merge_instances import merge_floors_and_walls
 from legent.scene_generation.objects import ObjectDB
 from legent.scene_generation.room import Room
 from legent.scene_generation.room_spec import RoomSpec
@@ -45,6 +49,14 @@ class HouseGenerator:
         dims: Optional[Tuple[int, int]] = None,
         objectDB: ObjectDB = None,
         unit_size=2.5,
+        free_space: Literal["polygon", "grid"] = "polygon",
+        floorplan_target_score: Optional[float] = None,
+        floorplan_executor: Optional[Executor] = None,
+        floorplan_bank: Optional[FloorplanBank] = None,
+        merge_tiles: bool = False,
+        rng: Optional[random.Random] = None,
+        np_rng: Optional[np.random.RandomState] = None,
+        artifact_sink: Optional[ArtifactSink] = None,
     ) -> None:
         self.room_spec = room_spec
         self.dims = dims
@@ -53,10 +65,37 @@ class HouseGenerator:
         self.unit_size = unit_size
         self.half_unit_size = unit_size / 2  # Half of the size of a unit in the grid
         self.scale_ratio = unit_size / DEFAULT_FLOOR_SIZE
+        self.free_space = free_space  # the free space representation of the rooms, see Room
+        # the early stopping score and the process pool of the floorplan search, see generate_floorplan
+        self.floorplan_target_score = floorplan_target_score
+        self.floorplan_executor = floorplan_executor
+        # precomputed floorplans to sample from instead of growing the rooms, see FloorplanBank
+        self.floorplan_bank = floorplan_bank
+        # merge the floor and ceiling tiles and the walls without doors into fewer scaled instances, see merge_floors_and_walls
+        self.merge_tiles = merge_tiles
+        # the random generators of the scene, the global random module and np.random if not given
+        self.rng = random if rng is None else rng
+        self.np_rng = np.random if np_rng is None else np_rng
+        # where the last scene and the failed small objects go for debugging, the default sink (which drops them) if not given
+        self.artifact_sink = artifact_sink
 
     def generate_structure(self, room_spec):
+        if self.floorplan_bank is not None:
+            floorplan = self.floorplan_bank.sample(room_spec, dims=self.dims, rng=self.rng)
+            if floorplan is not None:
+                return get_house_structure(
+                    floorplan=floorplan,
+                    room_ids=set(room_spec.room_type_map.keys()),
+                    unit_size=self.unit_size,
+                )
         house_structure = generate_house_structure(
-            room_spec=room_spec, dims=self.dims, unit_size=self.unit_size
+            room_spec=room_spec,
+            dims=self.dims,
+            unit_size=self.unit_size,
+            floorplan_target_score=self.floorplan_target_score,
+            floorplan_executor=self.floorplan_executor,
+            rng=self.rng,
+            np_rng=self.np_rng,
         )
         return house_structure
 
@@ -97,7 +136,7 @@ class HouseGenerator:
             f"door_x_size: {door_x_size}, door_y_size: {door_y_size}, door_z_size: {door_z_size}"
         )
 
-        WALL_PREFAB = room2wall[random.choice(list(room2wall.keys()))]
+        WALL_PREFAB = room2wall[self.rng.choice(list(room2wall.keys()))]
         wall_x_size, wall_y_size, wall_z_size = (
             prefabs[WALL_PREFAB]["size"]["x"],
             prefabs[WALL_PREFAB]["size"]["y"],
@@ -107,8 +146,8 @@ class HouseGenerator:
             f"wall_x_size: {wall_x_size}, wall_y_size: {wall_y_size}, wall_z_size: {wall_z_size}"
         )
         room2wall.update({0: DEFAULT_WALL_PREFAB})
-        room2floor = {i: np.random.choice(odb.MY_OBJECTS["floor"]) for i in room_ids}
-        FLOOR_PREFAB = room2floor[random.choice(list(room2floor.keys()))]
+        room2floor = {i: self.np_rng.choice(odb.MY_OBJECTS["floor"]) for i in room_ids}
+        FLOOR_PREFAB = room2floor[self.rng.choice(list(room2floor.keys()))]
         floor_x_size, floor_y_size, floor_z_size = (
             prefabs[FLOOR_PREFAB]["size"]["x"],
             prefabs[FLOOR_PREFAB]["size"]["y"],
@@ -122,225 +161,121 @@ class HouseGenerator:
         floors = np.where(floors == 1, 0, floors)
         log(f"floors:\n{floors}")
 
-        doors = default_add_doors(odb, room_spec, house_structure)
+        doors = default_add_doors(odb, room_spec, house_structure, rng=self.rng)
         log(f"doors: {doors}")
         door_positions = set(doors.values())
 
-        floor_instances = []
-        # generate walls based on the 0-1 boundaries
-        for i in range(floors.shape[0]):
-            for j in range(floors.shape[1]):
-                if floors[i][j] != 0:
-                    FLOOR_PREFAB = room2floor[floors[i][j]]
-
-                    x, z = (i + 0.5 - 1) * self.unit_size, (
-                        j + 0.5 - 1
-                    ) * self.unit_size
-                    floor_instances.append(
+        # NOTE: the instances are emitted cell by cell in row-major order, and within a cell in this order:
+        # floor, ceiling, then the walls and the door of the boundary with the next row, then of the boundary with the next column.
+        # Each instance is sorted by (cell index, slot).
+        FLOOR, CEILING, ROW_WALL_0, ROW_WALL_1, ROW_DOOR, COLUMN_WALL_0, COLUMN_WALL_1, COLUMN_DOOR = range(8)
+        n_slots = 8
+        n_columns = floors.shape[1]
+        keyed_instances = []
+        door_bboxes = []
+
+        wall_sizes = {prefab: prefabs[prefab]["size"] for prefab in set(room2wall.values())}
+        wall_height_scales = {prefab: self.align_wall_height_scale(prefab) for prefab in wall_sizes}
+        # NOTE: all the rooms have the same wall prefab, so the ceiling height does not depend on the room
+        wall_y_size = wall_sizes[WALL_PREFAB]["y"]
+        DOOR_SCALE = [self.scale_ratio, 1, 1]
+        door_size = prefabs[DOOR_PREFAB]["size"]
+
+        # NOTE: floors and ceilings
+        for i, j in zip(*np.nonzero(floors)):
+            i, j = int(i), int(j)
+            key = (i * n_columns + j) * n_slots
+            FLOOR_PREFAB = room2floor[floors[i, j]]
+            x, z = (i + 0.5 - 1) * self.unit_size, (j + 0.5 - 1) * self.unit_size
+            keyed_instances.append(
+                (
+                    key + FLOOR,
+                    {
+                        "prefab": FLOOR_PREFAB,
+                        "position": [x, -floor_y_size / 2, z],
+                        "rotation": [0, 90, 0],
+                        "scale": [self.scale_ratio, 1, self.scale_ratio],
+                        "type": "kinematic",
+                    },
+                )
+            )
+            if add_ceiling:
+                keyed_instances.append(
+                    (
+                        key + CEILING,
                         {
                             "prefab": FLOOR_PREFAB,
-                            "position": [x, -floor_y_size / 2, z],
+                            "position": [x, wall_y_size + floor_y_size / 2, z],
                             "rotation": [0, 90, 0],
                             "scale": [self.scale_ratio, 1, self.scale_ratio],
                             "type": "kinematic",
-                        }
+                        },
                     )
-                    # add ceiling
-                    if add_ceiling:
-                        floor_instances.append(
-                            {
-                                "prefab": FLOOR_PREFAB,
-                                "position": [x, wall_y_size + floor_y_size / 2, z],
-                                "rotation": [0, 90, 0],
-                                "scale": [self.scale_ratio, 1, self.scale_ratio],
-                                "type": "kinematic",
-                            }
-                        )
-
-                WALL_PREFAB = room2wall[floors[i][j]]
-                wall_x_size, wall_y_size, wall_z_size = (
-                    prefabs[WALL_PREFAB]["size"]["x"],
-                    prefabs[WALL_PREFAB]["size"]["y"],
-                    prefabs[WALL_PREFAB]["size"]["z"],
                 )
 
-                WALL_WITH_DOOR_PREFAB = WALL_PREFAB[:-1] + "2"
-
-                DOOR_SCALE = [self.scale_ratio, 1, 1]
-                a = floors[i][j]
-                if i < floors.shape[0] - 1:
-                    a_col = floors[i + 1][j]
-                    if remove_out_walls and (a==0 or a_col==0):
-                        continue
-
-                    if a != a_col:
-                        x = i + 1 - 1
-                        z = j + 0.5 - 1
-                        y_rot = 90
-
-                        x = x * self.unit_size
-                        z = z * self.unit_size
-
-                        left_x = x - wall_z_size / 4
-                        right_x = x + wall_z_size / 4
-
-                        left_wall_prefab = room2wall[floors[i][j]]
-                        right_wall_prefab = room2wall[floors[i + 1][j]]
-
-                        scale = [self.scale_ratio, 1, 0.5]
-                        left_scale = [
-                            self.scale_ratio,
-                            self.align_wall_height_scale(left_wall_prefab),
-                            0.5,
-                        ]
-                        right_scale = [
-                            self.scale_ratio,
-                            self.align_wall_height_scale(right_wall_prefab),
-                            0.5,
-                        ]
-
-                        left_wall_with_door_prefab = left_wall_prefab[:-1] + "2"
-                        right_wall_with_door_prefab = right_wall_prefab[:-1] + "2"
-
-                        left_rotation = 270
-                        right_rotation = 90
-                        door_rotation = 270
-
-                        door = None
-                        if ((i, j), (i + 1, j)) in door_positions:
-                            left_wall = self.format_object(
-                                left_wall_with_door_prefab,
-                                (left_x, 1.5, z),
-                                left_rotation,
-                                left_scale,
-                            )
-                            right_wall = self.format_object(
-                                right_wall_with_door_prefab,
-                                (right_x, 1.5, z),
-                                right_rotation,
-                                right_scale,
-                            )
-                            door = self.format_object(
-                                DOOR_PREFAB,
-                                (x, door_y_size / 2, z),
-                                door_rotation,
-                                DOOR_SCALE,
-                            )
-                        else:
-                            left_wall = self.format_object(
-                                left_wall_prefab,
-                                (left_x, 1.5, z),
-                                left_rotation,
-                                left_scale,
-                            )
-                            right_wall = self.format_object(
-                                right_wall_prefab,
-                                (right_x, 1.5, z),
-                                right_rotation,
-                                right_scale,
-                            )
+        # NOTE: the boundaries between different rooms (or a room and the outside)
+        row_boundaries = np.zeros(floors.shape, dtype=bool)
+        row_boundaries[:-1] = np.diff(floors, axis=0) != 0
+        column_boundaries = np.zeros(floors.shape, dtype=bool)
+        column_boundaries[:, :-1] = np.diff(floors, axis=1) != 0
+        if remove_out_walls:
+            # NOTE: a cell next to the outside in the next row skips both of its boundaries
+            skip_cell = np.zeros(floors.shape, dtype=bool)
+            skip_cell[:-1] = (floors[:-1] == 0) | (floors[1:] == 0)
+            row_boundaries &= ~skip_cell
+            column_boundaries &= ~skip_cell
+            column_boundaries[:, :-1] &= (floors[:, :-1] != 0) & (floors[:, 1:] != 0)
+
+        for axis, boundaries in ((0, row_boundaries), (1, column_boundaries)):
+            for i, j in zip(*np.nonzero(boundaries)):
+                i, j = int(i), int(j)
+                key = (i * n_columns + j) * n_slots
+                (ni, nj) = (i + 1, j) if axis == 0 else (i, j + 1)
+                a, b = floors[i, j], floors[ni, nj]
+                wall_prefab_0, wall_prefab_1 = room2wall[a], room2wall[b]
+                wall_z_size = wall_sizes[room2wall[a]]["z"]
+                if axis == 0:
+                    x, z = (i + 1 - 1) * self.unit_size, (j + 0.5 - 1) * self.unit_size
+                    position_0, position_1 = (x - wall_z_size / 4, 1.5, z), (x + wall_z_size / 4, 1.5, z)
+                    rotation_0, rotation_1, door_rotation = 270, 90, 270
+                    slots = (ROW_WALL_0, ROW_WALL_1, ROW_DOOR)
+                else:
+                    x, z = (i + 0.5 - 1) * self.unit_size, (j + 1 - 1) * self.unit_size
+                    position_0, position_1 = (x, 1.5, z - wall_z_size / 4), (x, 1.5, z + wall_z_size / 4)
+                    rotation_0, rotation_1, door_rotation = 180, 0, 180
+                    slots = (COLUMN_WALL_0, COLUMN_WALL_1, COLUMN_DOOR)
+
+                has_door = ((i, j), (ni, nj)) in door_positions
+                if has_door:
+                    wall_prefab_0, wall_prefab_1 = wall_prefab_0[:-1] + "2", wall_prefab_1[:-1] + "2"
+                scale_0 = [self.scale_ratio, wall_height_scales[room2wall[a]], 0.5]
+                scale_1 = [self.scale_ratio, wall_height_scales[room2wall[b]], 0.5]
+                if a != 0:
+                    keyed_instances.append((key + slots[0], self.format_object(wall_prefab_0, position_0, rotation_0, scale_0)))
+                if b != 0:
+                    keyed_instances.append((key + slots[1], self.format_object(wall_prefab_1, position_1, rotation_1, scale_1)))
+                if has_door:
+                    keyed_instances.append((key + slots[2], self.format_object(DOOR_PREFAB, (x, door_y_size / 2, z), door_rotation, DOOR_SCALE)))
+                    if axis == 0:
+                        door_bbox = (
+                            x - door_size["x"] / 2 - 1.0,
+                            z - door_size["z"] / 2 - 0.3,
+                            x + door_size["x"] / 2 + 1.2,  # 1.2 is length of door
+                            z + door_size["z"] / 2 + 0.3,
+                        )
+                    else:
+                        door_bbox = (
+                            x - door_size["x"] / 2 - 0.3,
+                            z - door_size["z"] / 2 - 1.0,
+                            x + door_size["x"] / 2 + 1.2,
+                            z + door_size["z"] / 2 + 0.3,
+                        )
+                    door_bboxes.append((key + slots[2], door_bbox))
 
-                        if floors[i][j] != 0:
-                            floor_instances.append(left_wall)
-                        if floors[i + 1][j] != 0:
-                            floor_instances.append(right_wall)
-                        if door:
-                            floor_instances.append(door)
-                            door_size = prefabs[DOOR_PREFAB]["size"]
-                            door_bbox = (
-                                x - door_size["x"] / 2 - 1.0,
-                                z - door_size["z"] / 2 - 0.3,
-                                x + door_size["x"] / 2 + 1.2,  # 1.2 is length of door
-                                z + door_size["z"] / 2 + 0.3,
-                            )
-                            self.placer.insert(DOOR_PREFAB, door_bbox)
-
-                if j < floors.shape[1] - 1:
-                    a_row = floors[i][j + 1]
-                    if remove_out_walls and (a==0 or a_row==0):
-                        continue
-
-                    if a != a_row:
-                        x = i + 0.5 - 1
-                        z = j + 1 - 1
-                        y_rot = 0
-
-                        x = x * self.unit_size
-                        z = z * self.unit_size
-
-                        up_z = z - wall_z_size / 4
-                        down_z = z + wall_z_size / 4
-
-                        up_wall_prefab = room2wall[floors[i][j]]
-                        down_wall_prefab = room2wall[floors[i][j + 1]]
-
-                        scale = [self.scale_ratio, 1, 0.5]
-                        up_scale = [
-                            self.scale_ratio,
-                            self.align_wall_height_scale(up_wall_prefab),
-                            0.5,
-                        ]
-                        down_scale = [
-                            self.scale_ratio,
-                            self.align_wall_height_scale(down_wall_prefab),
-                            0.5,
-                        ]
-
-                        up_wall_with_door_prefab = up_wall_prefab[:-1] + "2"
-                        down_wall_with_door_prefab = down_wall_prefab[:-1] + "2"
-
-                        door = None
-
-                        up_rotation = 180
-                        down_rotation = 0
-                        door_rotation = 180
-
-                        if ((i, j), (i, j + 1)) in door_positions:
-                            up_wall = self.format_object(
-                                up_wall_with_door_prefab,
-                                (x, 1.5, up_z),
-                                up_rotation,
-                                up_scale,
-                            )
-                            down_wall = self.format_object(
-                                down_wall_with_door_prefab,
-                                (x, 1.5, down_z),
-                                down_rotation,
-                                down_scale,
-                            )
-                            door = self.format_object(
-                                DOOR_PREFAB,
-                                (x, door_y_size / 2, z),
-                                door_rotation,
-                                DOOR_SCALE,
-                            )
-                        else:
-                            up_wall = self.format_object(
-                                up_wall_prefab,
-                                (x, 1.5, up_z),
-                                up_rotation,
-                                up_scale,
-                            )
-                            down_wall = self.format_object(
-                                down_wall_prefab,
-                                (x, 1.5, down_z),
-                                down_rotation,
-                                down_scale,
-                            )
-                        if floors[i][j] != 0:
-                            floor_instances.append(up_wall)
-                        if floors[i][j + 1] != 0:
-                            floor_instances.append(down_wall)
-                        if door:
-                            floor_instances.append(door)
-                            door_size = prefabs[DOOR_PREFAB]["size"]
-                            door_bbox = (
-                                x - door_size["x"] / 2 - 0.3,
-                                z - door_size["z"] / 2 - 1.0,
-                                x + door_size["x"] / 2 + 1.2,
-                                z + door_size["z"] / 2 + 0.3,
-                            )
-                            self.placer.insert(DOOR_PREFAB, door_bbox)
+        keyed_instances.sort(key=lambda keyed_instance: keyed_instance[0])
+        floor_instances = [instance for _, instance in keyed_instances]
+        for _, door_bbox in sorted(door_bboxes, key=lambda keyed_bbox: keyed_bbox[0]):
+            self.placer.insert(DOOR_PREFAB, door_bbox)
 
         return floor_instances, floors
 
@@ -362,7 +297,7 @@ class HouseGenerator:
             # get the index of the floor
             floor_idx = np.where(ravel_floors != 0)[0]
             # sample from the floor index
-            floor_idx = np.random.choice(floor_idx)
+            floor_idx = self.np_rng.choice(floor_idx)
             # get the x and z index
             x, z = np.unravel_index(floor_idx, floors.shape)
             log(f"human/agent x: {x}, z: {z}")
@@ -370,7 +305,7 @@ class HouseGenerator:
             # get the bbox of the floor
             bbox = get_bbox_of_floor(x, z)
             # uniformly sample from the bbox, with eps
-            x, z = np.random.uniform(bbox[0] + eps, bbox[2] - eps), np.random.uniform(
+            x, z = self.np_rng.uniform(bbox[0] + eps, bbox[2] - eps), self.np_rng.uniform(
                 bbox[1] + eps, bbox[3] - eps
             )
             return x, z
@@ -383,7 +318,7 @@ class HouseGenerator:
             player = {
                 "prefab": "",
                 "position": [x, 0.05, z],
-                "rotation": [0, np.random.uniform(0, 360), 0],
+                "rotation": [0, self.np_rng.uniform(0, 360), 0],
                 "scale": [1, 1, 1],
                 "parent": -1,
                 "type": "",
@@ -399,7 +334,7 @@ class HouseGenerator:
             playmate = {
                 "prefab": "",
                 "position": [x, 0.05, z],
-                "rotation": [0, np.random.uniform(0, 360), 0],
+                "rotation": [0, self.np_rng.uniform(0, 360), 0],
                 "scale": [1, 1, 1],
                 "parent": -1,
                 "type": "",
@@ -435,6 +370,8 @@ class HouseGenerator:
                 room_type=room_type,
                 room_id=room_id,
                 odb=self.odb,
+                free_space=self.free_space,
+                rng=self.rng,
             )
             self.rooms[room_id] = room
 
@@ -445,8 +382,7 @@ class HouseGenerator:
         anchor_type: str,
         anchor_delta: int,
         odb: ObjectDB,
-        spawnable_assets, # pd.DataFrame
-        spawnable_asset_groups, # pd.DataFrame
+        candidates: FloorAssetCandidates,
         priority_asset_types: List[str],
     ):
         set_rotated = None
@@ -479,66 +415,41 @@ class HouseGenerator:
         # NOTE: define the size filters
         if anchor_delta in {1, 7}:
             # NOTE: should not be rotated
-            size_filter = lambda assets_df: (
-                (assets_df["xSize"] + x_margin < rect_x_length)
-                & (assets_df["zSize"] + z_margin < rect_z_length)
-            )
             set_rotated = False
         elif anchor_delta in {3, 5}:
             # NOTE: must be rotated
-            size_filter = lambda assets_df: (
-                (assets_df["zSize"] + z_margin < rect_x_length)
-                & (assets_df["xSize"] + x_margin < rect_z_length)
-            )
             set_rotated = True
-        else:
-            # NOTE: either rotated or not rotated works
-            size_filter = lambda assets_df: (
-                (
-                    (assets_df["xSize"] + x_margin < rect_x_length)
-                    & (assets_df["zSize"] + z_margin < rect_z_length)
-                )
-                | (
-                    (assets_df["zSize"] + z_margin < rect_x_length)
-                    & (assets_df["xSize"] + x_margin < rect_z_length)
-                )
-            )
+        # NOTE: otherwise, either rotated or not rotated works
 
-        asset_group_candidates = spawnable_asset_groups[
-            spawnable_asset_groups[anchor_type] & size_filter(spawnable_asset_groups)
-        ]
-        asset_candidates = spawnable_assets[
-            spawnable_assets[anchor_type] & size_filter(spawnable_assets)
-        ]
+        catalog = candidates.catalog
+        asset_group_candidates, asset_candidates = candidates.filter(
+            anchor_type, x_margin, z_margin, rect_x_length, rect_z_length, set_rotated
+        )
 
         if priority_asset_types:
             for asset_type in priority_asset_types:
                 asset_type = asset_type.lower()
                 # NOTE: see if there are any semantic asset groups with the asset
-                asset_groups_with_type = asset_group_candidates[
-                    asset_group_candidates[f"has{asset_type}"]
-                ]
+                asset_groups_with_type = candidates.groups_with_type(
+                    asset_group_candidates, asset_type
+                )
 
                 # NOTE: see if assets can spawn by themselves
-                can_spawn_alone_assets = odb.PLACEMENT_ANNOTATIONS[
-                    odb.PLACEMENT_ANNOTATIONS.index == asset_type
-                ]
-
-                can_spawn_standalone = len(can_spawn_alone_assets) and (
-                    can_spawn_alone_assets[f"in{room.room_type}s"].iloc[0] > 0
-                )
+                can_spawn_standalone = catalog.can_spawn_standalone.get(asset_type, False)
                 assets_with_type = None
                 if can_spawn_standalone:
-                    assets_with_type = asset_candidates[
-                        asset_candidates["assetType"] == asset_type
-                    ]
+                    assets_with_type = candidates.assets_with_type(
+                        asset_candidates, asset_type
+                    )
 
                 # NOTE: try using an asset group first
                 if len(asset_groups_with_type) and (
-                    assets_with_type is None or random.random() <= P_CHOOSE_ASSET_GROUP
+                    assets_with_type is None or self.rng.random() <= P_CHOOSE_ASSET_GROUP
                 ):
                     # NOTE: Try using an asset group
-                    asset_group = asset_groups_with_type.sample()
+                    asset_group = catalog.group_records[
+                        asset_groups_with_type[sample_index(len(asset_groups_with_type), self.np_rng)]
+                    ]
                     chosen_asset_group = room.place_asset_group(
                         asset_group=asset_group,
                         set_rotated=set_rotated,
@@ -551,7 +462,9 @@ class HouseGenerator:
                 # NOTE: try using a standalone asset
                 if assets_with_type is not None and len(assets_with_type):
                     # NOTE: try spawning in standalone
-                    asset = assets_with_type.sample()
+                    asset = catalog.asset_records[
+                        assets_with_type[sample_index(len(assets_with_type), self.np_rng)]
+                    ]
                     return room.place_asset(
                         asset=asset,
                         set_rotated=set_rotated,
@@ -564,12 +477,14 @@ class HouseGenerator:
 
         if (
             len(asset_group_candidates)
-            and random.random() <= P_CHOOSE_ASSET_GROUP
+            and self.rng.random() <= P_CHOOSE_ASSET_GROUP
             and can_use_asset_group
         ) or (must_use_asset_group and len(asset_group_candidates)):
 
             # NOTE: use an asset group if you can
-            asset_group = asset_group_candidates.sample()
+            asset_group = catalog.group_records[
+                asset_group_candidates[sample_index(len(asset_group_candidates), self.np_rng)]
+            ]
             chosen_asset_group = room.place_asset_group(
                 asset_group=asset_group,
                 set_rotated=set_rotated,
@@ -581,9 +496,9 @@ class HouseGenerator:
             return chosen_asset_group
 
         # NOTE: Skip weight 1 assets with a probability of P_W1_ASSET_SKIPPED
-        if random.random() <= P_W1_ASSET_SKIPPED:
+        if self.rng.random() <= P_W1_ASSET_SKIPPED:
             asset_candidates = asset_candidates[
-                asset_candidates[f"in{room.room_type}s"] != 1
+                catalog.asset_room_weights[asset_candidates] != 1
             ]
 
         # NOTE: no assets fit the anchor_type and size criteria
@@ -591,8 +506,10 @@ class HouseGenerator:
             return None
 
         # NOTE: this is a sampling by asset type
-        asset_type = random.choice(asset_candidates["assetType"].unique())
-        asset = asset_candidates[asset_candidates["assetType"] == asset_type].sample()
+        # NOTE: the type codes follow the order of the assets, so np.unique keeps the order of appearance
+        asset_type = self.rng.choice(np.unique(catalog.asset_type_of[asset_candidates]))
+        assets_with_type = asset_candidates[catalog.asset_type_of[asset_candidates] == asset_type]
+        asset = catalog.asset_records[assets_with_type[sample_index(len(assets_with_type), self.np_rng)]]
         return room.place_asset(
             asset=asset,
             set_rotated=set_rotated,
@@ -601,55 +518,8 @@ class HouseGenerator:
         )
 
     def get_spawnable_asset_group_info(self):
-        import pandas as pd
-        from .asset_groups import AssetGroupGenerator
-
-        asset_groups = self.odb.ASSET_GROUPS
-
-        data = []
-        for asset_group_name, asset_group_data in asset_groups.items():
-            asset_group_generator = AssetGroupGenerator(
-                name=asset_group_name,
-                data=asset_group_data,
-                odb=self.odb,
-            )
-
-            dims = asset_group_generator.dimensions
-            group_properties = asset_group_data["groupProperties"]
-
-            # NOTE: This is kinda naive, since a single asset in the asset group
-            # could map to multiple different types of asset types (e.g., Both Chair
-            # and ArmChair could be in the same asset).
-            # NOTE: use the asset_group_generator.data instead of asset_group_data
-            # since it only includes assets from a given split.
-            asset_types_in_group = set(
-                asset_type
-                for asset in asset_group_generator.data["assetMetadata"].values()
-                for asset_type, asset_id in asset["assetIds"]
-            )
-            group_data = {
-                "assetGroupName": asset_group_name,
-                "assetGroupGenerator": asset_group_generator,
-                "xSize": dims["x"],
-                "ySize": dims["y"],
-                "zSize": dims["z"],
-                "inBathrooms": group_properties["roomWeights"]["bathrooms"],
-                "inBedrooms": group_properties["roomWeights"]["bedrooms"],
-                "inKitchens": group_properties["roomWeights"]["kitchens"],
-                "inLivingRooms": group_properties["roomWeights"]["livingRooms"],
-                "allowDuplicates": group_properties["properties"]["allowDuplicates"],
-                "inCorner": group_properties["location"]["corner"],
-                "onEdge": group_properties["location"]["edge"],
-                "inMiddle": group_properties["location"]["middle"],
-            }
-
-            # NOTE: Add which types are in this asset group
-            for asset_type in self.odb.OBJECT_DICT.keys():
-                group_data[f"has{asset_type}"] = asset_type in asset_types_in_group
-
-            data.append(group_data)
-
-        return pd.DataFrame(data) 
+        # Built once per ObjectDB, since it only depends on the static asset group data.
+        return self.odb.get_spawnable_asset_group_info()
 
     def prefab_fit_rectangle(self, prefab_size, rectangle):
         x0, z0, x1, z1 = rectangle
@@ -688,7 +558,7 @@ class HouseGenerator:
                 z + AGENT_SIZE / 2,
             )
             # if self.placer.place("agent", x, z, AGENT_SIZE, AGENT_SIZE):
-            if not self.placer.spindex.intersect(bbox):
+            if not self.placer.intersect(bbox):
                 # log(i)
 
                 rotation = 45 + i * 90
@@ -703,7 +573,7 @@ class HouseGenerator:
                 }
                 agents.append(agent)
         if agents:
-            idx = random.randint(0, len(agents) - 1)
+            idx = self.rng.randint(0, len(agents) - 1)
             agent = agents[idx]
             x = agent["position"][0]
             z = agent["position"][2]
@@ -746,6 +616,13 @@ class HouseGenerator:
         floor_instances, floors = self.add_floors_and_walls(
             house_structure, room_spec, odb, prefabs, add_ceiling=True, remove_out_walls=False
         )
+        if self.merge_tiles:
+            floor_instances = merge_floors_and_walls(
+                floor_instances,
+                floor_prefabs=odb.MY_OBJECTS["floor"],
+                wall_prefabs=[DEFAULT_WALL_PREFAB],
+                unit_size=self.unit_size,
+            )
 
         # add light
         # light_prefab = "LowPolyInterior2_Light_04"
@@ -782,7 +659,6 @@ class HouseGenerator:
 
         max_floor_objects = 10
 
-        spawnable_asset_group_info = self.get_spawnable_asset_group_info()
 
         specified_object_instances = []
         specified_object_types = set()
@@ -790,7 +666,7 @@ class HouseGenerator:
             # first place the specified receptacles
             for receptacle, d in receptacle_object_counts.items():
                 receptacle_type = receptacle
-                receptacle = random.choice(odb.OBJECT_DICT[receptacle.lower()])
+                receptacle = self.rng.choice(odb.OBJECT_DICT[receptacle.lower()])
                 specified_object_types.add(odb.OBJECT_TO_TYPE[receptacle])
                 count = d["count"]
                 prefab_size = odb.PREFABS[receptacle]["size"]
@@ -817,8 +693,8 @@ class HouseGenerator:
                                 minz += z_size / 2 + WALL_THICKNESS
                                 maxx -= x_size / 2 + WALL_THICKNESS
                                 maxz -= z_size / 2 + WALL_THICKNESS
-                                x = np.random.uniform(minx, maxx)
-                                z = np.random.uniform(minz, maxz)
+                                x = self.np_rng.uniform(minx, maxx)
+                                z = self.np_rng.uniform(minz, maxz)
                                 bbox = (
                                     x - x_size / 2,
                                     z - z_size / 2,
@@ -853,13 +729,10 @@ class HouseGenerator:
         object_instances = []
         for room in self.rooms.values():
             asset = None
-            spawnable_asset_groups = spawnable_asset_group_info[
-                spawnable_asset_group_info[f"in{room.room_type}s"] > 0
-            ]
-
-            floor_types, spawnable_assets = odb.FLOOR_ASSET_DICT[
-                (room.room_type, room.split)
-            ]
+            # NOTE: the assets and asset groups that can still spawn in the room
+            candidates = FloorAssetCandidates(
+                odb.get_floor_asset_catalog(room.room_type, room.split)
+            )
 
             priority_asset_types = copy.deepcopy(
                 odb.PRIORITY_ASSET_TYPES.get(room.room_type, [])
@@ -886,8 +759,7 @@ class HouseGenerator:
                     rectangle=rectangle,
                     anchor_type=anchor_type,
                     anchor_delta=anchor_delta,
-                    spawnable_assets=spawnable_assets,
-                    spawnable_asset_groups=spawnable_asset_groups,
+                    candidates=candidates,
                     priority_asset_types=priority_asset_types,
                     odb=odb,
                 )
@@ -912,9 +784,7 @@ class HouseGenerator:
                     added_asset_types.extend([o["assetType"] for o in asset["objects"]])
 
                     if not asset["allowDuplicates"]:
-                        spawnable_asset_groups = spawnable_asset_groups.query(
-                            f"assetGroupName!='{asset['assetGroupName']}'"
-                        )
+                        candidates.remove_asset_group(asset["assetGroupName"])
 
                 for asset_type in added_asset_types:
                     # Remove spawned object types from `priority_asset_types` when appropriate
@@ -926,15 +796,9 @@ class HouseGenerator:
                     ]["multiplePerRoom"]
 
                     if not allow_duplicates_of_asset_type:
-                        # NOTE: Remove all asset groups that have the type
-                        spawnable_asset_groups = spawnable_asset_groups[
-                            ~spawnable_asset_groups[f"has{asset_type.lower()}"]
-                        ]
-
-                        # NOTE: Remove all standalone assets that have the type
-                        spawnable_assets = spawnable_assets[
-                            spawnable_assets["assetType"] != asset_type
-                        ]
+                        # NOTE: Remove all asset groups that have the type,
+                        # and all standalone assets that have the type
+                        candidates.remove_asset_type(asset_type)
 
         def convert_position(position: Vector3):
             x = a.position["x"]
@@ -1121,6 +985,9 @@ class HouseGenerator:
             object_counts=object_counts,
             specified_object_instances=specified_object_instances,
             receptacle_object_counts=receptacle_object_counts,
+            rng=self.rng,
+            np_rng=self.np_rng,
+            artifact_sink=self.artifact_sink,
         )
 
         ### STEP 5: Adjust Positions for Unity GameObject
@@ -1168,6 +1035,5 @@ class HouseGenerator:
             "center": center,
             "room_polygon": room_polygon,
         }
-        with open("last_scene.json", "w", encoding="utf-8") as f:
-            json.dump(infos, f, ensure_ascii=False, indent=4)
+        (self.artifact_sink or get_default_artifact_sink()).put("last_scene", infos)
         return infos
@@ -1,4 +1,6 @@
+import random
 from collections import defaultdict
+from concurrent.futures import Executor
 from typing import Dict, List, Optional, Sequence, Set, Tuple
 
 import numpy as np
@@ -29,20 +31,28 @@ INTERIOR_BOUNDARY_SCALE = UNIT_SIZE
 
 
 def find_walls(floorplan: np.array):
+    """Find the unit walls between the neighboring cells of different rooms.
+
+    Returns:
+        Dict[Tuple[int, int], List]: The unit walls between each pair of rooms (smaller room id first), in the order
+        of a row-major scan of the cells, where the wall with the right neighbor of a cell comes before the wall with
+        its bottom neighbor. A wall is a pair of (row, col) points, the second one being the larger.
+    """
+    floorplan = np.asarray(floorplan)
+    cells = floorplan[:-1, :-1]
+    # NOTE: the last axis is 0 for the right neighbor and 1 for the bottom neighbor, so that np.nonzero keeps the scan order
+    neighbors = np.stack([floorplan[:-1, 1:], floorplan[1:, :-1]], axis=-1)
+    rows, cols, sides = np.nonzero(cells[..., None] != neighbors)
+    a = cells[rows, cols]
+    b = neighbors[rows, cols, sides]
+    lows, highs = np.minimum(a, b).tolist(), np.maximum(a, b).tolist()
+
     walls = defaultdict(list)
-    for row in range(len(floorplan) - 1):
-        for col in range(len(floorplan[0]) - 1):
-            a = floorplan[row, col]
-            b = floorplan[row, col + 1]
-            if a != b:
-                walls[(int(min(a, b)), int(max(a, b)))].append(
-                    ((row - 1, col), (row, col))
-                )
-            b = floorplan[row + 1, col]
-            if a != b:
-                walls[(int(min(a, b)), int(max(a, b)))].append(
-                    ((row, col - 1), (row, col))
-                )
+    for low, high, row, col, side in zip(lows, highs, rows.tolist(), cols.tolist(), sides.tolist()):
+        if side == 0:
+            walls[(low, high)].append(((row - 1, col), (row, col)))
+        else:
+            walls[(low, high)].append(((row, col - 1), (row, col)))
     return walls
 
 
@@ -78,46 +88,33 @@ def consolidate_walls(walls):
             ((0, 0), (0, 9)),
             ((0, 0), (9, 0))
         }
+
+    Each point starts at most one wall of a group along each axis, as in the output of find_walls. Each run of
+    collinear walls is followed from its first point, which does not end a wall along the same axis, so the walls
+    are joined in time linear in their number.
     """
     out = dict()
     for wall_group_id, wall_pairs in walls.items():
-        wall_map = defaultdict(lambda: set())
-        wall_map = dict()
-        for wall in wall_pairs:
-            if wall[0] not in wall_map:
-                wall_map[wall[0]] = set()
-            wall_map[wall[0]].add(wall[1])
-
-        did_update = True
-        while did_update:
-            did_update = False
-            for w1_1 in wall_map.copy():
-                if w1_1 not in wall_map:
+        # the end of the wall that starts at a point, along the axis (0: row, 1: col) of the wall
+        next_points = ({}, {})
+        starts = dict()
+        for p0, p1 in wall_pairs:
+            axis = 0 if p0[1] == p1[1] else 1
+            next_points[axis][p0] = p1
+            starts.setdefault(p0, []).append(axis)
+
+        end_points = (set(next_points[0].values()), set(next_points[1].values()))
+
+        consolidated = []
+        for p0, axes in starts.items():
+            for axis in axes:
+                if p0 in end_points[axis]:
                     continue
-                break_outer = False
-                for w1_2 in wall_map[w1_1]:
-                    if w1_2 in wall_map:
-                        w2_1 = w1_2
-                        for w2_2 in wall_map[w2_1]:
-                            if (
-                                w1_1[0] == w1_2[0] == w2_1[0] == w2_2[0]
-                                or w1_1[1] == w1_2[1] == w2_1[1] == w2_2[1]
-                            ):
-                                wall_map[w2_1].remove(w2_2)
-                                if not wall_map[w2_1]:
-                                    del wall_map[w2_1]
-
-                                wall_map[w1_1].remove(w2_1)
-                                wall_map[w1_1].add(w2_2)
-
-                                did_update = True
-                                break_outer = True
-                                break
-                        if break_outer:
-                            break
-                    if break_outer:
-                        break
-        out[wall_group_id] = set([(w1, w2) for w1 in wall_map for w2 in wall_map[w1]])
+                p1 = next_points[axis][p0]
+                while p1 in next_points[axis]:
+                    p1 = next_points[axis][p1]
+                consolidated.append((p0, p1))
+        out[wall_group_id] = set(consolidated)
     return out
 
 
@@ -215,24 +212,62 @@ def get_xz_poly_map(boundary_groups, room_ids: Set[int]) -> Dict[int, XZPoly]:
     return out
 
 
-def generate_house_structure(room_spec: RoomSpec, dims: Optional[Tuple[int, int]], unit_size):
+def generate_house_structure(
+    room_spec: RoomSpec,
+    dims: Optional[Tuple[int, int]],
+    unit_size,
+    floorplan_target_score: Optional[float] = None,
+    floorplan_executor: Optional[Executor] = None,
+    rng: Optional[random.Random] = None,
+    np_rng: Optional[np.random.RandomState] = None,
+):
+    """floorplan_target_score and floorplan_executor are the target_score and executor of generate_floorplan.
+
+    rng and np_rng are the random generators to use, and default to the global ones.
+    """
     room_ids = set(room_spec.room_type_map.keys())
 
     generate_dims = None
     if dims != None:
         generate_dims = dims
     elif room_spec.dims is not None:
-        generate_dims = room_spec.dims()
+        generate_dims = room_spec.dims() if rng is None else room_spec.dims(rng)
 
     interior_boundary = sample_interior_boundary(
         num_rooms=len(room_ids),
         dims=generate_dims,
+        rng=rng,
+        np_rng=np_rng,
     )
 
     floorplan = generate_floorplan(
-        room_spec=room_spec, interior_boundary=interior_boundary
+        room_spec=room_spec,
+        interior_boundary=interior_boundary,
+        target_score=floorplan_target_score,
+        executor=floorplan_executor,
+        rng=rng,
+        np_rng=np_rng,
+    )
+    return get_house_structure(
+        floorplan=floorplan,
+        room_ids=room_ids,
+        unit_size=unit_size,
+        interior_boundary=interior_boundary,
     )
 
+
+def get_house_structure(
+    floorplan: np.ndarray,
+    room_ids: Set[int],
+    unit_size,
+    interior_boundary: Optional[np.ndarray] = None,
+) -> HouseStructure:
+    """Build the walls and the room polygons of a floorplan (without the outdoor padding).
+
+    The interior boundary defaults to the outdoor cells of the floorplan.
+    """
+    if interior_boundary is None:
+        interior_boundary = np.where(floorplan == OUTDOOR_ROOM_ID, OUTDOOR_ROOM_ID, 0)
     floorplan = np.pad(
         floorplan, pad_width=1, mode="constant", constant_values=OUTDOOR_ROOM_ID
     )
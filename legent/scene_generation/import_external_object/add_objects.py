@@ -6,6 +6,7 @@ from pathlib import Path
 import pandas as pd
 
 from legent.environment.env_utils import get_default_env_data_path
+from legent.scene_generation.objects import clear_cache
 
 ENV_DATA_PATH = Path(f"{get_default_env_data_path()}/procthor")
 # ENV_DATA_PATH = Path(r"D:\code\LEGENT\LEGENT\legent\scene_generation\data")
@@ -156,3 +157,6 @@ if args.type == "asset":
 elif args.type == "asset_type":
     asset_type = args.asset_type
     add_asset_type(asset_type, args)
+
+# The cached tables (e.g. the spawnable asset groups) are built from the changed files.
+clear_cache()
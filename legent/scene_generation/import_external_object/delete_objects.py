@@ -2,6 +2,7 @@ import argparse
 import json
 import os
 from legent.environment.env_utils import get_default_env_data_path
+from legent.scene_generation.objects import clear_cache
 from pathlib import Path
 
 parser = argparse.ArgumentParser()
@@ -52,3 +53,5 @@ delete_addressables(args.asset)
 delete_object_dict(args.asset)
 delete_name_to_type(args.asset)
 
+# The cached tables (e.g. the spawnable asset groups) are built from the changed files.
+clear_cache()
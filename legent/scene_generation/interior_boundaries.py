@@ -16,8 +16,9 @@ DEFAULT_MAX_BOUNDARY_CUT_AREA = 6
 """Max area of a single chop along the boundary."""
 
 
-def get_n_cuts(num_rooms: int) -> int:
-    return round(np.random.beta(a=0.5 * num_rooms, b=6) * 10)
+def get_n_cuts(num_rooms: int, np_rng: Optional[np.random.RandomState] = None) -> int:
+    np_rng = np.random if np_rng is None else np_rng
+    return round(np_rng.beta(a=0.5 * num_rooms, b=6) * 10)
 
 
 def sample_interior_boundary(
@@ -26,20 +27,26 @@ def sample_interior_boundary(
     min_house_side_length: int = DEFAULT_MIN_HOUSE_SIDE_LENGTH,
     max_boundary_cut_area: int = DEFAULT_MAX_BOUNDARY_CUT_AREA,
     dims: Optional[Tuple[int, int]] = None,
+    rng: Optional[random.Random] = None,
+    np_rng: Optional[np.random.RandomState] = None,
 ) -> np.array:
     """Sample a boundary for the interior of a house.
 
     Parameters:
         num_rooms: The number of rooms in the house.
         dims: The (x_size, z_size) dimensions of the house.
+        rng: The random.Random to use. Defaults to the global random module.
+        np_rng: The np.random.RandomState to use. Defaults to the global np.random.
     """
     assert num_rooms > 0
+    rng = random if rng is None else rng
+    np_rng = np.random if np_rng is None else np_rng
 
     # NOTE: -1 * average_room_size and +1 * average_room_size adds in some
     # variance. The +1 makes high is inclusive.
     if dims is None:
         if num_rooms>1:
-            x_size, z_size = np.random.randint(
+            x_size, z_size = np_rng.randint(
                 low=max(
                     min_house_side_length,
                     np.sqrt(num_rooms) * average_room_size - 1 * average_room_size // 2,
@@ -50,9 +57,9 @@ def sample_interior_boundary(
                 size=2,
             )
         else:
-            x_size = np.random.randint(low=2, high=4)
+            x_size = np_rng.randint(low=2, high=4)
             # z_max = 48 // x_size
-            z_size = np.random.randint(low=2, high=4)
+            z_size = np_rng.randint(low=2, high=4)
     else:
         x_size, z_size = dims
 
@@ -60,13 +67,13 @@ def sample_interior_boundary(
 
     # NOTE: LEGENT: If you want a rectangular house, comment out the following code
     if num_rooms > 1:
-        n_cuts = get_n_cuts(num_rooms=num_rooms)
+        n_cuts = get_n_cuts(num_rooms=num_rooms, np_rng=np_rng)
         logging.debug(f"Number of cuts: {n_cuts}")
 
-        chop_sides = np.random.randint(0, 4, size=n_cuts)
+        chop_sides = np_rng.randint(0, 4, size=n_cuts)
 
         for chop_side in chop_sides:
-            x_cut = np.random.randint(
+            x_cut = np_rng.randint(
                 low=1, high=max(2, min(x_size - 1, max_boundary_cut_area // 2))
             )
             z_cut_candidates = []
@@ -76,7 +83,7 @@ def sample_interior_boundary(
                 z_cut_candidates.append(i)
                 i += 1
 
-            z_cut = random.choice(z_cut_candidates)
+            z_cut = rng.choice(z_cut_candidates)
 
             if chop_side == 0:
                 # NOTE: top-right corner
@@ -0,0 +1,111 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+TOLERANCE = 1e-6
+
+
+def _scale_axis(rotation_y: float) -> int:
+    """The world axis (0: x, 2: z) of the local x axis of an instance rotated by rotation_y around y (a multiple of 90)."""
+    return 2 if round(rotation_y) % 180 == 90 else 0
+
+
+def merge_floor_tiles(instances: List[Dict], unit_size: float) -> Dict[int, Dict]:
+    """Merge the floor (or ceiling) tiles on a unit_size grid into rectangles of identical tiles.
+
+    The tiles are grouped by prefab, height, rotation and scale, and each group is covered greedily: a tile starts a
+    rectangle, which is extended along z as far as possible and then along x as long as the whole row is available.
+    Each rectangle becomes one tile at its center, scaled by its number of cells.
+
+    Returns:
+        Dict[int, Dict]: The merged tiles, by the index of the first tile they replace.
+    """
+    groups: Dict[Tuple, Dict[Tuple[int, int], int]] = defaultdict(dict)
+    for index, instance in enumerate(instances):
+        x, y, z = instance["position"]
+        key = (instance["prefab"], y, tuple(instance["rotation"]), tuple(instance["scale"]))
+        # NOTE: the tile of cell (i, j) is centered at ((i - 0.5) * unit_size, (j - 0.5) * unit_size)
+        groups[key][(round(x / unit_size + 0.5), round(z / unit_size + 0.5))] = index
+
+    merged: Dict[int, Dict] = {}
+    for (prefab, y, rotation, scale), cells in groups.items():
+        used = set()
+        for i, j in sorted(cells):
+            if (i, j) in used:
+                continue
+            width = 1
+            while (i, j + width) in cells and (i, j + width) not in used:
+                width += 1
+            height = 1
+            while all((i + height, j + k) in cells and (i + height, j + k) not in used for k in range(width)):
+                height += 1
+            used.update((i + m, j + k) for m in range(height) for k in range(width))
+
+            # NOTE: the rectangle has width cells along z and height cells along x
+            if _scale_axis(rotation[1]) == 2:
+                counts = [width, 1, height]
+            else:
+                counts = [height, 1, width]
+            instance = dict(instances[cells[(i, j)]])
+            instance["position"] = [(i - 1 + height / 2) * unit_size, y, (j - 1 + width / 2) * unit_size]
+            instance["scale"] = [s * n for s, n in zip(scale, counts)]
+            merged[min(cells[(i + m, j + k)] for m in range(height) for k in range(width))] = instance
+    return merged
+
+
+def merge_wall_runs(instances: List[Dict], unit_size: float) -> Dict[int, Dict]:
+    """Merge the collinear walls that are adjacent every unit_size into single walls, scaled along their length.
+
+    The walls are grouped by prefab, rotation, scale and the line they are on. The local x axis of a wall is along
+    its line, so a run of n walls becomes one wall at the middle of the run with its x scale multiplied by n.
+
+    Returns:
+        Dict[int, Dict]: The merged walls, by the index of the first wall they replace.
+    """
+    groups: Dict[Tuple, List[int]] = defaultdict(list)
+    for index, instance in enumerate(instances):
+        axis = _scale_axis(instance["rotation"][1])
+        position = instance["position"]
+        line = tuple(round(position[k] / TOLERANCE) for k in range(3) if k != axis)
+        groups[(instance["prefab"], tuple(instance["rotation"]), tuple(instance["scale"]), axis, line)].append(index)
+
+    merged: Dict[int, Dict] = {}
+    for (_, _, scale, axis, _), indices in groups.items():
+        indices = sorted(indices, key=lambda index: instances[index]["position"][axis])
+        runs = [[indices[0]]]
+        for index in indices[1:]:
+            previous = instances[runs[-1][-1]]["position"][axis]
+            if abs(instances[index]["position"][axis] - previous - unit_size) < TOLERANCE:
+                runs[-1].append(index)
+            else:
+                runs.append([index])
+        for run in runs:
+            first, last = instances[run[0]], instances[run[-1]]
+            instance = dict(instances[min(run)])
+            instance["position"] = list(first["position"])
+            instance["position"][axis] = (first["position"][axis] + last["position"][axis]) / 2
+            instance["scale"] = [scale[0] * len(run), scale[1], scale[2]]
+            merged[min(run)] = instance
+    return merged
+
+
+def merge_floors_and_walls(instances: List[Dict], floor_prefabs: Iterable[str], wall_prefabs: Iterable[str], unit_size: float) -> List[Dict]:
+    """Reduce the number of instances of HouseGenerator.add_floors_and_walls by merging the floor and ceiling tiles
+    and the walls without doors (the walls with doors and the doors have other prefabs and are kept as they are).
+
+    Args:
+        instances (List[Dict]): The instances returned by add_floors_and_walls.
+        floor_prefabs (Iterable[str]): The prefabs of the floor and ceiling tiles.
+        wall_prefabs (Iterable[str]): The prefabs of the walls without doors.
+        unit_size (float): The size of a cell of the floorplan.
+
+    Returns:
+        List[Dict]: The merged instances. A merged instance takes the place of the first instance it replaces.
+    """
+    floor_prefabs, wall_prefabs = set(floor_prefabs), set(wall_prefabs)
+    out: Dict[int, Dict] = {}
+    for merge, prefabs in ((merge_floor_tiles, floor_prefabs), (merge_wall_runs, wall_prefabs)):
+        indices = [i for i, instance in enumerate(instances) if instance["prefab"] in prefabs]
+        merged = merge([instances[i] for i in indices], unit_size)
+        out.update({indices[i]: instance for i, instance in merged.items()})
+    out.update({i: instance for i, instance in enumerate(instances) if instance["prefab"] not in floor_prefabs | wall_prefabs})
+    return [out[i] for i in sorted(out)]
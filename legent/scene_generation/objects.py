@@ -1,13 +1,35 @@
+import glob
+import hashlib
 import json
+import mmap
 import os
+import pickle
+import shutil
+import struct
+import threading
 from collections import defaultdict
-from typing import Any, Dict, List, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
 from legent.environment.env_utils import get_default_env_data_path
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+OBJECT_DB_SNAPSHOT_VERSION = 1
+"""Part of the snapshot file names. Increase it when the tables or their format change."""
+
+SNAPSHOT_MAGIC = b"LGODB"
+SNAPSHOT_HEADER = struct.Struct("<5sHQ")  # magic, version, size of the pickled index
+
+SNAPSHOT_TABLES = ["PLACEMENT_ANNOTATIONS", "OBJECT_DICT", "MY_OBJECTS", "OBJECT_TO_TYPE", "PREFABS", "RECEPTACLES", "KINETIC_AND_INTERACTABLE_INFO", "ASSET_GROUPS"]
+"""The tables of the ObjectDB read from the data files, which the snapshot stores."""
+
+_TABLE_LOAD_LOCK = threading.RLock()
+"""Held while a table of an ObjectDB is loaded on first access, so that the threads touching it at the same time (e.g. the
+scene generations of concurrent AsyncEnvironment resets) wait for it instead of finding it missing."""
+
 
 class ObjectDB:
-    def __init__(self, PLACEMENT_ANNOTATIONS, OBJECT_DICT: Dict[str, List[str]], MY_OBJECTS: Dict[str, List[str]], OBJECT_TO_TYPE: Dict[str, str], PREFABS: Dict[str, Any], RECEPTACLES: Dict[str, Any], KINETIC_AND_INTERACTABLE_INFO: Dict[str, Any], ASSET_GROUPS: Dict[str, Any], FLOOR_ASSET_DICT: Dict, PRIORITY_ASSET_TYPES: Dict[str, List[str]]):
-        import pandas as pd
+    def __init__(self, PLACEMENT_ANNOTATIONS, OBJECT_DICT: Dict[str, List[str]], MY_OBJECTS: Dict[str, List[str]], OBJECT_TO_TYPE: Dict[str, str], PREFABS: Dict[str, Any], RECEPTACLES: Dict[str, Any], KINETIC_AND_INTERACTABLE_INFO: Dict[str, Any], ASSET_GROUPS: Dict[str, Any], FLOOR_ASSET_DICT: Dict, PRIORITY_ASSET_TYPES: Dict[str, List[str]], cache_dir: Optional[str] = None, version: Optional[str] = None, table_loaders: Optional[Dict[str, Callable[[], Any]]] = None):
         self.PLACEMENT_ANNOTATIONS: pd.DataFrame = PLACEMENT_ANNOTATIONS
         self.OBJECT_DICT: Dict[str, List[str]] = OBJECT_DICT
         self.MY_OBJECTS: Dict[str, List[str]] = MY_OBJECTS
@@ -18,7 +40,72 @@ class ObjectDB:
         self.ASSET_GROUPS: Dict[str, Any] = ASSET_GROUPS
         self.FLOOR_ASSET_DICT: Dict[Tuple[str, str], Tuple[Dict[str, Any], pd.DataFrame]] = FLOOR_ASSET_DICT
         self.PRIORITY_ASSET_TYPES: Dict[str, List[str]] = PRIORITY_ASSET_TYPES
-        
+        # The directory of the tables cached on disk. None disables the disk cache.
+        self.cache_dir: Optional[str] = cache_dir
+        # A hash of the data the ObjectDB is built from, which changes with the data. None if unknown (the scenes are not cached).
+        self.version: Optional[str] = version
+        self._spawnable_asset_group_info: Optional[pd.DataFrame] = None
+        self._floor_asset_catalogs: Dict[Tuple[str, str], Any] = {}
+        self._surface_rects: Dict[Tuple[str, bool], Any] = {}
+        # The tables loaded on first access, e.g. from a snapshot (see load_object_db_snapshot). Their arguments are ignored.
+        self._table_loaders: Dict[str, Callable[[], Any]] = dict(table_loaders or {})
+        for name in self._table_loaders:
+            delattr(self, name)
+
+    def __getattr__(self, name):
+        # Only called for the attributes that are not set, i.e. the tables that are not loaded yet.
+        loaders = self.__dict__.get("_table_loaders")
+        if loaders and name in loaders:
+            with _TABLE_LOAD_LOCK:
+                if name in self.__dict__:  # loaded by another thread meanwhile
+                    return self.__dict__[name]
+                table = loaders[name]()
+                setattr(self, name, table)
+                del loaders[name]
+            return table
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def get_spawnable_asset_group_info(self):
+        """The table of the asset groups used by HouseGenerator: one row per asset group, with its generator, its size, room weights,
+        locations and a has{asset_type} column for each asset type.
+
+        It only depends on the static data, so it is built once and cached on the ObjectDB, and on disk if cache_dir is set.
+        """
+        if self._spawnable_asset_group_info is None:
+            self._spawnable_asset_group_info = _get_spawnable_asset_group_info(self)
+        return self._spawnable_asset_group_info
+
+    def get_floor_asset_catalog(self, room_type: str, split: str):
+        """The FloorAssetCatalog (array-backed floor assets and asset groups) of a room type, built once."""
+        from .asset_catalog import FloorAssetCatalog
+
+        key = (room_type, split)
+        if key not in self._floor_asset_catalogs:
+            self._floor_asset_catalogs[key] = FloorAssetCatalog(room_type, split, self)
+        return self._floor_asset_catalogs[key]
+
+    def get_surface_rects(self, prefab: str, rotation: float):
+        """The placeable surfaces of a prefab rotated by rotation degrees around y, as an array of (x_min, x_max, z_min, z_max, y)
+        rows relative to the position of the prefab, in the order of PREFABS[prefab]["placeable_surfaces"].
+
+        As in the scene generation, the x and z extents of the surfaces are swapped unless the rotation is 0 or 180. The arrays
+        are built once per prefab and orientation.
+        """
+        import numpy as np
+
+        swapped = not (rotation == 0 or rotation == 180)
+        key = (prefab, swapped)
+        if key not in self._surface_rects:
+            keys = ["z_min", "z_max", "x_min", "x_max", "y"] if swapped else ["x_min", "x_max", "z_min", "z_max", "y"]
+            surfaces = self.PREFABS[prefab]["placeable_surfaces"] or []
+            self._surface_rects[key] = np.array([[surface[k] for k in keys] for surface in surfaces], dtype=float).reshape(-1, 5)
+        return self._surface_rects[key]
+
+    def clear_cache(self) -> None:
+        self._spawnable_asset_group_info = None
+        self._floor_asset_catalogs.clear()
+        self._surface_rects.clear()
+        self.FLOOR_ASSET_DICT.clear()
 
 ENV_DATA_PATH = None
 def get_data_path():
@@ -128,24 +215,209 @@ class keydefaultdict(defaultdict):
             return ret
 
 
+def _get_spawnable_asset_group_rows(odb: ObjectDB):
+    from .asset_groups import AssetGroupGenerator
+
+    rows = []
+    for asset_group_name, asset_group_data in odb.ASSET_GROUPS.items():
+        asset_group_generator = AssetGroupGenerator(
+            name=asset_group_name,
+            data=asset_group_data,
+            odb=odb,
+        )
+
+        dims = asset_group_generator.dimensions
+        group_properties = asset_group_data["groupProperties"]
+
+        # NOTE: This is kinda naive, since a single asset in the asset group
+        # could map to multiple different types of asset types (e.g., Both Chair
+        # and ArmChair could be in the same asset).
+        # NOTE: use the asset_group_generator.data instead of asset_group_data
+        # since it only includes assets from a given split.
+        asset_types_in_group = set(
+            asset_type
+            for asset in asset_group_generator.data["assetMetadata"].values()
+            for asset_type, asset_id in asset["assetIds"]
+        )
+        group_data = {
+            "assetGroupName": asset_group_name,
+            "assetGroupGenerator": asset_group_generator,
+            "xSize": dims["x"],
+            "ySize": dims["y"],
+            "zSize": dims["z"],
+            "inBathrooms": group_properties["roomWeights"]["bathrooms"],
+            "inBedrooms": group_properties["roomWeights"]["bedrooms"],
+            "inKitchens": group_properties["roomWeights"]["kitchens"],
+            "inLivingRooms": group_properties["roomWeights"]["livingRooms"],
+            "allowDuplicates": group_properties["properties"]["allowDuplicates"],
+            "inCorner": group_properties["location"]["corner"],
+            "onEdge": group_properties["location"]["edge"],
+            "inMiddle": group_properties["location"]["middle"],
+        }
+
+        # NOTE: Add which types are in this asset group
+        for asset_type in odb.OBJECT_DICT.keys():
+            group_data[f"has{asset_type}"] = asset_type in asset_types_in_group
+
+        rows.append(group_data)
+    return rows
+
+
+def _get_data_fingerprint() -> str:
+    """Changes when the data files are changed, e.g. by import_external_object."""
+    data_path = get_data_path()
+    asset_group_path = os.path.join(data_path, "asset_groups")
+    files = ["addressables.json", "object_dict.json", "object_name_to_type.json", "placement_annotations.csv", "my_objects.json", "receptacle.json"]
+    files += [os.path.join("asset_groups", file) for file in sorted(os.listdir(asset_group_path))]
+    fingerprint = hashlib.md5()
+    for file in files:
+        stat = os.stat(os.path.join(data_path, file))
+        fingerprint.update(f"{file}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return fingerprint.hexdigest()
+
+
+def _get_spawnable_asset_group_info(odb: ObjectDB):
+    import pandas as pd
+    from .asset_groups import AssetGroupGenerator
+
+    cache_path = None
+    if odb.cache_dir is not None:
+        # NOTE: v2: the dimensions are sampled with a generator seeded by the asset group name
+        cache_path = os.path.join(odb.cache_dir, f"spawnable_asset_groups_v2_{_get_data_fingerprint()}.pkl")
+        if os.path.exists(cache_path):
+            with open(cache_path, "rb") as f:
+                rows = pickle.load(f)
+            # The generators are not pickled (they refer to the ObjectDB). Rebuild them with the cached dimensions.
+            for row in rows:
+                generator = AssetGroupGenerator(name=row["assetGroupName"], data=odb.ASSET_GROUPS[row["assetGroupName"]], odb=odb)
+                generator.cache["dimensions"] = row.pop("dimensions")
+                row["assetGroupGenerator"] = generator
+            return pd.DataFrame(rows)
+
+    rows = _get_spawnable_asset_group_rows(odb)
+    if cache_path is not None:
+        cached_rows = []
+        for row in rows:
+            row = dict(row)
+            row["dimensions"] = row.pop("assetGroupGenerator").dimensions
+            cached_rows.append(row)
+        try:
+            os.makedirs(odb.cache_dir, exist_ok=True)
+            with open(f"{cache_path}.{os.getpid()}.tmp", "wb") as f:
+                pickle.dump(cached_rows, f)
+            os.replace(f"{cache_path}.{os.getpid()}.tmp", cache_path)
+        except OSError:
+            pass  # The disk cache is optional, e.g. the data folder may be read-only.
+    return pd.DataFrame(rows)
+
+
+def get_cache_path():
+    return os.path.join(get_data_path(), "cache")
+
+
+def clear_cache() -> None:
+    """Drop the default ObjectDB and the tables cached on disk. Call it after the data files are changed."""
+    global DEFAULT_OBJECT_DB
+    DEFAULT_OBJECT_DB = None
+    shutil.rmtree(get_cache_path(), ignore_errors=True)
+
+
 def _get_receptacles():
     filepath = os.path.join(get_data_path(), "receptacle.json")
     return json.load(open(filepath))
 
 
+def _get_tables() -> Dict[str, Any]:
+    """Read the SNAPSHOT_TABLES from the data files."""
+    prefabs, kinetic_and_interactable_info = _get_prefabs()
+    return {
+        "PLACEMENT_ANNOTATIONS": _get_place_annotations(),
+        "OBJECT_DICT": _get_object_dict(),
+        "MY_OBJECTS": _get_my_objects(),
+        "OBJECT_TO_TYPE": _get_object_to_type(),
+        "PREFABS": prefabs,
+        "RECEPTACLES": _get_receptacles(),
+        "KINETIC_AND_INTERACTABLE_INFO": kinetic_and_interactable_info,
+        "ASSET_GROUPS": _get_asset_groups(),
+    }
+
+
+def get_object_db_snapshot_path(version: str) -> str:
+    return os.path.join(get_cache_path(), f"object_db_v{OBJECT_DB_SNAPSHOT_VERSION}_{version}.snapshot")
+
+
+def save_object_db_snapshot(tables: Dict[str, Any], path: str) -> None:
+    """Store the tables in a snapshot file: a header, the pickled index of the tables, and each table pickled separately, so that
+    a table is only unpickled when it is used."""
+    blobs = {name: pickle.dumps(table, protocol=pickle.HIGHEST_PROTOCOL) for name, table in tables.items()}
+    index, offset = {}, 0
+    for name, blob in blobs.items():
+        index[name] = (offset, len(blob))
+        offset += len(blob)
+    index_blob = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, OBJECT_DB_SNAPSHOT_VERSION, len(index_blob)))
+        f.write(index_blob)
+        for blob in blobs.values():
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+
+def load_object_db_snapshot(path: str) -> Dict[str, Callable[[], Any]]:
+    """Memory-map a snapshot file and return a loader of each of its tables, for ObjectDB(table_loaders=...).
+
+    The file stays mapped while a loader refers to it. The pages of the mapping are shared by all the processes that load the
+    snapshot, and a loaded ObjectDB is shared copy-on-write by the processes forked after it is loaded.
+    """
+    with open(path, "rb") as f:
+        snapshot = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, index_size = SNAPSHOT_HEADER.unpack_from(snapshot)
+    if magic != SNAPSHOT_MAGIC or version != OBJECT_DB_SNAPSHOT_VERSION:
+        raise ValueError(f"{path} is not an ObjectDB snapshot of version {OBJECT_DB_SNAPSHOT_VERSION}")
+    start = SNAPSHOT_HEADER.size + index_size
+    index = pickle.loads(snapshot[SNAPSHOT_HEADER.size : start])
+
+    def loader(offset, size):
+        return lambda: pickle.loads(snapshot[start + offset : start + offset + size])
+
+    return {name: loader(offset, size) for name, (offset, size) in index.items()}
+
+
+def _get_default_tables(version: str) -> Tuple[Dict[str, Any], Dict[str, Callable[[], Any]]]:
+    """The tables of the default ObjectDB, and the loaders of the tables read from the snapshot of the version if it exists.
+    Otherwise the tables are read from the data files and the snapshot is written."""
+    path = get_object_db_snapshot_path(version)
+    try:
+        table_loaders = load_object_db_snapshot(path)
+        if set(table_loaders) == set(SNAPSHOT_TABLES):
+            return {name: None for name in SNAPSHOT_TABLES}, table_loaders
+    except (OSError, ValueError, pickle.UnpicklingError, EOFError, struct.error):
+        pass  # No snapshot yet, or an unreadable one, which is replaced.
+
+    tables = _get_tables()
+    try:
+        save_object_db_snapshot(tables, path)
+        # The snapshots of the previous data files are not used anymore.
+        for old_path in glob.glob(os.path.join(get_cache_path(), "object_db_v*.snapshot")):
+            if old_path != path:
+                os.remove(old_path)
+    except OSError:
+        pass  # The disk cache is optional, e.g. the data folder may be read-only.
+    return tables, {}
+
+
 DEFAULT_OBJECT_DB = None
 def get_default_object_db():
+    """The ObjectDB of the environment data. Its tables are read from a snapshot in the cache folder, which is rebuilt from the data
+    files when they change (see _get_data_fingerprint), and each table is only unpickled when it is used."""
     global DEFAULT_OBJECT_DB
     if DEFAULT_OBJECT_DB is None:
+        version = _get_data_fingerprint()
+        tables, table_loaders = _get_default_tables(version)
         DEFAULT_OBJECT_DB = ObjectDB(
-            PLACEMENT_ANNOTATIONS=_get_place_annotations(),
-            OBJECT_DICT=_get_object_dict(),
-            MY_OBJECTS=_get_my_objects(),
-            OBJECT_TO_TYPE=_get_object_to_type(),
-            PREFABS=_get_prefabs()[0],
-            RECEPTACLES=_get_receptacles(),
-            KINETIC_AND_INTERACTABLE_INFO=_get_prefabs()[1],
-            ASSET_GROUPS=_get_asset_groups(),
+            **tables,
             FLOOR_ASSET_DICT=keydefaultdict(_get_default_floor_assets_from_key),
             PRIORITY_ASSET_TYPES={
                 "Bedroom": ["bed", "pc_table"],
@@ -153,5 +425,8 @@ def get_default_object_db():
                 "Kitchen": ["kitchen_table", "refrigerator","oven"],
                 "Bathroom": ["toilet","washing_machine"],
             },
+            cache_dir=get_cache_path(),
+            version=version,
+            table_loaders=table_loaders,
         )
     return DEFAULT_OBJECT_DB
@@ -28,6 +28,7 @@ from legent.scene_generation.constants import (
     P_LARGEST_RECTANGLE,
     PADDING_AGAINST_WALL,
 )
+from legent.scene_generation.free_space import GridFreeSpace
 from legent.scene_generation.objects import ObjectDB
 
 from .asset_groups import Asset, AssetGroup, AssetGroupGenerator
@@ -169,12 +170,13 @@ class OrthogonalPolygon:
         # return set(out)
 
     def random_cover_rectangles(
-        self, rects: Set[Tuple[float, float, float, float]]
+        self, rects: Set[Tuple[float, float, float, float]], rng: Optional[random.Random] = None
     ) -> Set[Tuple[float, float, float, float]]:
+        rng = random if rng is None else rng
         orig_rects = rects.copy()
         curr_rects = rects.copy()
         out = []
-        curr_rect = random.choice(list(orig_rects))
+        curr_rect = rng.choice(list(orig_rects))
         curr_rects = curr_rects - {curr_rect}
         while True:
             x0_0, z0_0, x1_0, z1_0 = curr_rect
@@ -199,15 +201,15 @@ class OrthogonalPolygon:
                 out.append(curr_rect)
                 if not curr_rects:
                     break
-                curr_rect = random.choice(list(curr_rects))
+                curr_rect = rng.choice(list(curr_rects))
                 curr_rects = curr_rects - {curr_rect}
         return set(out) | orig_rects
 
-    def get_all_rectangles(self) -> Set[Tuple[float, float, float, float]]:
+    def get_all_rectangles(self, rng: Optional[random.Random] = None) -> Set[Tuple[float, float, float, float]]:
         start_time = time.time()
         neighboring_rectangles = self.get_neighboring_rectangles().copy()
         curr_rects = neighboring_rectangles
-        all_rects = self.random_cover_rectangles(curr_rects)
+        all_rects = self.random_cover_rectangles(curr_rects, rng)
         return all_rects
 
     @staticmethod
@@ -380,9 +382,28 @@ class Room:
         room_type: Literal["Kitchen", "LivingRoom", "Bedroom", "Bathroom"],
         room_id: int,
         odb: ObjectDB,
+        free_space: Literal["polygon", "grid"] = "polygon",
+        rng: Optional[random.Random] = None,
     ) -> None:
+        """
+        Args:
+            free_space (Literal["polygon", "grid"], optional): How the open (not occupied) area of the room is kept.
+                "polygon" subtracts the assets from a shapely polygon (OrthogonalPolygon). "grid" marks them on an occupancy
+                bitmap (GridFreeSpace), which is faster and samples from the maximal free rectangles. Defaults to "polygon".
+            rng (Optional[random.Random], optional): The random generator of the placements in the room. Defaults to None
+                (the global random module).
+        """
+        if free_space not in {"polygon", "grid"}:
+            raise ValueError(f'free_space must be "polygon" or "grid". Got {free_space}.')
+        self.free_space = free_space
+        self.rng = random if rng is None else rng
         self.room_polygon = OrthogonalPolygon(polygon=copy.deepcopy(polygon))
-        self.open_polygon = OrthogonalPolygon(polygon=copy.deepcopy(polygon))
+        if free_space == "grid":
+            self.open_polygon = None
+            self.open_grid = GridFreeSpace(polygon.exterior.coords[:-1])
+        else:
+            self.open_polygon = OrthogonalPolygon(polygon=copy.deepcopy(polygon))
+            self.open_grid = None
         self.room_type = room_type
         self.room_id = room_id
         self.odb = odb
@@ -392,26 +413,29 @@ class Room:
 
     @staticmethod
     def sample_rotation(
-        asset: Dict[str, Any], rect_x_length: float, rect_z_length: float
+        asset: Dict[str, Any], rect_x_length: float, rect_z_length: float, rng: Optional[random.Random] = None
     ) -> bool:
         valid_rotated = []
         if asset["xSize"] < rect_x_length and asset["zSize"] < rect_z_length:
             valid_rotated.append(False)
         if asset["xSize"] < rect_z_length and asset["zSize"] < rect_x_length:
             valid_rotated.append(True)
-        return random.choice(valid_rotated)
+        return (random if rng is None else rng).choice(valid_rotated)
 
     def sample_next_rectangle(
         self, choose_largest_rectangle: bool = False, cache_rectangles: bool = False
     ):
         start_time = time.time()
-        rectangles = self.open_polygon.get_all_rectangles()
+        if self.open_grid is not None:
+            rectangles = self.open_grid.get_all_rectangles()
+        else:
+            rectangles = self.open_polygon.get_all_rectangles(self.rng)
         self.last_rectangles = rectangles
         end_time = time.time()
         if len(rectangles) == 0:
             return None
 
-        if choose_largest_rectangle or random.random() < P_LARGEST_RECTANGLE:
+        if choose_largest_rectangle or self.rng.random() < P_LARGEST_RECTANGLE:
             # NOTE: p(epsilon) = choose largest area
             max_area = 0
             out: Optional[Tuple[float, float, float, float]] = None
@@ -441,7 +465,7 @@ class Room:
         if not weights:
             return None
         end_time = time.time()
-        return random.choices(population=population, weights=weights, k=1)[0]
+        return self.rng.choices(population=population, weights=weights, k=1)[0]
 
     def sample_anchor_location(
         self,
@@ -485,14 +509,19 @@ class Room:
 
         # Place the object in a corner of the room
         rect_corners = [(x0, z0, 2), (x0, z1, 8), (x1, z1, 6), (x1, z0, 0)]
-        random.shuffle(rect_corners)
+        self.rng.shuffle(rect_corners)
         epsilon = 1e-3
+        is_point_inside = (
+            self.open_grid.is_point_inside
+            if self.open_grid is not None
+            else self.room_polygon.is_point_inside
+        )
         corners = []
         for x, z, anchor_delta in rect_corners:
-            q1 = self.room_polygon.is_point_inside((x + epsilon, z + epsilon))
-            q2 = self.room_polygon.is_point_inside((x - epsilon, z + epsilon))
-            q3 = self.room_polygon.is_point_inside((x - epsilon, z - epsilon))
-            q4 = self.room_polygon.is_point_inside((x + epsilon, z - epsilon))
+            q1 = is_point_inside((x + epsilon, z + epsilon))
+            q2 = is_point_inside((x - epsilon, z + epsilon))
+            q3 = is_point_inside((x - epsilon, z - epsilon))
+            q4 = is_point_inside((x + epsilon, z - epsilon))
             if (q1 and q3 and not q2 and not q4) or (q2 and q4 and not q1 and not q3):
                 # DiagCorner
                 corners.append((x, z, anchor_delta, "inCorner"))
@@ -504,32 +533,36 @@ class Room:
             ):
                 corners.append((x, z, anchor_delta, "inCorner"))
         if corners:
-            return random.choice(corners)
+            return self.rng.choice(corners)
 
         # Place the object on an edge of the room
         edges = []
         rect_edge_lines = [
-            (LineString([(x0, z0), (x1, z0)]), 1),
-            (LineString([(x0, z0), (x0, z1)]), 5),
-            (LineString([(x1, z0), (x1, z1)]), 3),
-            (LineString([(x0, z1), (x1, z1)]), 7),
+            (((x0, z0), (x1, z0)), 1),
+            (((x0, z0), (x0, z1)), 5),
+            (((x1, z0), (x1, z1)), 3),
+            (((x0, z1), (x1, z1)), 7),
         ]
-        random.shuffle(rect_edge_lines)
-        room_outer_lines = LineString(self.room_polygon.polygon.exterior.coords)
+        self.rng.shuffle(rect_edge_lines)
+        if self.open_grid is not None:
+            is_on_room_edge = lambda line: self.open_grid.is_on_boundary(*line)
+        else:
+            room_outer_lines = LineString(self.room_polygon.polygon.exterior.coords)
+            is_on_room_edge = lambda line: room_outer_lines.contains(LineString(line))
         for rect_edge_line, anchor_delta in rect_edge_lines:
-            if room_outer_lines.contains(rect_edge_line):
-                xs = [p[0] for p in rect_edge_line.coords]
-                zs = [p[1] for p in rect_edge_line.coords]
+            if is_on_room_edge(rect_edge_line):
+                xs = [p[0] for p in rect_edge_line]
+                zs = [p[1] for p in rect_edge_line]
                 edges.append((xs, zs, anchor_delta, "onEdge"))
-        if edges and random.random() < P_CHOOSE_EDGE:
-            return random.choice(edges)
+        if edges and self.rng.random() < P_CHOOSE_EDGE:
+            return self.rng.choice(edges)
 
         # Place an object in the middle of the room
         return (None, None, 4, "inMiddle")
 
     def place_asset_group(
         self,
-        asset_group, # pd.DataFrame
+        asset_group: Dict[str, Any],  # a row of FloorAssetCatalog.group_records
         set_rotated: Optional[bool],
         rect_x_length: float,
         rect_z_length: float,
@@ -538,39 +571,36 @@ class Room:
 
         Returns None if the asset group collides on each attempt (very unlikely).
         """
-        asset_group_generator: AssetGroupGenerator = asset_group[
-            "assetGroupGenerator"
-        ].iloc[0]
+        asset_group_generator: AssetGroupGenerator = asset_group["assetGroupGenerator"]
 
         for _ in range(MAX_INTERSECTING_OBJECT_RETRIES):
-            object_placement = asset_group_generator.sample_object_placement()
+            object_placement = asset_group_generator.sample_object_placement(rng=self.rng)
 
             return ChosenAssetGroup(
-                assetGroupName=asset_group["assetGroupName"].iloc[0],
+                assetGroupName=asset_group["assetGroupName"],
                 xSize=object_placement["bounds"]["x"]["length"],
                 ySize=object_placement["bounds"]["y"]["length"],
                 zSize=object_placement["bounds"]["z"]["length"],
                 rotated=set_rotated,
                 objects=object_placement["objects"],
                 bounds=object_placement["bounds"],
-                allowDuplicates=asset_group["allowDuplicates"].iloc[0],
+                allowDuplicates=asset_group["allowDuplicates"],
             )
 
     def place_asset(
         self,
-        asset, # pd.DataFrame
+        asset: Dict[str, Any],  # a row of FloorAssetCatalog.asset_records
         set_rotated: Optional[bool],
         rect_x_length: float,
         rect_z_length: float,
     ) -> ChosenAsset:
-        # NOTE: convert the pd dataframe to a dict
-        asset.reset_index(drop=False, inplace=True)
-        asset = asset.to_dict(orient="records")[0]
+        # NOTE: copy the row, since the chosen rotation is added to it
+        asset = dict(asset)
 
         # NOTE: Choose the rotation if both were valid.
         if set_rotated is None:
             set_rotated = Room.sample_rotation(
-                asset=asset, rect_x_length=rect_x_length, rect_z_length=rect_z_length
+                asset=asset, rect_x_length=rect_x_length, rect_z_length=rect_z_length, rng=self.rng
             )
         asset["rotated"] = set_rotated
 
@@ -608,7 +638,7 @@ class Room:
                 x0, x1 = xs
                 x_length = x1 - x0
                 full_rand_dist = x_length - bb["x"]
-                rand_dist = random.random() * full_rand_dist
+                rand_dist = self.rng.random() * full_rand_dist
                 x = x0 + rand_dist + bb["x"] / 2
                 z = sum(zs) / 2
                 rotation = 180 if anchor_delta == 7 else 0
@@ -617,7 +647,7 @@ class Room:
                 z0, z1 = zs
                 z_length = z1 - z0
                 full_rand_dist = z_length - bb["z"]
-                rand_dist = random.random() * full_rand_dist
+                rand_dist = self.rng.random() * full_rand_dist
                 x = sum(xs) / 2
                 z = z0 + rand_dist + bb["z"] / 2
                 rotation = 90 if anchor_delta == 5 else 270
@@ -628,11 +658,11 @@ class Room:
             z_length = z1 - z0
             full_x_rand_dist = x_length - bb["x"]
             full_z_rand_dist = z_length - bb["z"]
-            rand_x_dist = random.random() * full_x_rand_dist
-            rand_z_dist = random.random() * full_z_rand_dist
+            rand_x_dist = self.rng.random() * full_x_rand_dist
+            rand_z_dist = self.rng.random() * full_z_rand_dist
             x = x0 + rand_x_dist + bb["x"] / 2
             z = z0 + rand_z_dist + bb["z"] / 2
-            rotation = random.choice([90, 270] if asset["rotated"] else [0, 180])
+            rotation = self.rng.choice([90, 270] if asset["rotated"] else [0, 180])
 
         top_down_poly = OrthogonalPolygon.get_top_down_poly(
             anchor_location=(x, z),
@@ -720,4 +750,9 @@ class Room:
         Assumes that the asset can be placed
         """
         self.assets.append(asset)
-        self.open_polygon.subtract(Polygon(asset.top_down_poly_with_margin))
+        if self.open_grid is not None:
+            xs = [p[0] for p in asset.top_down_poly_with_margin]
+            zs = [p[1] for p in asset.top_down_poly_with_margin]
+            self.open_grid.subtract_rectangle((min(xs), min(zs), max(xs), max(zs)))
+        else:
+            self.open_polygon.subtract(Polygon(asset.top_down_poly_with_margin))
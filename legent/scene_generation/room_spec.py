@@ -78,8 +78,8 @@ class RoomSpec:
     sampling_weight: float = field()
     spec: List[Union[LeafRoom, MetaRoom]]
 
-    dims: Optional[Callable[[], Tuple[int, int]]] = None
-    """The (x_size, z_size) dimensions of the house.
+    dims: Optional[Callable[..., Tuple[int, int]]] = None
+    """The (x_size, z_size) dimensions of the house, sampled with an optional random.Random.
 
     Note that this size will later be scaled up by interior_boundary_scale.
     """
@@ -165,16 +165,17 @@ class RoomSpecSampler:
     def __getitem__(self, room_spec_id: str) -> RoomSpec:
         return self.room_spec_map[room_spec_id]
 
-    def sample(self, k: int = 1) -> Union[RoomSpec, List[RoomSpec]]:
-        """Return a RoomSpec with weighted sampling."""
-        sample = random.choices(self.room_specs, weights=self.weights, k=k)
+    def sample(self, k: int = 1, rng: Optional[random.Random] = None) -> Union[RoomSpec, List[RoomSpec]]:
+        """Return a RoomSpec with weighted sampling, with rng (defaults to the global random module)."""
+        rng = random if rng is None else rng
+        sample = rng.choices(self.room_specs, weights=self.weights, k=k)
         return sample[0] if k == 1 else sample
 
 
 ROOM_SPEC_SAMPLER = RoomSpecSampler(
     [
         RoomSpec(
-            dims=lambda: (random.randint(13, 16), random.randint(5, 8)),
+            dims=lambda rng=random: (rng.randint(13, 16), rng.randint(5, 8)),
             room_spec_id="8-room-3-bed",
             sampling_weight=1,
             spec=[
@@ -1,11 +1,11 @@
 import copy
-import json
 import random
 from collections import defaultdict
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 
+from legent.scene_generation.artifacts import ArtifactSink, get_default_artifact_sink
 from legent.scene_generation.objects import ObjectDB
 from legent.scene_generation.room import Room
 from legent.server.rect_placer import RectPlacer
@@ -14,7 +14,9 @@ from legent.server.rect_placer import RectPlacer
 
 MAX_OBJECT_NUM_ON_RECEPTACLE = 3
 
-MAX_PLACE_ON_SURFACE_RETRIES = 10
+PLACE_ON_SURFACE_CANDIDATES = 32
+"""The number of positions drawn at once for a small object on a surface. The first one that does not overlap the placed
+small objects is used."""
 
 SMALL_OBJECT_MIN_MARGIN = 0.1
 
@@ -35,6 +37,58 @@ def prefab_fit_surface(prefab_size, surface, receptacle):
     return False
 
 
+def surface_placer(placers: Dict[Tuple, RectPlacer], receptacle: Dict[str, Any], surface_index: int, surface_rect) -> RectPlacer:
+    """The placer of the small objects of a surface (see ObjectDB.get_surface_rects) of a receptacle instance.
+
+    The placers are kept in placers, keyed by the receptacle instance (its prefab, position and rotation) and the surface, so
+    that all the small objects placed on a surface, whichever branch of add_small_objects places them, see each other.
+    """
+    position = receptacle["position"]
+    key = (receptacle["prefab"], tuple(position), receptacle["rotation"][1], surface_index)
+    if key not in placers:
+        x_min, x_max, z_min, z_max, _ = surface_rect
+        placers[key] = RectPlacer((x_min + position[0], z_min + position[2], x_max + position[0], z_max + position[2]))
+    return placers[key]
+
+
+def place_on_surface(placer: RectPlacer, name: str, receptacle: Dict[str, Any], surface_rect, prefab_size: Dict[str, float], np_rng) -> Optional[Tuple[float, float, float]]:
+    """Place a small object of prefab_size on a surface of a receptacle instance: draw PLACE_ON_SURFACE_CANDIDATES positions
+    on the surface at once and use the first one where the object (with its margins) does not overlap the objects of the
+    surface.
+
+    Each surface has its own placer. A small object lies within its surface, so it can only overlap the objects of the same
+    surface, and the surfaces that share a footprint (e.g. the levels of a shelf) do not block each other.
+
+    Args:
+        placer (RectPlacer): The placer of the surface.
+        name (str): The name of the small object in the placer.
+        receptacle (Dict[str, Any]): The receptacle instance.
+        surface_rect: The (x_min, x_max, z_min, z_max, y) of the surface, see ObjectDB.get_surface_rects.
+        prefab_size (Dict[str, float]): The size of the small object.
+        np_rng: The np.random.RandomState (or np.random) to draw the positions.
+
+    Returns:
+        Optional[Tuple[float, float, float]]: The position of the small object, None if it could not be placed.
+    """
+    x_min, x_max, z_min, z_max, y = surface_rect
+    half_x = prefab_size["x"] / 2 + SMALL_OBJECT_MIN_MARGIN
+    half_z = prefab_size["z"] / 2 + SMALL_OBJECT_MIN_MARGIN
+    position = receptacle["position"]
+    x_min, x_max = x_min + position[0] + half_x, x_max + position[0] - half_x
+    z_min, z_max = z_min + position[2] + half_z, z_max + position[2] - half_z
+
+    samples = np_rng.random_sample((PLACE_ON_SURFACE_CANDIDATES, 2))
+    centers = np.array((x_min, z_min)) + np.array((x_max - x_min, z_max - z_min)) * samples
+    half = np.array((half_x, half_z))
+    i = placer.place_many(name, np.concatenate([centers - half, centers + half], axis=1))
+    if i is None:
+        return None
+    # The same values as np_rng.uniform(x_min, x_max) and np_rng.uniform(z_min, z_max) from the samples of candidate i.
+    x = x_min + (x_max - x_min) * float(samples[i, 0])
+    z = z_min + (z_max - z_min) * float(samples[i, 1])
+    return x, float(position[1] + y + prefab_size["y"] / 2), z
+
+
 def add_small_objects(
     objects: List[Dict[str, any]],
     odb: ObjectDB,
@@ -44,10 +98,18 @@ def add_small_objects(
     object_counts: Dict[str, int] = {},
     specified_object_instances: Dict[str, int] = {},
     receptacle_object_counts: Dict[str, int] = {},
+    rng: Optional[random.Random] = None,
+    np_rng: Optional[np.random.RandomState] = None,
+    artifact_sink: Optional[ArtifactSink] = None,
 ):
+    # rng and np_rng: the random generators of the placements. Default to the global random module and np.random.
+    # artifact_sink: where the objects that could not be placed go for debugging. Defaults to get_default_artifact_sink().
+    # placer_bbox: unused since each surface has its own RectPlacer (see surface_placer), kept for the callers.
+    rng = random if rng is None else rng
+    np_rng = np.random if np_rng is None else np_rng
 
     small_objects = []
-    placer = RectPlacer(placer_bbox)
+    placers: Dict[Tuple, RectPlacer] = {}  # the placers of the surfaces, shared by the branches
 
     objects_per_room = defaultdict(list)
     for obj in objects:
@@ -83,6 +145,9 @@ def add_small_objects(
                 failed_object_dict = {}
 
                 surfaces = odb.PREFABS[receptacle["receptacle"]["prefab"]]["placeable_surfaces"]
+                surface_rects = odb.get_surface_rects(receptacle["receptacle"]["prefab"], receptacle["receptacle"]["rotation"][1])
+                surface_placers = [surface_placer(placers, receptacle["receptacle"], i, surface_rect) for i, surface_rect in enumerate(surface_rects)]
+                surface_order = list(range(len(surfaces)))
                 for kk, vv in objects.items():
                     kk = kk.lower()
 
@@ -90,70 +155,27 @@ def add_small_objects(
 
                     log(f'placing kk: {kk} {vv} times on receptacle {receptacle["receptacle"]["prefab"]}')
                     for _ in range(vv):
-                        prefab_name = random.choice(odb.OBJECT_DICT[kk])
+                        prefab_name = rng.choice(odb.OBJECT_DICT[kk])
                         prefab = odb.PREFABS[prefab_name]
                         prefab_size = prefab["size"]
-                        random.shuffle(surfaces)
+                        rng.shuffle(surface_order)
                         success_flag = False
-                        for surface in surfaces:
-                            surface = {"surface": surface, "small_object_num": 0}
+                        for surface_index in surface_order:
+                            surface = {"surface": surfaces[surface_index], "small_object_num": 0}
                             if prefab_fit_surface(prefab_size, surface, receptacle):
-                                small_object = {}
-                                small_object["prefab"] = prefab_name
-
-                                x_min = (
-                                    (surface["surface"]["x_min"] + receptacle["receptacle"]["position"][0])
-                                    if receptacle["receptacle"]["rotation"][1] == 0 or receptacle["receptacle"]["rotation"][1] == 180
-                                    else (surface["surface"]["z_min"] + receptacle["receptacle"]["position"][0])
-                                )
-                                x_max = (
-                                    (surface["surface"]["x_max"] + receptacle["receptacle"]["position"][0])
-                                    if receptacle["receptacle"]["rotation"][1] == 0 or receptacle["receptacle"]["rotation"][1] == 180
-                                    else (surface["surface"]["z_max"] + receptacle["receptacle"]["position"][0])
-                                )
-                                z_min = (
-                                    (surface["surface"]["z_min"] + receptacle["receptacle"]["position"][2])
-                                    if receptacle["receptacle"]["rotation"][1] == 0 or receptacle["receptacle"]["rotation"][1] == 180
-                                    else (surface["surface"]["x_min"] + receptacle["receptacle"]["position"][2])
-                                )
-                                z_max = (
-                                    (surface["surface"]["z_max"] + receptacle["receptacle"]["position"][2])
-                                    if receptacle["receptacle"]["rotation"][1] == 0 or receptacle["receptacle"]["rotation"][1] == 180
-                                    else (surface["surface"]["x_max"] + receptacle["receptacle"]["position"][2])
-                                )
-
-                                x_margin = prefab_size["x"] / 2 + SMALL_OBJECT_MIN_MARGIN
-
-                                z_margin = prefab_size["z"] / 2 + SMALL_OBJECT_MIN_MARGIN
-
-                                sample_x_min = x_min + x_margin
-                                sample_x_max = x_max - x_margin
-                                sample_z_min = z_min + z_margin
-                                sample_z_max = z_max - z_margin
-
-                                for _ in range(MAX_PLACE_ON_SURFACE_RETRIES):
-                                    x, z = np.random.uniform(sample_x_min, sample_x_max), np.random.uniform(sample_z_min, sample_z_max)
-
-                                    if placer.place(
-                                        k,
-                                        x,
-                                        z,
-                                        prefab["size"]["x"] + 2 * SMALL_OBJECT_MIN_MARGIN,
-                                        prefab["size"]["z"] + 2 * SMALL_OBJECT_MIN_MARGIN,
-                                    ):
-                                        y = receptacle["receptacle"]["position"][1] + surface["surface"]["y"] + prefab_size["y"] / 2
-
-                                        small_object["position"] = (x, y, z)
-                                        small_object["type"] = "interactable"
-                                        small_object["parent"] = receptacle["receptacle"]["prefab"]
-                                        small_object["scale"] = [1, 1, 1]
-                                        small_object["rotation"] = [0, 0, 0]
-                                        small_objects.append(small_object)
-                                        surface["small_object_num"] += 1
-                                        receptacle["small_object_num"] += 1
-                                        success_flag = True
-                                        break
-                                if success_flag:
+                                position = place_on_surface(surface_placers[surface_index], prefab_name, receptacle["receptacle"], surface_rects[surface_index], prefab_size, np_rng)
+                                if position is not None:
+                                    small_object = {}
+                                    small_object["prefab"] = prefab_name
+                                    small_object["position"] = position
+                                    small_object["type"] = "interactable"
+                                    small_object["parent"] = receptacle["receptacle"]["prefab"]
+                                    small_object["scale"] = [1, 1, 1]
+                                    small_object["rotation"] = [0, 0, 0]
+                                    small_objects.append(small_object)
+                                    surface["small_object_num"] += 1
+                                    receptacle["small_object_num"] += 1
+                                    success_flag = True
                                     log(
                                         f"Small Object {kk} on {receptacle['receptacle']['prefab']}, position:{format(small_object['position'][0],'.4f')},{format(small_object['position'][2],'.4f')}",
                                     )
@@ -162,8 +184,7 @@ def add_small_objects(
                             failed_object_dict[kk] += 1
                 failed_objects[k].append(failed_object_dict)
 
-    with open("failed_objects.json", "w") as f:
-        json.dump(failed_objects, f, indent=4, ensure_ascii=False)
+    (artifact_sink or get_default_artifact_sink()).put("failed_objects", failed_objects)
 
     # TODO: merge the following code with "if receptable_object_counts" branch
     if object_counts:
@@ -179,120 +200,40 @@ def add_small_objects(
                 ]
                 if not placeable_surfaces:
                     continue
-                for surface in placeable_surfaces:
+                surface_rects = odb.get_surface_rects(receptacle["prefab"], receptacle["rotation"][1])
+                for surface_index, (surface, surface_rect) in enumerate(zip(placeable_surfaces, surface_rects)):
                     surfaces.append(
                         {
                             "receptacle": receptacle,
                             "surface": surface,
+                            "rect": surface_rect,
+                            "placer": surface_placer(placers, receptacle, surface_index, surface_rect),
                             "small_object_num": 0,
                         }
                     )
 
         for k, v in object_counts.items():
             for _ in range(v):
-                random.shuffle(surfaces)
+                rng.shuffle(surfaces)
                 prefab = odb.PREFABS[k]
                 success_flag = False
                 for surface in surfaces:
                     receptacle = surface
                     if prefab_fit_surface(prefab["size"], surface, receptacle):
-                        small_object = {}
-                        small_object["prefab"] = k
-
-                        x_min = (
-                            (
-                                surface["surface"]["x_min"]
-                                + receptacle["receptacle"]["position"][0]
-                            )
-                            if receptacle["receptacle"]["rotation"][1] == 0
-                            or receptacle["receptacle"]["rotation"][1] == 180
-                            else (
-                                surface["surface"]["z_min"]
-                                + receptacle["receptacle"]["position"][0]
-                            )
-                        )
-                        x_max = (
-                            (
-                                surface["surface"]["x_max"]
-                                + receptacle["receptacle"]["position"][0]
-                            )
-                            if receptacle["receptacle"]["rotation"][1] == 0
-                            or receptacle["receptacle"]["rotation"][1] == 180
-                            else (
-                                surface["surface"]["z_max"]
-                                + receptacle["receptacle"]["position"][0]
-                            )
-                        )
-                        z_min = (
-                            (
-                                surface["surface"]["z_min"]
-                                + receptacle["receptacle"]["position"][2]
-                            )
-                            if receptacle["receptacle"]["rotation"][1] == 0
-                            or receptacle["receptacle"]["rotation"][1] == 180
-                            else (
-                                surface["surface"]["x_min"]
-                                + receptacle["receptacle"]["position"][2]
-                            )
-                        )
-                        z_max = (
-                            (
-                                surface["surface"]["z_max"]
-                                + receptacle["receptacle"]["position"][2]
-                            )
-                            if receptacle["receptacle"]["rotation"][1] == 0
-                            or receptacle["receptacle"]["rotation"][1] == 180
-                            else (
-                                surface["surface"]["x_max"]
-                                + receptacle["receptacle"]["position"][2]
-                            )
-                        )
-
-                        x_margin = prefab["size"]["x"] / 2 + SMALL_OBJECT_MIN_MARGIN
-
-                        z_margin = prefab["size"]["z"] / 2 + SMALL_OBJECT_MIN_MARGIN
-
-                        sample_x_min = x_min + x_margin
-                        sample_x_max = x_max - x_margin
-                        sample_z_min = z_min + z_margin
-                        sample_z_max = z_max - z_margin
-
-                        for _ in range(MAX_PLACE_ON_SURFACE_RETRIES):
-                            x, z = np.random.uniform(
-                                sample_x_min, sample_x_max
-                            ), np.random.uniform(sample_z_min, sample_z_max)
-
-                            if placer.place(
-                                k,
-                                x,
-                                z,
-                                prefab["size"]["x"] + 2 * SMALL_OBJECT_MIN_MARGIN,
-                                prefab["size"]["z"] + 2 * SMALL_OBJECT_MIN_MARGIN,
-                            ):
-                                y = (
-                                    receptacle["receptacle"]["position"][1]
-                                    + surface["surface"]["y"]
-                                    + odb.PREFABS[k]["size"]["y"] / 2
-                                )
-
-                                small_object["position"] = (x, y, z)
-                                small_object["type"] = "interactable"
-                                # small_object["type"] = "kinematic"
-                                small_object["parent"] = receptacle["receptacle"][
-                                    "prefab"
-                                ]
-                                small_object["scale"] = [1, 1, 1]
-                                small_object["rotation"] = [0, 0, 0]
-                                small_objects.append(small_object)
-                                surface["small_object_num"] += 1
-                                receptacle["small_object_num"] += 1
-                                success_flag = True
-                                break
-                        if success_flag:
-                            # log(
-                            #     f"Small Object {k} on {receptacle['receptacle']['prefab']}, position:{format(small_object['position'][0],'.4f')},{format(small_object['position'][2],'.4f')}",
-                            # )
-                            
+                        position = place_on_surface(surface["placer"], k, receptacle["receptacle"], surface["rect"], prefab["size"], np_rng)
+                        if position is not None:
+                            small_object = {}
+                            small_object["prefab"] = k
+                            small_object["position"] = position
+                            small_object["type"] = "interactable"
+                            # small_object["type"] = "kinematic"
+                            small_object["parent"] = receptacle["receptacle"]["prefab"]
+                            small_object["scale"] = [1, 1, 1]
+                            small_object["rotation"] = [0, 0, 0]
+                            small_objects.append(small_object)
+                            surface["small_object_num"] += 1
+                            receptacle["small_object_num"] += 1
+                            success_flag = True
                             break
                 if not success_flag:
                     print(f"Failed to place object {k}")
@@ -324,11 +265,14 @@ def add_small_objects(
                 "surfaces": [],
                 "small_object_num": 0,
             }
-            for surface in placeable_surfaces:
+            surface_rects = odb.get_surface_rects(receptacle["prefab"], receptacle["rotation"][1])
+            for surface_index, (surface, surface_rect) in enumerate(zip(placeable_surfaces, surface_rects)):
 
                 receptacle_dict[receptacle_index]["surfaces"].append(
                     {
                         "surface": surface,
+                        "rect": surface_rect,
+                        "placer": surface_placer(placers, receptacle, surface_index, surface_rect),
                         "small_object_num": 0,
                     }
                 )
@@ -353,7 +297,7 @@ def add_small_objects(
                 )
 
         spawnable_groups = spawnable_objects
-        random.shuffle(spawnable_groups)
+        rng.shuffle(spawnable_groups)
         objects_types_placed_in_room = set()
 
         for group in spawnable_groups:
@@ -366,7 +310,7 @@ def add_small_objects(
             asset_candidates = odb.OBJECT_DICT[group["childObjectType"]]
             if len(asset_candidates) == 0:
                 continue
-            chosen_asset_id = random.choice(asset_candidates)
+            chosen_asset_id = rng.choice(asset_candidates)
 
             prefab = odb.PREFABS[chosen_asset_id]
 
@@ -376,59 +320,16 @@ def add_small_objects(
             success_flag = False
             for surface in surfaces:
                 if prefab_fit_surface(prefab["size"], surface, receptacle):
-                    small_object = copy.deepcopy(group["receptacle"])
-                    small_object["prefab"] = chosen_asset_id
-
-                    x_min = (
-                        (surface["surface"]["x_min"] + receptacle["receptacle"]["position"][0])
-                        if receptacle["receptacle"]["rotation"][1] == 0 or receptacle["receptacle"]["rotation"][1] == 180
-                        else (surface["surface"]["z_min"] + receptacle["receptacle"]["position"][0])
-                    )
-                    x_max = (
-                        (surface["surface"]["x_max"] + receptacle["receptacle"]["position"][0])
-                        if receptacle["receptacle"]["rotation"][1] == 0 or receptacle["receptacle"]["rotation"][1] == 180
-                        else (surface["surface"]["z_max"] + receptacle["receptacle"]["position"][0])
-                    )
-                    z_min = (
-                        (surface["surface"]["z_min"] + receptacle["receptacle"]["position"][2])
-                        if receptacle["receptacle"]["rotation"][1] == 0 or receptacle["receptacle"]["rotation"][1] == 180
-                        else (surface["surface"]["x_min"] + receptacle["receptacle"]["position"][2])
-                    )
-                    z_max = (
-                        (surface["surface"]["z_max"] + receptacle["receptacle"]["position"][2])
-                        if receptacle["receptacle"]["rotation"][1] == 0 or receptacle["receptacle"]["rotation"][1] == 180
-                        else (surface["surface"]["x_max"] + receptacle["receptacle"]["position"][2])
-                    )
-
-                    x_margin = prefab["size"]["x"] / 2 + SMALL_OBJECT_MIN_MARGIN
-
-                    z_margin = prefab["size"]["z"] / 2 + SMALL_OBJECT_MIN_MARGIN
-
-                    sample_x_min = x_min + x_margin
-                    sample_x_max = x_max - x_margin
-                    sample_z_min = z_min + z_margin
-                    sample_z_max = z_max - z_margin
-
-                    for _ in range(MAX_PLACE_ON_SURFACE_RETRIES):
-                        x, z = np.random.uniform(sample_x_min, sample_x_max), np.random.uniform(sample_z_min, sample_z_max)
-
-                        if placer.place(
-                            chosen_asset_id,
-                            x,
-                            z,
-                            prefab["size"]["x"] + 2 * SMALL_OBJECT_MIN_MARGIN,
-                            prefab["size"]["z"] + 2 * SMALL_OBJECT_MIN_MARGIN,
-                        ):
-                            y = receptacle["receptacle"]["position"][1] + surface["surface"]["y"] + odb.PREFABS[chosen_asset_id]["size"]["y"] / 2
-
-                            small_object["position"] = (x, y, z)
-                            small_object["type"] = "interactable"
-                            small_objects.append(small_object)
-                            surface["small_object_num"] += 1
-                            receptacle["small_object_num"] += 1
-                            success_flag = True
-                            break
-                    if success_flag:
+                    position = place_on_surface(surface["placer"], chosen_asset_id, receptacle["receptacle"], surface["rect"], prefab["size"], np_rng)
+                    if position is not None:
+                        small_object = copy.deepcopy(group["receptacle"])
+                        small_object["prefab"] = chosen_asset_id
+                        small_object["position"] = position
+                        small_object["type"] = "interactable"
+                        small_objects.append(small_object)
+                        surface["small_object_num"] += 1
+                        receptacle["small_object_num"] += 1
+                        success_flag = True
                         log(
                             f"Small Object {chosen_asset_id} on {receptacle['receptacle']['prefab']}, position:{format(small_object['position'][0],'.4f')},{format(small_object['position'][2],'.4f')}",
                         )
@@ -1 +1,7 @@
-from legent.server.server import serve_scene, serve_chat
+def __getattr__(name):
+    # PEP 562: import legent.server.server, and what it imports, only when serve_scene or serve_chat is used.
+    if name in ("serve_scene", "serve_chat"):
+        from legent.server import server
+
+        return getattr(server, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
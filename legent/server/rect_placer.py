@@ -1,15 +1,110 @@
-from typing import Tuple
-from pyqtree import Index
+import math
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+GRID_MIN_RECTS = 32
+"""The number of rectangles from which a RectPlacer indexes them on a uniform grid. Below it, a query tests all of them."""
+
+PLACE_MANY_SCAN_CANDIDATES = 4
+"""The number of candidates that place_many tests one by one before it tests the others at once."""
+
+
+def _normalize(bbox) -> Tuple[float, float, float, float]:
+    return (min(bbox[0], bbox[2]), min(bbox[1], bbox[3]), max(bbox[0], bbox[2]), max(bbox[1], bbox[3]))
 
 
 class RectPlacer:
     def __init__(self, bbox: Tuple[float, float, float, float]) -> None:
         """
+        The placed rectangles are kept as tuples, for the queries of one rectangle, and as rows of an array, for the queries of
+        a batch of candidates (place_many and free_mask). Once there are GRID_MIN_RECTS of them, they are also indexed on a
+        uniform grid whose cells are about twice their median size, so that a query only tests the rectangles near it.
+        A rectangle overlaps another one if they overlap or touch.
+
         Args:
             bbox (Tuple[float, float, float, float]): (xmin, ymin, xmax, ymax)
         """
         self.bbox = bbox
-        self.spindex = Index(bbox=bbox)
+        self.names: List[Any] = []
+        self.boxes: List[Optional[Tuple[float, float, float, float]]] = []  # None for the removed rectangles
+        self.rects = np.empty((0, 4))  # the first len(self.boxes) rows are the boxes, NaN for the removed ones
+        self.cell_size: Optional[float] = None
+        self.grid: Optional[Dict[Tuple[int, int], List[int]]] = None
+
+    @property
+    def spindex(self) -> "RectPlacer":
+        """The former pyqtree index, whose insert, intersect and remove the RectPlacer provides."""
+        return self
+
+    def _cells(self, bbox: Tuple[float, float, float, float]) -> Optional[Tuple[range, range]]:
+        # The cells of a normalized bbox, None if a scan is cheaper (no grid yet, or a bbox covering many cells).
+        if self.grid is None:
+            return None
+        cell_size = self.cell_size
+        xs = range(math.floor(bbox[0] / cell_size), math.floor(bbox[2] / cell_size) + 1)
+        ys = range(math.floor(bbox[1] / cell_size), math.floor(bbox[3] / cell_size) + 1)
+        if len(xs) * len(ys) > len(self.boxes):
+            return None
+        return xs, ys
+
+    def _near(self, bbox: Tuple[float, float, float, float]) -> Iterable[int]:
+        # The indices of the rectangles that may overlap a normalized bbox.
+        cells = self._cells(bbox)
+        if cells is None:
+            return range(len(self.boxes))
+        xs, ys = cells
+        if len(xs) == 1 and len(ys) == 1:
+            return self.grid.get((xs[0], ys[0]), ())
+        near = set()
+        for i in xs:
+            for j in ys:
+                near.update(self.grid.get((i, j), ()))
+        return sorted(near)
+
+    def _overlapping(self, bbox: Tuple[float, float, float, float], first: bool = False) -> List[int]:
+        xmin, ymin, xmax, ymax = bbox
+        boxes = self.boxes
+        overlapping = []
+        for k in self._near(bbox):
+            box = boxes[k]
+            if box is not None and box[0] <= xmax and box[2] >= xmin and box[1] <= ymax and box[3] >= ymin:
+                overlapping.append(k)
+                if first:
+                    break
+        return overlapping
+
+    def _add(self, name: Any, bbox: Tuple[float, float, float, float]) -> None:
+        k = len(self.boxes)
+        if k == len(self.rects):
+            self.rects = np.concatenate([self.rects, np.empty((max(k, 16), 4))])
+        self.rects[k] = bbox
+        self.boxes.append(bbox)
+        self.names.append(name)
+        if self.grid is not None:
+            self._index(k)
+        elif k + 1 >= GRID_MIN_RECTS:
+            sizes = sorted(max(box[2] - box[0], box[3] - box[1]) for box in self.boxes if box is not None)
+            self.cell_size = max(2 * sizes[len(sizes) // 2], 1e-6)
+            self.grid = defaultdict(list)
+            for k in range(len(self.boxes)):
+                if self.boxes[k] is not None:
+                    self._index(k)
+
+    def _box_cells(self, box: Tuple[float, float, float, float]) -> Iterable[Tuple[int, int]]:
+        cell_size = self.cell_size
+        for i in range(math.floor(box[0] / cell_size), math.floor(box[2] / cell_size) + 1):
+            for j in range(math.floor(box[1] / cell_size), math.floor(box[3] / cell_size) + 1):
+                yield i, j
+
+    def _index(self, k: int) -> None:
+        for cell in self._box_cells(self.boxes[k]):
+            self.grid[cell].append(k)
+
+    def intersect(self, bbox: Tuple[float, float, float, float]) -> List[Any]:
+        """The names of the placed rectangles that overlap bbox, in the order they were placed."""
+        return [self.names[k] for k in self._overlapping(_normalize(bbox))]
 
     def place_rectangle(
         self, name: str, bbox: Tuple[float, float, float, float]
@@ -23,11 +118,11 @@ class RectPlacer:
         Returns:
             bool: whether successfully placed without overlapping
         """
-        matches = self.spindex.intersect(bbox)
-        if matches:
+        bbox = _normalize(bbox)
+        if self._overlapping(bbox, first=True):
             return False
         else:
-            self.spindex.insert(name, bbox)
+            self._add(name, bbox)
             return True
 
     def place(self, name, x, z, x_size, z_size):
@@ -47,6 +142,79 @@ class RectPlacer:
             name, (x - x_size / 2, z - z_size / 2, x + x_size / 2, z + z_size / 2)
         )
 
+    def _near_candidates(self, candidates: np.ndarray) -> Iterable[int]:
+        # NOTE: only the rectangles near the region of the candidates (e.g. a surface) are tested
+        xmin, ymin, neg_xmax, neg_ymax = (candidates * (1, 1, -1, -1)).min(axis=0).tolist()
+        return self._near((xmin, ymin, -neg_xmax, -neg_ymax))
+
+    def _free_mask(self, candidates: np.ndarray, near: Iterable[int]) -> np.ndarray:
+        rects = self.rects[: len(self.boxes)] if isinstance(near, range) else self.rects[list(near)]
+        overlaps = (rects[:, 0] <= candidates[:, 2:3]) & (rects[:, 2] >= candidates[:, 0:1]) & (rects[:, 1] <= candidates[:, 3:4]) & (rects[:, 3] >= candidates[:, 1:2])
+        return ~overlaps.any(axis=1)
+
+    def free_mask(self, candidates: np.ndarray) -> np.ndarray:
+        """Test a batch of candidate rectangles against the placed rectangles at once.
+
+        Args:
+            candidates (np.ndarray): (n, 4) array of (xmin, ymin, xmax, ymax), with xmin <= xmax and ymin <= ymax.
+
+        Returns:
+            np.ndarray: (n,) bool array, whether each candidate overlaps none of the placed rectangles. The candidates are not
+                tested against each other.
+        """
+        candidates = np.asarray(candidates, dtype=float).reshape(-1, 4)
+        if not self.boxes or not len(candidates):
+            return np.ones(len(candidates), dtype=bool)
+        return self._free_mask(candidates, self._near_candidates(candidates))
+
+    def place_many(self, name: str, candidates: np.ndarray) -> Optional[int]:
+        """Place a rectangle at the first of a batch of candidates that does not overlap the placed rectangles, like calling
+        place_rectangle on each of them until one succeeds.
+
+        The first PLACE_MANY_SCAN_CANDIDATES candidates are tested one by one, which is the cheapest when the placement is
+        easy. If they all overlap, the region is crowded and the other candidates are tested at once.
+
+        Args:
+            name (str): rectangle name
+            candidates (np.ndarray): (n, 4) array of (xmin, ymin, xmax, ymax), with xmin <= xmax and ymin <= ymax.
+
+        Returns:
+            Optional[int]: The index of the placed candidate, None if all of them overlap (nothing is placed).
+        """
+        candidates = np.asarray(candidates, dtype=float).reshape(-1, 4)
+        for i in range(min(PLACE_MANY_SCAN_CANDIDATES, len(candidates))):
+            bbox = tuple(candidates[i].tolist())
+            if not self._overlapping(bbox, first=True):
+                self._add(name, bbox)
+                return i
+        if len(candidates) <= PLACE_MANY_SCAN_CANDIDATES:
+            return None
+        rest = candidates[PLACE_MANY_SCAN_CANDIDATES:]
+        free = self._free_mask(rest, self._near_candidates(rest))
+        i = int(free.argmax())
+        if not free[i]:
+            return None
+        self._add(name, tuple(rest[i].tolist()))
+        return PLACE_MANY_SCAN_CANDIDATES + i
+
     def insert(self, name: str, bbox: Tuple[float, float, float, float]):
         """force place a rectangle into the 2d space"""
-        self.spindex.insert(name, bbox)
+        self._add(name, _normalize(bbox))
+
+    def remove(self, name: str, bbox: Optional[Tuple[float, float, float, float]] = None) -> bool:
+        """Remove the last placed rectangle of the name (and of bbox if given), e.g. to undo a placement.
+
+        Returns:
+            bool: whether a rectangle was removed
+        """
+        if bbox is not None:
+            bbox = _normalize(bbox)
+        for k in range(len(self.boxes) - 1, -1, -1):
+            if self.boxes[k] is not None and self.names[k] == name and (bbox is None or self.boxes[k] == bbox):
+                if self.grid is not None:
+                    for cell in self._box_cells(self.boxes[k]):
+                        self.grid[cell].remove(k)
+                self.boxes[k] = None
+                self.rects[k] = np.nan
+                return True
+        return False
@@ -0,0 +1,194 @@
+"""An on-disk cache of the scenes of generate_scene(seed=...).
+
+A seeded scene only depends on its generation parameters and on the data of the ObjectDB, so it is stored under a hash
+of them, and generating it again (e.g. when a dataset is collected again) reads it from the cache instead:
+
+    scene = generate_scene(room_num=2, seed=0)  # generated and stored
+    scene = generate_scene(room_num=2, seed=0)  # read from the cache
+    print(get_default_scene_cache().stats())
+
+The default cache is in the cache folder of the environment data and holds at most DEFAULT_MAX_BYTES of scenes. Use
+set_default_scene_cache to move, resize or disable it.
+"""
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+SCENE_CACHE_VERSION = 2
+"""Part of the keys. Increase it when a change of the generation changes the scenes of the seeds."""
+
+DEFAULT_MAX_BYTES = 1024**3
+
+LOW_WATER_RATIO = 0.9
+"""The eviction removes the least recently used scenes until the cache is below this ratio of max_bytes."""
+
+STALE_TMP_SECONDS = 3600
+"""Temporary files older than this were left by interrupted writes and are removed by the eviction."""
+
+
+def get_scene_key(seed: int, room_num: int, object_counts: Dict[str, int], receptacle_object_counts: Dict[str, Any], odb_version: str, **options) -> str:
+    """The key of a scene: a hash of the generation parameters, the ObjectDB version and the other options that change the scene."""
+    params = {
+        "cache_version": SCENE_CACHE_VERSION,
+        "seed": seed,
+        "room_num": room_num,
+        "object_counts": object_counts,
+        "receptacle_object_counts": receptacle_object_counts,
+        "odb_version": odb_version,
+        "options": options,
+    }
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class SceneCache:
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """A directory of scenes, one JSON file per key, with least recently used eviction.
+
+        The scenes are written to a temporary file and renamed, so that several processes can share the cache and a reader
+        never sees a partial scene. Reading a scene updates its modification time, which orders the eviction.
+
+        Args:
+            cache_dir (str): The directory of the scenes. It is created when the first scene is stored.
+            max_bytes (int, optional): The size of the scenes above which the least recently used ones are removed. Each process
+                counts the scenes it stores and scans the directory when its count passes max_bytes, so the cache may exceed it
+                by what the other processes stored since their last scan. Defaults to DEFAULT_MAX_BYTES (1 GB).
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._bytes: Optional[int] = None  # the size of the cache at the last scan plus the scenes stored since, None before the first scan
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the scene of the key, or None (a miss)."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                scene = json.loads(f.read())
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # Evicted in the meantime, or a read-only cache.
+        self.hits += 1
+        return scene
+
+    def put(self, key: str, scene: Dict) -> None:
+        """Store the scene under the key, and evict the least recently used scenes if the cache is too large."""
+        data = json.dumps(scene, ensure_ascii=False).encode("utf-8")
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return  # The cache is optional, e.g. the folder may be read-only.
+        self.stores += 1
+        if self._bytes is None:
+            self._bytes = self._scan()[1]
+        else:
+            self._bytes += len(data)
+        if self._bytes > self.max_bytes:
+            self.evict()
+
+    def _scan(self):
+        """The (modification time, size, path) of the scenes and their total size. Removes the stale temporary files."""
+        entries = []
+        total = 0
+        now = time.time()
+        try:
+            it = os.scandir(self.cache_dir)
+        except OSError:
+            return entries, total
+        with it:
+            for entry in it:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if entry.name.endswith(".json"):
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+                elif entry.name.endswith(".tmp") and now - stat.st_mtime > STALE_TMP_SECONDS:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+        return entries, total
+
+    def evict(self, max_bytes: Optional[int] = None) -> None:
+        """Remove the least recently used scenes until the cache is below LOW_WATER_RATIO of max_bytes (defaults to self.max_bytes)."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries, total = self._scan()
+        if total > max_bytes:
+            target = max_bytes * LOW_WATER_RATIO
+            entries.sort()
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    self.evictions += 1
+                except OSError:
+                    pass  # Removed by another process.
+                total -= size
+        self._bytes = total
+
+    def clear(self) -> None:
+        """Remove all the scenes."""
+        self.evict(max_bytes=-1)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns:
+            Dict[str, float]: The "hits", "misses", "stores" and "evictions" of this process, the "hit_rate", and the number of
+                "scenes" and "bytes" in the cache.
+        """
+        entries, total = self._scan()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "scenes": len(entries),
+            "bytes": total,
+        }
+
+
+_default_scene_cache: Optional[SceneCache] = None
+_default_scene_cache_set = False
+
+
+def get_default_scene_cache() -> Optional[SceneCache]:
+    """The cache used by generate_scene, None if it is disabled."""
+    global _default_scene_cache
+    if not _default_scene_cache_set and _default_scene_cache is None:
+        from legent.scene_generation.objects import get_cache_path
+
+        _default_scene_cache = SceneCache(os.path.join(get_cache_path(), "scenes"))
+    return _default_scene_cache
+
+
+def set_default_scene_cache(cache: Optional[SceneCache]) -> None:
+    """Set the cache used by generate_scene. None disables it."""
+    global _default_scene_cache, _default_scene_cache_set
+    _default_scene_cache = cache
+    _default_scene_cache_set = True
@@ -3,13 +3,16 @@ from legent.scene_generation.objects import get_default_object_db
 from legent.server.rect_placer import RectPlacer
 from legent.utils.io import load_json, log, store_json, load_json_from_toolkit
 from legent.utils.math import look_rotation
+import itertools
 import numpy as np
-import json
 import random
-from typing import Dict, Literal, Optional
+from typing import Dict, Iterator, List, Literal, Optional, Tuple
 
+from legent.scene_generation.floorplan_bank import FloorplanBank
+from legent.scene_generation.artifacts import get_default_artifact_sink
 from legent.scene_generation.generator import HouseGenerator
 from legent.scene_generation.objects import DEFAULT_OBJECT_DB, get_default_object_db
+from legent.server.scene_cache import get_default_scene_cache, get_scene_key
 from legent.scene_generation.room_spec import ROOM_SPEC_SAMPLER, RoomSpecSampler, RoomSpec, LeafRoom, MetaRoom
 from legent.scene_generation.constants import UNIT_SIZE
 
@@ -25,6 +28,7 @@ DEFAULT_WALL_PREFAB = "LowPolyInterior_WallFloor1_09"
 
 
 def set_seed(seed: int = 42) -> None:
+    random.seed(seed)
     np.random.seed(seed)
 
 
@@ -43,43 +47,77 @@ def load_prefabs() -> None:
     kinematic_names_set = set(kinematic_names)
 
 
+ROOM_TYPES = ["Bedroom", "LivingRoom", "Kitchen", "Bathroom"]
+ROOM_SIZE_RANGE = {
+    "Bedroom": (4, 6),  # min 4 units, max 6 units
+    "LivingRoom": (6, 9),
+    "Kitchen": (2, 6),
+    "Bathroom": (1, 2),
+}
+
+
+def get_room_spec(rooms: List[str], sizes: List[int]) -> RoomSpec:
+    """The room spec of generate_scene for 1 to 4 rooms: the rooms side by side, with ratios proportional to their sizes."""
+    total_size = sum(sizes)
+    return RoomSpec(
+        room_spec_id="TwoRooms",  # TwoRooms
+        sampling_weight=1,
+        spec=[LeafRoom(room_id=2 + i, ratio=sizes[i] / total_size, room_type=room) for i, room in enumerate(rooms)],
+    )
+
+
+def get_room_specs(room_num: int) -> Iterator[Tuple[RoomSpec, int]]:
+    """All the room specs that generate_scene samples for room_num (1 to 4) rooms, with their total sizes, e.g. to build a FloorplanBank."""
+    for rooms in itertools.permutations(ROOM_TYPES, room_num):
+        for sizes in itertools.product(*[range(ROOM_SIZE_RANGE[room][0], ROOM_SIZE_RANGE[room][1] + 1) for room in rooms]):
+            yield get_room_spec(list(rooms), list(sizes)), sum(sizes)
+
+
 def generate_scene(
     object_counts: Dict[str, int] = {},
     receptacle_object_counts={},
     room_num=0,
     method="proc",
+    floorplan_bank: Optional[FloorplanBank] = None,
+    merge_tiles: bool = False,
+    seed: Optional[int] = None,
+    use_cache: bool = True,
 ):
+    # seed: generate the scene with its own random generators, so that it only depends on the seed and the arguments
+    #   (the same seed gives the same scene in any process). Defaults to None (the global random and np.random).
+    # use_cache: read and store the seeded scenes in the default scene cache (see legent.server.scene_cache). Pass False to always
+    #   generate them, e.g. to check that the generation is deterministic.
+    # floorplan_bank: precomputed floorplans to sample the house structure from (see legent.scene_generation.floorplan_bank).
+    # merge_tiles: merge the floor and ceiling tiles and the walls without doors into fewer instances (see HouseGenerator).
     if method == "proc":
+        odb = get_default_object_db()
+        # NOTE: the floorplans of a bank are not part of the key, so its scenes are not cached
+        cache = get_default_scene_cache() if use_cache and seed is not None and floorplan_bank is None and odb.version is not None else None
+        if cache is not None:
+            cache_key = get_scene_key(seed, room_num, object_counts, receptacle_object_counts, odb.version, merge_tiles=merge_tiles)
+            scene = cache.get(cache_key)
+            if scene is not None:
+                return scene
+
         # object_counts specifies a definite number for certain objects
         # For example, if you want to have only one instance of ChristmasTree_01 in the scene, you can set the object_counts as {"ChristmasTree_01": 1}.
         # global prefabs, interactable_names, kinematic_names, interactable_names_set, kinematic_names_set
-        room_types = ["Bedroom", "LivingRoom", "Kitchen", "Bathroom"]
-        room_size_range = {
-            "Bedroom": (4, 6),  # min 4 units, max 6 units
-            "LivingRoom": (6, 9),
-            "Kitchen": (2, 6),
-            "Bathroom": (1, 2),
-        }
+        if seed is None:
+            rng, np_rng = random, np.random
+        else:
+            # NOTE: the legacy RandomState, whose stream is the one of np.random.seed(seed)
+            rng, np_rng = random.Random(seed), np.random.RandomState(seed)
         if room_num == 0:
-            room_num = random.randint(1, 4)
+            room_num = rng.randint(1, 4)
         if 1 <= room_num <= 4:
-            sample_rooms = random.sample(room_types, room_num)
-            sample_sizes = [random.randint(*room_size_range[room]) for room in sample_rooms]
+            sample_rooms = rng.sample(ROOM_TYPES, room_num)
+            sample_sizes = [rng.randint(*ROOM_SIZE_RANGE[room]) for room in sample_rooms]
             total_size = sum(sample_sizes)
-            sample_ratios = [size / total_size for size in sample_sizes]
-            sampler = RoomSpecSampler(
-                [
-                    RoomSpec(
-                        room_spec_id="TwoRooms",  # TwoRooms
-                        sampling_weight=1,
-                        spec=[LeafRoom(room_id=2 + i, ratio=sample_ratios[i], room_type=room) for i, room in enumerate(sample_rooms)],
-                    )
-                ]
-            )
-            room_spec = sampler.sample()
+            sampler = RoomSpecSampler([get_room_spec(sample_rooms, sample_sizes)])
+            room_spec = sampler.sample(rng=rng)
         else:
             sampler = ROOM_SPEC_SAMPLER
-            room_spec = sampler.sample()
+            room_spec = sampler.sample(rng=rng)
 
             room_num = len((room_spec.room_type_map.keys()))
             total_size = 6 * room_num
@@ -87,8 +125,8 @@ def generate_scene(
         unit_size = 2.5
 
         # get total size of the floors
-        x_size = random.randint(max(1, int(np.sqrt(total_size))), int(np.sqrt(total_size)) + 1)
-        z_size = random.randint(max(1, int(np.sqrt(total_size))), int(np.sqrt(total_size)) + 1)
+        x_size = rng.randint(max(1, int(np.sqrt(total_size))), int(np.sqrt(total_size)) + 1)
+        z_size = rng.randint(max(1, int(np.sqrt(total_size))), int(np.sqrt(total_size)) + 1)
         x_size = max(3, x_size)
         z_size = max(3, x_size)
 
@@ -97,8 +135,12 @@ def generate_scene(
         house_generator = HouseGenerator(
             room_spec=room_spec,
             dims=dims,
-            objectDB=get_default_object_db(),
+            objectDB=odb,
             unit_size=unit_size,
+            floorplan_bank=floorplan_bank,
+            merge_tiles=merge_tiles,
+            rng=rng,
+            np_rng=np_rng,
         )
 
         # receptacle_object_counts={
@@ -124,6 +166,8 @@ def generate_scene(
 
         # for instance in scene["instances"]:
         #     instance["type"] = "kinematic"
+        if cache is not None:
+            cache.put(cache_key, scene)
         return scene
     else:
         raise NotImplementedError
@@ -450,9 +494,7 @@ def generate_scene_messy(object_counts: Dict[str, int] = {}):
         "agent": agent,
         "center": center,
     }
-    # TODO: skip dump
-    with open("last_scene.json", "w", encoding="utf-8") as f:
-        json.dump(infos, f, ensure_ascii=False, indent=4)
+    get_default_artifact_sink().put("last_scene", infos)
     return infos
 
 
@@ -505,6 +547,5 @@ def complete_scene(predefined_scene):
         "center": [0, 0, 10],
     }
 
-    with open("last_scene.json", "w", encoding="utf-8") as f:
-        json.dump(infos, f, ensure_ascii=False, indent=4)
+    get_default_artifact_sink().put("last_scene", infos)
     return infos
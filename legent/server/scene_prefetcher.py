@@ -0,0 +1,151 @@
+from typing import Callable, Dict, Optional, Tuple
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+import random
+import time
+import numpy as np
+from legent.server.scene_generator import generate_scene
+
+
+def _generate_slot(generator: Callable[..., Dict], seed: int, kwargs: Dict, use_cache: bool) -> Tuple[Dict, float]:
+    # The scene of a slot only depends on its seed. generate_scene gets the seed and uses its own random generators.
+    # The other generators use the global random and np.random, which are seeded for them.
+    random.seed(seed)
+    np.random.seed(seed)
+    start = time.perf_counter()
+    if generator is generate_scene:
+        # NOTE: the same scene as seeding the global random generators (see scripts/check_seeded_scenes.py)
+        scene = generator(seed=seed, use_cache=use_cache, **kwargs)
+    else:
+        scene = generator(**kwargs)
+    return scene, time.perf_counter() - start
+
+
+class ScenePrefetcher:
+    def __init__(
+        self,
+        num_workers: int = 2,
+        queue_size: int = 4,
+        seed: Optional[int] = None,
+        room_num: int = 0,
+        object_counts: Dict[str, int] = {},
+        receptacle_object_counts: Dict[str, Dict] = {},
+        generator: Callable[..., Dict] = generate_scene,
+        use_cache: bool = True,
+        mp_context=None,
+    ) -> None:
+        """Generate scenes in background processes, so that a reset does not wait for the scene generation.
+
+            prefetcher = ScenePrefetcher(num_workers=2, queue_size=4, seed=0, room_num=2)
+            env = Environment(env_path="auto", scene_source=prefetcher)
+            obs = env.reset()  # takes a scene generated in the background
+
+        Args:
+            num_workers (int, optional): Number of generation processes. Defaults to 2.
+            queue_size (int, optional): Maximum number of scenes that are ready or being generated. Defaults to 4.
+            seed (int, optional): The i-th scene returned by get() is generated with a seed derived from (seed, i), whichever worker
+                generates it, so the sequence of scenes is reproducible. Defaults to None, which picks a random seed (see self.seed).
+            room_num (int, optional): Passed to the generator. Defaults to 0 (a random number of rooms).
+            object_counts (Dict[str, int], optional): Passed to the generator. Defaults to {}.
+            receptacle_object_counts (Dict[str, Dict], optional): Passed to the generator. Defaults to {}.
+            generator (Callable[..., Dict], optional): The scene generation function, called with the above keyword arguments in the workers.
+                It must be picklable, e.g. a module-level function. Defaults to generate_scene.
+            use_cache (bool, optional): Passed to generate_scene, which reads and stores the scenes of the slots in the default scene cache
+                (see legent.server.scene_cache). Not used by the other generators. Defaults to True.
+            mp_context (optional): The multiprocessing context of the process pool. Defaults to None (the default start method).
+
+        The worker processes belong to the process that created the prefetcher, so it cannot be passed to the workers of a VectorEnvironment.
+        """
+        if queue_size < 1:
+            raise ValueError(f"queue_size must be at least 1, got {queue_size}.")
+        self.seed: int = int(np.random.SeedSequence().entropy % 2**32) if seed is None else seed
+        self.queue_size = queue_size
+        self._generator = generator
+        self._use_cache = use_cache
+        self._kwargs = {"room_num": room_num, "object_counts": object_counts, "receptacle_object_counts": receptacle_object_counts}
+        self._executor: Optional[ProcessPoolExecutor] = ProcessPoolExecutor(max_workers=num_workers, mp_context=mp_context)
+        self._queue: deque = deque()
+        self._next_slot = 0
+
+        self._served = 0
+        self._ready_sum = 0
+        self._starved = 0
+        self._starved_seconds = 0.0
+        self._generation_seconds = 0.0
+        self._fill()
+
+    def slot_seed(self, slot: int) -> int:
+        """The seed used to generate the slot-th scene."""
+        return int(np.random.SeedSequence([self.seed, slot]).generate_state(1)[0])
+
+    def _fill(self) -> None:
+        while len(self._queue) < self.queue_size:
+            future = self._executor.submit(_generate_slot, self._generator, self.slot_seed(self._next_slot), self._kwargs, self._use_cache)
+            self._queue.append(future)
+            self._next_slot += 1
+
+    def get(self, timeout: Optional[float] = None) -> Dict:
+        """Return the next scene. It returns at once if the scene is ready, otherwise it waits for it (and counts as starved).
+
+        Raises:
+            TimeoutError: The scene is not ready after timeout seconds. It is still returned by the next get().
+        """
+        if self._executor is None:
+            raise RuntimeError("The ScenePrefetcher has been closed.")
+        future: Future = self._queue[0]
+        ready = self.queue_depth()
+        if not future.done():
+            start = time.perf_counter()
+            try:
+                future.result(timeout)
+            except TimeoutError:
+                self._starved_seconds += time.perf_counter() - start
+                raise
+            except Exception:
+                pass
+            self._starved += 1
+            self._starved_seconds += time.perf_counter() - start
+        self._queue.popleft()
+        self._fill()
+        # Raises the exception of the generator, if any. The slot is skipped.
+        scene, generation_seconds = future.result()
+        self._served += 1
+        self._ready_sum += ready
+        self._generation_seconds += generation_seconds
+        return scene
+
+    def __call__(self) -> Dict:
+        return self.get()
+
+    def queue_depth(self) -> int:
+        """Number of scenes that are ready now."""
+        return sum(future.done() for future in self._queue)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns:
+            Dict[str, float]: "served" (scenes returned by get), "queue_depth" (scenes ready now), "mean_queue_depth" (mean number of
+                ready scenes when get was called), "starved" (gets that had to wait for a scene), "starved_seconds" (total time waited)
+                and "mean_generation_seconds" (mean generation time of the served scenes, in the workers).
+        """
+        return {
+            "served": self._served,
+            "queue_depth": self.queue_depth() if self._executor is not None else 0,
+            "mean_queue_depth": self._ready_sum / self._served if self._served else 0.0,
+            "starved": self._starved,
+            "starved_seconds": self._starved_seconds,
+            "mean_generation_seconds": self._generation_seconds / self._served if self._served else 0.0,
+        }
+
+    def close(self) -> None:
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+        self._queue.clear()
+
+    def __enter__(self) -> "ScenePrefetcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
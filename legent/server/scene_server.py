@@ -1,9 +1,8 @@
-from legent.server.scene_generator import generate_scene, complete_scene
+from legent.scene_generation.artifacts import FileArtifactSink, set_default_artifact_sink
 
 from legent.environment.env_utils import get_default_env_data_path
 from legent.utils.io import log, log_green, load_json, store_json
 
-import requests
 from multiprocessing import Process
 import socket
 import os
@@ -30,9 +29,14 @@ def read_params_buffer():
 
 def serve_main():
     from flask import Flask, jsonify, request
+    from legent.server.scene_generator import generate_scene, complete_scene
+    from legent.utils.scene_codec import load_scene
 
     app = Flask(__name__)
 
+    # The only generating process of an interactive session: keep last_scene.json and failed_objects.json for debugging.
+    set_default_artifact_sink(FileArtifactSink(".", per_process=False))
+
     params = read_params_buffer()
 
     @app.route("/")
@@ -45,7 +49,7 @@ def serve_main():
                 response = config["next_scene"]
                 # del config['next_scene'] # use the same scene all the time
             elif "scenes_file" in config:
-                scene = load_json(config["scenes_file"][config["scenes_id"]])
+                scene = load_scene(config["scenes_file"][config["scenes_id"]])
                 if "prompt" in scene:
                     response = scene
                 else:
@@ -133,6 +137,8 @@ def serve_main():
 
 
 def set_scenes_dir(scene_files_dir: str = "") -> bool:
+    import requests
+
     try:
         response = requests.get(
             f"http://localhost:{PORT_FOR_CLIENT}/set_scenes_dir",
@@ -144,6 +150,8 @@ def set_scenes_dir(scene_files_dir: str = "") -> bool:
 
 
 def set_next_scene(scene):
+    import requests
+
     try:
         response = requests.get(
             f"http://localhost:{PORT_FOR_CLIENT}/set_next_scene",
@@ -155,6 +163,8 @@ def set_next_scene(scene):
 
 
 def set_object_counts(object_counts: Dict[str, int]) -> bool:
+    import requests
+
     try:
         response = requests.get(f"http://localhost:{PORT_FOR_CLIENT}/set_object_counts", headers={"Content-Type": "application/json"}, json={"object_counts": object_counts})
         return json.loads(response.text)["status"] == "ok"
@@ -172,7 +182,9 @@ def serve_scene(scene):
         read_params_buffer()
         if scene:
             if os.path.exists(scene):
-                write_params_buffer(load_json(scene))
+                from legent.utils.scene_codec import load_scene
+
+                write_params_buffer(load_scene(scene))
             else:
                 if scene=="1":
                     scene_json = load_json(f"{get_default_env_data_path()}/scene-default.json")
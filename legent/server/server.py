@@ -1,4 +1,3 @@
-from legent.environment.env import Environment
 from legent.environment.env_utils import launch_executable, get_default_env_path
 
 from legent.server.chat_server import serve_chat
@@ -23,6 +22,8 @@ def launch(executable_path, ssh: str, scene, use_env=False, launch_scene_server=
     if not executable_path:
         executable_path = get_default_env_path()
     if use_env:
+        from legent.environment.env import Environment
+
         env = Environment(executable_path)
     else:
         process = launch_executable(executable_path, [])  # Launch the executable file
@@ -96,14 +96,17 @@ def scene_string(scene):  # to save tokens or print neatly
     return "\n".join(objects_string)
 
 
-def pack_scenes(scenes: List, output_dir: str = None):
+def pack_scenes(scenes: List, output_dir: str = None, binary: bool = False):
+    """Pack the scenes (dicts or scene files) and their assets into a zip file. With binary=True, the scenes are stored in the binary scene format (see legent.utils.scene_codec), which is much smaller."""
+    from legent.utils.scene_codec import BINARY_SCENE_EXTENSION, load_scene, store_scene
+
     if output_dir is None:
         output_dir = PACKED_FOLDER
     if type(scenes) != list:
         scenes = [scenes]
     for i, scene in enumerate(scenes):
         if type(scene) == str:
-            scenes[i] = load_json(scene)
+            scenes[i] = load_scene(scene)
 
     # find all assets
     files_to_zip = set()
@@ -156,7 +159,8 @@ def pack_scenes(scenes: List, output_dir: str = None):
 
     output_zip = f"{output_dir}/packed_{len(scenes)}_scenes_{time_string()}.zip"
 
-    temp_file = "packed_scene_temp.json"
+    extension = BINARY_SCENE_EXTENSION if binary else ".json"
+    temp_file = f"packed_scene_temp{extension}"
     with zipfile.ZipFile(output_zip, "w") as zipf:
 
         for file in files_to_zip:
@@ -180,8 +184,8 @@ def pack_scenes(scenes: List, output_dir: str = None):
                     instance["material"] = path_to_unique_name[instance["material"]]
             if "skybox" in scene:
                 scene["skybox"]["map"] = path_to_unique_name[scene["skybox"]["map"]]
-            store_json(scene, temp_file)
-            zipf.write(temp_file, arcname=f"scene_{i}_relative.json")
+            store_scene(scene, temp_file)
+            zipf.write(temp_file, arcname=f"scene_{i}_relative{extension}")
     os.remove(temp_file)
 
     log_green(f"created packed scenes at <g>{output_zip}</g>")
@@ -189,6 +193,8 @@ def pack_scenes(scenes: List, output_dir: str = None):
 
 
 def unpack_scenes(input_file: str, get_scene_id: int = -1):
+    from legent.utils.scene_codec import BINARY_SCENE_EXTENSION, load_scene, store_scene
+
     dir = input_file.rsplit(".", maxsplit=1)[0]
     dir = os.path.abspath(dir)
     if not os.path.exists(dir):
@@ -196,7 +202,7 @@ def unpack_scenes(input_file: str, get_scene_id: int = -1):
         with zipfile.ZipFile(input_file, "r") as zip_ref:
             zip_ref.extractall(dir)
 
-    files = [item for item in os.listdir(dir) if item.endswith("_relative.json")]
+    files = [item for item in os.listdir(dir) if item.endswith("_relative.json") or item.endswith(f"_relative{BINARY_SCENE_EXTENSION}")]
     files = list(sorted(files, key=lambda x: (len(x), x)))
 
     scenes = []
@@ -210,9 +216,9 @@ def unpack_scenes(input_file: str, get_scene_id: int = -1):
             raise FileNotFoundError
 
     for file in files:
-        if get_scene_id != -1 and f"scene_{get_scene_id}_relative.json" != file:
+        if get_scene_id != -1 and not file.startswith(f"scene_{get_scene_id}_relative."):
             continue
-        scene = load_json(os.path.join(dir, file))
+        scene = load_scene(os.path.join(dir, file))
 
         for instance in scene["instances"]:
             if ("source" in instance and instance["source"] == "built-in") or instance["prefab"].startswith("LowPolyInterior"):
@@ -239,7 +245,7 @@ def unpack_scenes(input_file: str, get_scene_id: int = -1):
                     instance["material"] = check_and_change_path(instance["material"])
         if "skybox" in scene:
             scene["skybox"]["map"] = check_and_change_path(scene["skybox"]["map"])
-        store_json(scene, os.path.join(dir, file.replace("_relative", "")))
+        store_scene(scene, os.path.join(dir, file.replace("_relative", "")))
         scenes.append(scene)
     if get_scene_id != -1:
         return scenes[0]
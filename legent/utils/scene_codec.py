@@ -0,0 +1,221 @@
+"""A compact binary format of the scenes, with a lossless round trip to the scene dicts of generate_scene and the scene files.
+
+Most of the bytes of a scene JSON are the keys and prefab names repeated by every instance. The binary format stores the
+instances as columns instead: a table of the prefab names, the position, rotation and scale of all the instances as one
+(n, 9) float array, and the other keys of the instances (type, parent, room_id...) as a side map. The rest of the scene is
+kept as JSON.
+
+    data = encode_scene(scene)
+    assert json.dumps(decode_scene(data)) == json.dumps(scene)
+
+    store_scene(scene, "scene.lscene")  # store_json for .json files
+    scene = load_scene("scene.lscene")  # load_json for .json files
+
+Convert a directory of scene files:
+
+    legent convert --input_dir scenes_json --output_dir scenes_binary --to binary
+    legent convert --input_dir scenes_binary --output_dir scenes_json --to json
+"""
+import json
+import os
+import struct
+import zlib
+from typing import Dict, List
+
+import numpy as np
+
+SCENE_CODEC_VERSION = 1
+
+BINARY_SCENE_EXTENSION = ".lscene"
+
+MAGIC = b"LGSC"
+HEADER = struct.Struct("<4sHH")  # magic, version, flags
+FLAG_COMPRESSED = 1
+
+VECTOR_KEYS = ("position", "rotation", "scale")
+"""The keys of the instances stored as columns of the float array. Each is a list of 3 numbers."""
+
+MAX_EXACT_INT = 2**53
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_vector(value) -> bool:
+    return type(value) is list and len(value) == 3 and all(_is_number(v) and (isinstance(v, float) or abs(v) <= MAX_EXACT_INT) for v in value)
+
+
+def encode_scene(scene: Dict, compress: bool = True) -> bytes:
+    """Encode a scene to the binary format.
+
+    Each of position, rotation and scale is stored as float32 if all its values are exact in float32 (rotation and scale
+    usually are), and as float64 otherwise (the positions computed by the generation), so that the round trip is lossless.
+
+    Args:
+        scene (Dict): The scene, with a list of instance dicts at scene["instances"].
+        compress (bool, optional): Compress the encoded scene with zlib. Defaults to True.
+
+    Returns:
+        bytes: The encoded scene.
+    """
+    instances = scene.get("instances", [])
+    n = len(instances)
+    prefabs: Dict[str, int] = {}
+    layouts: Dict[tuple, int] = {}
+    prefab_index = np.zeros(n, dtype=np.uint32)
+    layout_index = np.zeros(n, dtype=np.uint32)
+    values = np.zeros((n, len(VECTOR_KEYS) * 3), dtype=np.float64)
+    is_int = np.zeros((n, len(VECTOR_KEYS) * 3), dtype=bool)
+    extras: List[Dict] = []
+    for i, instance in enumerate(instances):
+        if not isinstance(instance, dict):
+            raise ValueError(f"instance {i} is not a dict")
+        layout = tuple(instance)
+        layout_index[i] = layouts.setdefault(layout, len(layouts))
+        extra = {}
+        for key, value in instance.items():
+            if key == "prefab" and type(value) is str:
+                prefab_index[i] = prefabs.setdefault(value, len(prefabs))
+            elif key in VECTOR_KEYS and _is_vector(value):
+                column = VECTOR_KEYS.index(key) * 3
+                values[i, column : column + 3] = value
+                is_int[i, column : column + 3] = [not isinstance(v, float) for v in value]
+            else:
+                extra[key] = value
+        extras.append(extra)
+
+    columns = []
+    for k in range(len(VECTOR_KEYS)):
+        column = values[:, k * 3 : k * 3 + 3]
+        exact = np.array_equal(column.astype(np.float32).astype(np.float64), column, equal_nan=True)
+        columns.append(np.ascontiguousarray(column, dtype=np.float32 if exact else np.float64))
+    index_dtype = np.uint8 if len(prefabs) <= 2**8 and len(layouts) <= 2**8 else np.uint16 if len(prefabs) <= 2**16 and len(layouts) <= 2**16 else np.uint32
+
+    meta = {
+        "scene": {key: (None if key == "instances" else value) for key, value in scene.items()},  # keeps the order of the keys
+        "count": n,
+        "prefabs": list(prefabs),
+        "layouts": [list(layout) for layout in layouts],
+        "extras": extras,
+        "index_dtype": np.dtype(index_dtype).str,
+        "vector_dtypes": [column.dtype.str for column in columns],
+    }
+    meta_bytes = json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    body = b"".join(
+        [
+            struct.pack("<I", len(meta_bytes)),
+            meta_bytes,
+            prefab_index.astype(index_dtype).tobytes(),
+            layout_index.astype(index_dtype).tobytes(),
+            *[column.tobytes() for column in columns],
+            np.packbits(is_int).tobytes(),
+        ]
+    )
+    flags = 0
+    if compress:
+        body = zlib.compress(body)
+        flags |= FLAG_COMPRESSED
+    return HEADER.pack(MAGIC, SCENE_CODEC_VERSION, flags) + body
+
+
+def decode_scene(data: bytes) -> Dict:
+    """Decode a scene encoded by encode_scene.
+
+    Returns:
+        Dict: The scene. Its JSON is the same as the JSON of the encoded scene.
+    """
+    magic, version, flags = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a binary scene")
+    if version > SCENE_CODEC_VERSION:
+        raise ValueError(f"the binary scene has version {version}, which is newer than the supported version {SCENE_CODEC_VERSION}")
+    body = memoryview(data)[HEADER.size :]
+    if flags & FLAG_COMPRESSED:
+        body = memoryview(zlib.decompress(body))
+    (meta_size,) = struct.unpack_from("<I", body)
+    meta = json.loads(bytes(body[4 : 4 + meta_size]).decode("utf-8"))
+    offset = 4 + meta_size
+    n = meta["count"]
+
+    def read(dtype, count):
+        nonlocal offset
+        array = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+        offset += array.nbytes
+        return array
+
+    prefab_index = read(meta["index_dtype"], n)
+    layout_index = read(meta["index_dtype"], n).tolist()
+    vectors = [read(dtype, n * 3).reshape(n, 3) for dtype in meta["vector_dtypes"]]
+    is_int = np.unpackbits(read(np.uint8, (n * len(VECTOR_KEYS) * 3 + 7) // 8), count=n * len(VECTOR_KEYS) * 3).reshape(n, len(VECTOR_KEYS), 3).astype(bool)
+    columns = {"prefab": np.array(meta["prefabs"] or [""], dtype=object)[prefab_index].tolist()}
+    for k, (key, vector) in enumerate(zip(VECTOR_KEYS, vectors)):
+        column = vector.astype(np.float64).astype(object)
+        column[is_int[:, k]] = vector[is_int[:, k]].astype(np.int64).astype(object)
+        columns[key] = column.tolist()
+
+    layouts = meta["layouts"]
+    extras = meta["extras"]
+    instances: List[Dict] = []
+    for i in range(n):
+        extra = extras[i]
+        if extra:
+            instances.append({key: extra[key] if key in extra else columns[key][i] for key in layouts[layout_index[i]]})
+        else:
+            instances.append({key: columns[key][i] for key in layouts[layout_index[i]]})
+
+    scene = meta["scene"]
+    if "instances" in scene:
+        scene["instances"] = instances
+    return scene
+
+
+def is_binary_scene(file: str) -> bool:
+    return file.endswith(BINARY_SCENE_EXTENSION)
+
+
+def store_scene(scene: Dict, file: str) -> None:
+    """Store a scene in the binary format if the file ends with BINARY_SCENE_EXTENSION, and as JSON otherwise."""
+    if is_binary_scene(file):
+        with open(file, "wb") as f:
+            f.write(encode_scene(scene))
+    else:
+        with open(file, "w", encoding="utf-8") as f:
+            json.dump(scene, f, ensure_ascii=False, indent=4)
+
+
+def load_scene(file: str) -> Dict:
+    """Load a scene stored by store_scene or store_json."""
+    if is_binary_scene(file):
+        with open(file, "rb") as f:
+            return decode_scene(f.read())
+    with open(file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def convert_scenes(input_dir: str, output_dir: str, to: str = "binary") -> List[str]:
+    """Convert the scene files of a directory (recursively) to the binary format or to JSON, keeping the relative paths.
+
+    Args:
+        input_dir (str): The directory of the scenes. Only the .json files are converted to binary and only the binary files to JSON.
+        output_dir (str): The directory of the converted scenes. It may be input_dir.
+        to (str, optional): "binary" or "json". Defaults to "binary".
+
+    Returns:
+        List[str]: The converted files.
+    """
+    if to not in ("binary", "json"):
+        raise ValueError(f'to should be "binary" or "json", not "{to}"')
+    source_extension, target_extension = (".json", BINARY_SCENE_EXTENSION) if to == "binary" else (BINARY_SCENE_EXTENSION, ".json")
+    outputs = []
+    for root, _, files in os.walk(input_dir):
+        for file in sorted(files):
+            if not file.endswith(source_extension):
+                continue
+            input_file = os.path.join(root, file)
+            output_file = os.path.join(output_dir, os.path.relpath(input_file, input_dir))[: -len(source_extension)] + target_extension
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            store_scene(load_scene(input_file), output_file)
+            outputs.append(output_file)
+    return outputs
+
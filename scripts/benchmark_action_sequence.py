@@ -0,0 +1,58 @@
+# Compare collecting "come here" trajectories with one round trip per action and with the path sent as ActionSequences,
+# using the pure-Python stand-in client (no GPU needed). It also checks that both give the same trajectories, including when
+# the frames are sent through a small shared memory ring buffer, which the sequences and the stored images must not overrun.
+from legent import Environment, ResetInfo, Controller
+from legent.environment.fake_client import launch_fake_client
+import numpy as np
+import time
+
+TRAJECTORIES = 10
+ROUND_TRIP_LATENCY = 0.02  # seconds per round trip in the client, e.g. a frame of the game engine
+SCENE = {"instances": [], "player": {"position": [30, 0.05, 30], "rotation": [0, 0, 0]}, "agent": {"position": [0, 0.05, 0], "rotation": [0, 180, 0]}}
+FRAME_BUFFER_SLOTS = 4
+TASK = {"task": "Come here.", "solution": ["goto_user()"]}
+
+
+def collect(use_action_sequences, resolution, port, frame_transport="png"):
+    client = launch_fake_client(port, round_trip_latency=ROUND_TRIP_LATENCY)
+    env = Environment(env_path=None, camera_resolution_width=resolution, camera_resolution_height=resolution, use_animation=False, run_options={"port": port}, frame_transport=frame_transport, frame_buffer_slots=FRAME_BUFFER_SLOTS)
+    round_trips = 0
+    exchange = env._communicator.exchange
+
+    def counted_exchange(*args, **kwargs):
+        nonlocal round_trips
+        round_trips += 1
+        return exchange(*args, **kwargs)
+
+    env._communicator.exchange = counted_exchange
+    trajectories = []
+    try:
+        start = time.perf_counter()
+        for _ in range(TRAJECTORIES):
+            env.reset(ResetInfo(scene=SCENE))
+            trajectories.append(Controller(env, TASK["solution"], use_action_sequences=use_action_sequences).collect_trajectory(TASK))
+        elapsed = time.perf_counter() - start
+    finally:
+        env.close()
+        client.join()
+    return trajectories, elapsed, round_trips - TRAJECTORIES
+
+
+if __name__ == "__main__":
+    port = 50800
+    print(f"{'resolution':>12}{'mode':>14}{'steps':>8}{'round trips':>14}{'ms/step':>10}")
+    for resolution in [128, 448]:
+        results = {}
+        for name, use_action_sequences, frame_transport in [("step by step", False, "png"), ("sequence", True, "png"), ("sequence shm", True, "shm")]:
+            results[name] = collect(use_action_sequences, resolution, port, frame_transport)
+            port += 1
+        for a, b in [ab for name in ["sequence", "sequence shm"] for ab in zip(results["step by step"][0], results[name][0])]:
+            assert a is not None and b is not None
+            assert a.steps == b.steps
+            for x, y in zip(a.actions, b.actions):
+                assert vars(x).keys() == vars(y).keys() and all(np.isclose(vars(x)[k], vars(y)[k]) if isinstance(vars(x)[k], float) else vars(x)[k] == vars(y)[k] for k in vars(x)), (vars(x), vars(y))
+            for x, y in zip(a.images, b.images):
+                assert np.array_equal(x, y)
+        for name, (trajectories, elapsed, round_trips) in results.items():
+            steps = sum(traj.steps for traj in trajectories)
+            print(f"{f'{resolution}x{resolution}':>12}{name:>14}{steps:>8}{round_trips:>14}{elapsed / steps * 1000:>10.2f}")
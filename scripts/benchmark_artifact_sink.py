@@ -0,0 +1,102 @@
+# Measure what the debugging artifacts (the last scene and the failed small objects) cost the scene generation with each
+# artifact sink, against the former synchronous json.dump(indent=4) into the working directory: the time of the puts of a
+# generation and the time of generate_scene. It also checks that the ring keeps the last artifacts, that the file sink
+# writes one file per process and artifact name when several processes share a directory, and that the sinks do not change
+# the scenes. The environment data is needed.
+from legent import generate_scene, ArtifactSink, RingArtifactSink, FileArtifactSink, set_default_artifact_sink, load_json
+from legent.server.scene_cache import set_default_scene_cache
+from multiprocessing import Pool
+import json
+import os
+import tempfile
+import time
+
+SCENES = 10
+ROOM_NUM = 3
+PUTS = 20
+PROCESSES = 4
+
+
+class LegacySink(ArtifactSink):
+    """The former behavior: json.dump with indent=4 to {name}.json in the working directory, in the generating thread."""
+
+    def put(self, name, artifact):
+        with open(f"{name}.json", "w", encoding="utf-8") as f:
+            json.dump(artifact, f, ensure_ascii=False, indent=4)
+
+
+def generate(seed):
+    return generate_scene(room_num=ROOM_NUM, seed=seed)
+
+
+def generate_in_process(args):
+    directory, seed = args
+    set_default_scene_cache(None)
+    set_default_artifact_sink(FileArtifactSink(directory))
+    generate(seed)
+    return os.getpid()
+
+
+def put_ms(sink, scenes):
+    start = time.perf_counter()
+    for _ in range(PUTS):
+        for scene in scenes:
+            sink.put("last_scene", scene)
+            sink.put("failed_objects", {})
+    elapsed = time.perf_counter() - start
+    if isinstance(sink, FileArtifactSink):
+        sink.flush()  # the writes left to the background thread
+    return elapsed / PUTS / len(scenes) * 1000
+
+
+def generate_ms(sink):
+    set_default_artifact_sink(sink)
+    start = time.perf_counter()
+    scenes = [generate(seed) for seed in range(SCENES)]
+    elapsed = time.perf_counter() - start
+    if isinstance(sink, FileArtifactSink):
+        sink.flush()
+    return elapsed / SCENES * 1000, scenes
+
+
+if __name__ == "__main__":
+    set_default_scene_cache(None)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        sinks = {
+            "legacy": LegacySink(),
+            "dropped": ArtifactSink(),
+            "ring": RingArtifactSink(16),
+            "file": FileArtifactSink(os.path.join(tmp, "artifacts")),
+            "file sync": FileArtifactSink(os.path.join(tmp, "artifacts_sync"), background=False),
+        }
+        print(f"{'sink':>10}{'put ms':>9}{'scene ms':>10}")
+        reference = None
+        for name, sink in sinks.items():
+            ms, scenes = generate_ms(sink)
+            dumps = [json.dumps(scene) for scene in scenes]
+            reference = reference or dumps
+            assert dumps == reference
+            print(f"{name:>10}{put_ms(sink, scenes):>9.3f}{ms:>10.1f}")
+
+        ring = sinks["ring"]
+        ring.clear()
+        for seed, scene in enumerate(scenes):
+            ring.put("last_scene", scene)
+            ring.put("failed_objects", {"seed": seed})
+        assert len(ring.get()) == 16 and json.dumps(ring.last("last_scene")) == dumps[-1]
+        assert [report["seed"] for report in ring.get("failed_objects")] == list(range(SCENES - 8, SCENES))
+
+        file_sink = sinks["file"]
+        assert json.dumps(load_json(file_sink.path("last_scene"))) == dumps[-1]
+        file_sink.close()
+
+        shared = os.path.join(tmp, "shared")
+        with Pool(PROCESSES) as pool:
+            pids = set(pool.map(generate_in_process, [(shared, seed) for seed in range(PROCESSES * 2)], chunksize=2))
+        files = sorted(os.listdir(shared))
+        assert files == sorted(f"{name}.{pid}.json" for pid in pids for name in ["last_scene", "failed_objects"]), files
+        for file in files:
+            load_json(os.path.join(shared, file))
+        os.chdir("/")
+    print(f"the sinks do not change the scenes, and {len(pids)} processes wrote {len(files)} separate files")
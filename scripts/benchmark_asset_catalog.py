@@ -0,0 +1,38 @@
+# Compare the candidate filtering of HouseGenerator.sample_and_add_floor_asset on the pandas tables (as it used to be done)
+# with the array-backed FloorAssetCatalog, for random rectangles in each room type.
+# It also checks that both select the same asset groups and assets. The environment data is needed.
+from legent.scene_generation.asset_catalog import ANCHOR_TYPES, FloorAssetCandidates
+from legent.scene_generation.objects import get_default_object_db
+import numpy as np
+import time
+
+QUERIES = 500
+
+
+def pandas_filter(assets, asset_groups, anchor_type, x_margin, z_margin, rect_x_length, rect_z_length):
+    size_filter = lambda df: ((df["xSize"] + x_margin < rect_x_length) & (df["zSize"] + z_margin < rect_z_length)) | ((df["zSize"] + z_margin < rect_x_length) & (df["xSize"] + x_margin < rect_z_length))
+    return asset_groups[asset_groups[anchor_type] & size_filter(asset_groups)], assets[assets[anchor_type] & size_filter(assets)]
+
+
+if __name__ == "__main__":
+    odb = get_default_object_db()
+    rng = np.random.default_rng(0)
+    print(f"{'room type':>12}{'pandas us':>12}{'catalog us':>12}{'speedup':>10}")
+    for room_type in ["Bedroom", "LivingRoom", "Kitchen", "Bathroom"]:
+        _, assets = odb.FLOOR_ASSET_DICT[(room_type, "train")]
+        asset_groups = odb.get_spawnable_asset_group_info()
+        asset_groups = asset_groups[asset_groups[f"in{room_type}s"] > 0]
+        candidates = FloorAssetCandidates(odb.get_floor_asset_catalog(room_type, "train"))
+        queries = [(ANCHOR_TYPES[rng.integers(3)], 0.2, 0.3, *rng.uniform(0.5, 5, 2)) for _ in range(QUERIES)]
+
+        start = time.perf_counter()
+        expected = [pandas_filter(assets, asset_groups, *query) for query in queries]
+        pandas_us = (time.perf_counter() - start) / QUERIES * 1e6
+        start = time.perf_counter()
+        results = [candidates.filter(*query, None) for query in queries]
+        catalog_us = (time.perf_counter() - start) / QUERIES * 1e6
+
+        for (group_df, asset_df), (group_indices, asset_indices) in zip(expected, results):
+            assert list(group_df["assetGroupName"]) == [candidates.catalog.group_records[i]["assetGroupName"] for i in group_indices]
+            assert list(asset_df.index) == [candidates.catalog.asset_records[i]["assetId"] for i in asset_indices]
+        print(f"{room_type:>12}{pandas_us:>12.1f}{catalog_us:>12.1f}{pandas_us / catalog_us:>10.1f}")
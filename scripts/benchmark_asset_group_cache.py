@@ -0,0 +1,40 @@
+# Measure the cost of the spawnable asset group table, which HouseGenerator.generate used to rebuild for every scene:
+# building it, loading it from the disk cache (a new process) and reading it from the ObjectDB (the following scenes).
+# It also checks that the cached table matches the built one. The environment data is needed.
+from legent.scene_generation.objects import get_default_object_db, _get_spawnable_asset_group_info, _get_spawnable_asset_group_rows
+import pandas as pd
+import tempfile
+import time
+
+REPEATS = 5
+
+
+def timed(fn, repeats=REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeats * 1000
+
+
+def assert_same(a: pd.DataFrame, b: pd.DataFrame):
+    pd.testing.assert_frame_equal(a.drop(columns="assetGroupGenerator"), b.drop(columns="assetGroupGenerator"))
+    for x, y in zip(a["assetGroupGenerator"], b["assetGroupGenerator"]):
+        assert x.name == y.name and x.dimensions == y.dimensions and x.data == y.data
+
+
+if __name__ == "__main__":
+    odb = get_default_object_db()
+    built, build_ms = timed(lambda: pd.DataFrame(_get_spawnable_asset_group_rows(odb)))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        odb.cache_dir = cache_dir
+        written = _get_spawnable_asset_group_info(odb)  # writes the disk cache
+        loaded, load_ms = timed(lambda: _get_spawnable_asset_group_info(odb))
+    assert_same(written, loaded)
+    odb.clear_cache()
+    odb.get_spawnable_asset_group_info()
+    _, cached_ms = timed(odb.get_spawnable_asset_group_info, repeats=1000)
+    print(f"{len(built)} asset groups")
+    print(f"{'source':>16}{'ms':>12}")
+    print(f"{'build':>16}{build_ms:>12.3f}")
+    print(f"{'disk cache':>16}{load_ms:>12.3f}")
+    print(f"{'ObjectDB':>16}{cached_ms:>12.5f}")
@@ -0,0 +1,63 @@
+# Drive several environments from one python process with AsyncEnvironment, using the pure-Python stand-in clients (no GPU needed).
+# Each step also awaits a simulated model call, which overlaps with the other environments' steps.
+from legent import Environment, AsyncEnvironment, Action, ResetInfo
+from legent.environment.fake_client import launch_fake_client
+import asyncio
+import time
+
+STEPS = 50
+MODEL_LATENCY = 0.02  # seconds, e.g. an HTTP call to a model server
+SCENE = {"instances": [], "player": {"position": [0, 0.05, 0], "rotation": [0, 0, 0]}, "agent": {"position": [0, 0.05, 2], "rotation": [0, 180, 0]}}
+KWARGS = {"camera_resolution_width": 128, "camera_resolution_height": 128}
+
+
+def run_sync(ports):
+    clients = [launch_fake_client(port) for port in ports]
+    envs = [Environment(env_path=None, run_options={"port": port}, **KWARGS) for port in ports]
+    try:
+        for env in envs:
+            env.reset(ResetInfo(scene=SCENE))
+        start = time.perf_counter()
+        for _ in range(STEPS):
+            for env in envs:
+                time.sleep(MODEL_LATENCY)
+                obs = env.step(Action(move_forward=1))
+        return time.perf_counter() - start
+    finally:
+        for env in envs:
+            env.close()
+        for client in clients:
+            client.join()
+
+
+async def run_episode(env):
+    await env.reset(ResetInfo(scene=SCENE))
+    for _ in range(STEPS):
+        await asyncio.sleep(MODEL_LATENCY)
+        obs = await env.step(Action(move_forward=1))
+        assert obs.image.shape == (128, 128, 3)
+
+
+async def run_async(ports):
+    clients = [launch_fake_client(port) for port in ports]
+    envs = [AsyncEnvironment(env_path=None, run_options={"port": port}, **KWARGS) for port in ports]
+    try:
+        await asyncio.gather(*[env.start() for env in envs])
+        start = time.perf_counter()
+        await asyncio.gather(*[run_episode(env) for env in envs])
+        return time.perf_counter() - start
+    finally:
+        await asyncio.gather(*[env.close() for env in envs])
+        for client in clients:
+            client.join()
+
+
+if __name__ == "__main__":
+    port = 50600
+    print(f"{'envs':>6}{'sync steps/s':>16}{'async steps/s':>16}")
+    for num_envs in [1, 4, 8]:
+        sync_elapsed = run_sync(list(range(port, port + num_envs)))
+        port += num_envs
+        async_elapsed = asyncio.run(run_async(list(range(port, port + num_envs))))
+        port += num_envs
+        print(f"{num_envs:>6}{num_envs * STEPS / sync_elapsed:>16.1f}{num_envs * STEPS / async_elapsed:>16.1f}")
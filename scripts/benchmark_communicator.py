@@ -0,0 +1,108 @@
+# Measure the per-step overhead of RpcCommunicator itself (gRPC round trip + handoff to the main thread).
+# The client is a minimal gRPC client that answers every action with a fixed observation, so nothing is rendered or decoded.
+# "pipe" is the previous implementation, which handed every message through a multiprocessing.Pipe (pickling it twice)
+# and checked for new data with a 3-second polling interval. "queue" is the current in-process handoff.
+from legent.environment.communicator import RpcCommunicator, CommunicatorServicerImplementation
+from legent.protobuf.communicator_pb2 import ActionProto, ObservationProto
+from legent.protobuf.communicator_pb2_grpc import CommunicatorStub, add_CommunicatorServicer_to_server
+from multiprocessing import Pipe, get_context
+from concurrent.futures import ThreadPoolExecutor
+import grpc
+import time
+
+STEPS = 500
+
+
+class PipeServicer(CommunicatorServicerImplementation):
+    def __init__(self):
+        self.parent_conn, self.child_conn = Pipe()
+
+    def GetAction(self, request, context):
+        self.child_conn.send(request)
+        return self.child_conn.recv()
+
+
+class PipeCommunicator(RpcCommunicator):
+    def create_server(self):
+        self.server = grpc.server(
+            thread_pool=ThreadPoolExecutor(max_workers=10),
+            options=(("grpc.so_reuseport", 1), ("grpc.max_receive_message_length", 500 * 1024 * 1024), ("grpc.max_send_message_length", 500 * 1024 * 1024)),
+        )
+        self.unity_to_external = PipeServicer()
+        add_CommunicatorServicer_to_server(self.unity_to_external, self.server)
+        self.server.add_insecure_port("[::]:" + str(self.port))
+        self.server.start()
+        self.is_open = True
+
+    def receive(self, poll_callback=None):
+        conn = self.unity_to_external.parent_conn
+        start = time.monotonic()
+        while time.monotonic() - start < self.timeout_wait:
+            if conn.poll(self.timeout_wait // 200):
+                return conn.recv()
+            if poll_callback:
+                poll_callback()
+        raise Exception("Time out. The game environment took too long to respond.\n")
+
+    def initialize(self, poll_callback=None, env_config={}):
+        init_obs = self.receive(poll_callback)
+        self.unity_to_external.parent_conn.send(ActionProto(type="INIT"))
+        self.receive(poll_callback)
+        return init_obs
+
+    def exchange(self, inputs, poll_callback=None):
+        self.unity_to_external.parent_conn.send(inputs)
+        return self.receive(poll_callback)
+
+    def close(self):
+        if self.is_open:
+            self.unity_to_external.parent_conn.send(ActionProto(type="CLOSE"))
+            self.server.stop(False)
+            self.is_open = False
+
+
+def echo_client(port, payload_bytes):
+    channel = grpc.insecure_channel(f"localhost:{port}", options=[("grpc.max_receive_message_length", 500 * 1024 * 1024), ("grpc.max_send_message_length", 500 * 1024 * 1024)])
+    stub = CommunicatorStub(channel)
+    obs = ObservationProto(type="STEP", game_states="{}", image=bytes(payload_bytes))
+    try:
+        action = stub.GetAction(ObservationProto(type="STEP"), wait_for_ready=True)
+        while action.type != "CLOSE":
+            action = stub.GetAction(obs)
+    except grpc.RpcError:
+        pass
+    finally:
+        channel.close()
+
+
+def benchmark(communicator_class, payload_bytes, port):
+    # Spawn rather than fork: a forked child inherits the gRPC state of the servers of the previous runs.
+    client = get_context("spawn").Process(target=echo_client, args=(port, payload_bytes), daemon=True)
+    client.start()
+    communicator = communicator_class(port)
+    try:
+        communicator.initialize(None, {})
+        action = ActionProto(type="STEP", float_actions=[0] * 10)
+        for _ in range(20):  # warm up
+            communicator.exchange(action)
+        start = time.perf_counter()
+        for _ in range(STEPS):
+            communicator.exchange(action)
+        elapsed = time.perf_counter() - start
+    finally:
+        communicator.close()
+        client.join()
+    return elapsed / STEPS * 1000
+
+
+if __name__ == "__main__":
+    results = []
+    port = 50300
+    for payload_bytes in [0, 600 * 1024, 4 * 1024 * 1024]:  # no image, a 448x448 PNG, a 1024x1024 PNG
+        for name, communicator_class in [("pipe", PipeCommunicator), ("queue", RpcCommunicator)]:
+            ms = benchmark(communicator_class, payload_bytes, port)
+            port += 1
+            results.append((payload_bytes, name, ms))
+    print(f"{'payload':>12}{'handoff':>12}{'ms/step':>12}{'step/s':>12}")
+    for payload_bytes, name, ms in results:
+        print(f"{f'{payload_bytes // 1024}KB':>12}{name:>12}{ms:>12.3f}{1000 / ms:>12.1f}")
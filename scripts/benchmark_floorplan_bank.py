@@ -0,0 +1,69 @@
+# Compare HouseGenerator.generate_structure with and without a FloorplanBank, for the room specs of ROOM_SPEC_SAMPLER
+# and the dims that generate_scene samples. It builds a small bank in a temporary directory (see
+# legent/scene_generation/floorplan_bank.py for the offline tool), checks that the memory-mapped bank reads the same
+# floorplans as the loaded one, and that the sampled structures have all the rooms. It also checks that a bank built for the
+# room specs of generate_scene with 2 rooms, whose ratios are random, has a floorplan of every room spec sampled by it,
+# with the room ids of that room spec. It does not need the environment data.
+from legent.scene_generation.floorplan_bank import FloorplanBank, build_floorplans, get_bank_room_specs, get_room_spec_key, get_scene_dims, save_floorplan_bank
+from legent.scene_generation.generator import HouseGenerator
+from legent.scene_generation.room_spec import ROOM_SPEC_SAMPLER
+from legent.server.scene_generator import ROOM_SIZE_RANGE, ROOM_TYPES, get_room_spec
+import numpy as np
+import os
+import random
+import tempfile
+import time
+
+FLOORPLANS_PER_SPEC = 10
+REPEATS = 20
+SAMPLED_ROOM_SPECS = 200
+
+
+def timed(generator, room_spec):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        try:
+            house_structure = generator.generate_structure(room_spec)
+        except Exception:
+            continue
+    return house_structure, (time.perf_counter() - start) / REPEATS * 1000
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    np.random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "floorplans.npz")
+        floorplans = {}
+        for room_spec in ROOM_SPEC_SAMPLER.room_specs:
+            floorplans[get_room_spec_key(room_spec)] = [floorplan for dims in get_scene_dims(len(room_spec.room_type_map)) for floorplan in build_floorplans(room_spec, dims, FLOORPLANS_PER_SPEC)]
+        save_floorplan_bank(path, floorplans)
+        print(f"{sum(len(v) for v in floorplans.values())} floorplans, {os.path.getsize(path) / 1024:.1f} KB")
+
+        bank, loaded = FloorplanBank(path), FloorplanBank(path, mmap=False)
+        assert all((bank.get(i) == loaded.get(i)).all() for i in range(len(bank)))
+        print("the memory-mapped bank reads the same floorplans")
+
+        print(f"{'room spec':>30}{'dims':>8}{'grow ms':>10}{'bank ms':>10}{'speedup':>10}")
+        for room_spec in ROOM_SPEC_SAMPLER.room_specs:
+            dims = get_scene_dims(len(room_spec.room_type_map))[0]
+            _, grow_ms = timed(HouseGenerator(room_spec=room_spec, dims=dims), room_spec)
+            house_structure, bank_ms = timed(HouseGenerator(room_spec=room_spec, dims=dims, floorplan_bank=bank), room_spec)
+            assert set(house_structure.xz_poly_map) == set(room_spec.room_type_map)
+            assert house_structure.interior_boundary.shape == (dims[1], dims[0])
+            print(f"{room_spec.room_spec_id:>30}{f'{dims[0]}x{dims[1]}':>8}{grow_ms:>10.2f}{bank_ms:>10.2f}{grow_ms / bank_ms:>10.1f}")
+
+        # The room specs of generate_scene with 2 rooms, as it samples them.
+        path = os.path.join(tmp, "two_rooms.npz")
+        floorplans = {key: [floorplan for dims in dims_list for floorplan in build_floorplans(room_spec, dims, 2)] for key, (room_spec, dims_list) in get_bank_room_specs([2]).items()}
+        save_floorplan_bank(path, floorplans)
+        bank = FloorplanBank(path)
+        rng = random.Random(0)
+        for _ in range(SAMPLED_ROOM_SPECS):
+            rooms = rng.sample(ROOM_TYPES, 2)
+            sizes = [rng.randint(*ROOM_SIZE_RANGE[room]) for room in rooms]
+            room_spec, dims = get_room_spec(rooms, sizes), rng.choice(get_scene_dims(2, sum(sizes)))
+            floorplan = bank.sample(room_spec, dims=dims, rng=rng)
+            assert floorplan is not None and not bank.missed, "the bank has no floorplan of a room spec of generate_scene"
+            assert set(room_spec.room_type_map) <= set(np.unique(floorplan).tolist()) and floorplan.shape == (dims[1], dims[0])
+        print(f"{len(floorplans)} room spec keys cover the {SAMPLED_ROOM_SPECS} sampled room specs of generate_scene with 2 rooms, with their room ids")
@@ -0,0 +1,53 @@
+# Compare the floorplan search of generate_floorplan on the multi-room specs of ROOM_SPEC_SAMPLER: all the
+# candidate generations in this process, early stopping at a target score, and a process pool.
+# It reports the time, the number of generated candidates and the best score, and checks that the result with a
+# process pool does not depend on the number of workers. It does not need the environment data.
+from legent.scene_generation.floorplan import generate_floorplan
+from legent.scene_generation.interior_boundaries import sample_interior_boundary
+from legent.scene_generation.room_spec import ROOM_SPEC_SAMPLER
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import random
+
+REPEATS = 5
+TARGET_SCORES = [None, 0.9, 0.95]
+NUM_WORKERS = [None, 2]
+
+
+def search(room_spec, seed, **kwargs):
+    random.seed(seed)
+    np.random.seed(seed)
+    interior_boundary = sample_interior_boundary(num_rooms=len(room_spec.room_type_map), dims=room_spec.dims() if room_spec.dims is not None else None)
+    return generate_floorplan(room_spec=room_spec, interior_boundary=interior_boundary, return_stats=True, **kwargs)
+
+
+def check_workers(room_spec, seed=0):
+    with ProcessPoolExecutor(1) as one, ProcessPoolExecutor(2) as two:
+        a, _ = search(room_spec, seed, executor=one, target_score=0.9)
+        b, _ = search(room_spec, seed, executor=two, target_score=0.9)
+    assert (a == b).all()
+    print("the floorplan does not depend on the number of workers")
+
+
+if __name__ == "__main__":
+    room_specs = [room_spec for room_spec in ROOM_SPEC_SAMPLER.room_specs if len(room_spec.room_type_map) > 1]
+    check_workers(room_specs[0])
+    print(f"{'room spec':>30}{'workers':>9}{'target':>8}{'ms':>10}{'candidates':>12}{'best score':>12}")
+    for room_spec in room_specs:
+        for num_workers in NUM_WORKERS:
+            executor = ProcessPoolExecutor(num_workers) if num_workers else None
+            if executor is not None:
+                search(room_spec, REPEATS, executor=executor)  # start the workers
+            for target_score in TARGET_SCORES:
+                stats = []
+                for seed in range(REPEATS):
+                    try:
+                        stats.append(search(room_spec, seed, executor=executor, target_score=target_score)[1])
+                    except Exception:
+                        continue
+                ms = np.mean([s["seconds"] for s in stats]) * 1000
+                candidates = np.mean([s["candidates"] for s in stats])
+                best_score = np.mean([s["best_score"] for s in stats])
+                print(f"{room_spec.room_spec_id:>30}{num_workers or 0:>9}{str(target_score):>8}{ms:>10.1f}{candidates:>12.1f}{best_score:>12.3f}")
+            if executor is not None:
+                executor.shutdown()
@@ -0,0 +1,36 @@
+# Compare the per-step cost of PNG frames and shared memory frames, using the pure-Python stand-in client (no GPU needed).
+from legent import Environment, ResetInfo
+from legent.environment.fake_client import launch_fake_client
+import time
+
+SCENE = {"instances": [], "player": {"position": [0, 0.05, 0], "rotation": [0, 0, 0]}, "agent": {"position": [0, 0.05, 2], "rotation": [0, 180, 0]}}
+STEPS = 200
+
+
+def benchmark(frame_transport, resolution, port):
+    client = launch_fake_client(port)
+    env = Environment(env_path=None, camera_resolution_width=resolution, camera_resolution_height=resolution, frame_transport=frame_transport, run_options={"port": port})
+    try:
+        env.reset(ResetInfo(scene=SCENE))
+        start = time.perf_counter()
+        for _ in range(STEPS):
+            obs = env.step()
+            checksum = int(obs.image[0, 0, 0])  # touch the frame as a policy would
+        elapsed = time.perf_counter() - start
+    finally:
+        env.close()
+        client.join()
+    return elapsed / STEPS * 1000
+
+
+if __name__ == "__main__":
+    results = []
+    port = 50200
+    for resolution in [448, 1024]:
+        for frame_transport in ["png", "shm"]:
+            ms = benchmark(frame_transport, resolution, port)
+            port += 1
+            results.append((resolution, frame_transport, ms))
+    print(f"{'resolution':>12}{'transport':>12}{'ms/step':>12}{'step/s':>12}")
+    for resolution, frame_transport, ms in results:
+        print(f"{f'{resolution}x{resolution}':>12}{frame_transport:>12}{ms:>12.2f}{1000 / ms:>12.1f}")
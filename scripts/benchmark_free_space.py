@@ -0,0 +1,78 @@
+# Compare the free space representations of Room ("polygon": shapely OrthogonalPolygon, "grid": GridFreeSpace bitmap)
+# on houses of ROOM_SPEC_SAMPLER with 1 to 8 rooms. It reports the time of HouseGenerator.generate and the time spent in
+# the free space operations (sample_next_rectangle, sample_anchor_location and add_asset).
+# It also checks that both representations keep the same free area and that the grid rectangles are free.
+# The environment data is needed.
+from legent.scene_generation.free_space import GridFreeSpace
+from legent.scene_generation.generator import HouseGenerator
+from legent.scene_generation.objects import get_default_object_db
+from legent.scene_generation.room import OrthogonalPolygon, Room
+from legent.scene_generation.room_spec import ROOM_SPEC_SAMPLER
+from shapely.geometry import Polygon, box
+import numpy as np
+import random
+import time
+
+REPEATS = 5
+FREE_SPACE_METHODS = ["sample_next_rectangle", "sample_anchor_location", "add_asset"]
+free_space_seconds = 0.0
+
+
+def timed_method(method):
+    def wrapper(*args, **kwargs):
+        global free_space_seconds
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            free_space_seconds += time.perf_counter() - start
+
+    return wrapper
+
+
+def check_consistency(trials=200):
+    rng = np.random.default_rng(0)
+    for _ in range(trials):
+        polygon = Polygon([(0, 0), (0, 7.5), (5, 7.5), (5, 5), (10, 5), (10, 0)])
+        open_polygon, grid = OrthogonalPolygon(polygon), GridFreeSpace(polygon.exterior.coords[:-1])
+        for _ in range(rng.integers(1, 8)):
+            x0, z0 = rng.uniform(-1, 10, 2)
+            x1, z1 = x0 + rng.uniform(0.2, 3), z0 + rng.uniform(0.2, 3)
+            open_polygon.subtract(box(x0, z0, x1, z1))
+            grid.subtract_rectangle((x0, z0, x1, z1))
+        assert abs(open_polygon.polygon.area - grid.get_free_area()) < 1e-6
+        free = open_polygon.polygon.buffer(1e-6)
+        for rectangle in grid.get_all_rectangles():
+            assert free.contains(box(*rectangle))
+    print("the grid keeps the same free area as the polygon, and its rectangles are free")
+
+
+def run(room_spec, free_space, seed):
+    global free_space_seconds
+    random.seed(seed)
+    np.random.seed(seed)
+    free_space_seconds = 0.0
+    start = time.perf_counter()
+    try:
+        HouseGenerator(room_spec=room_spec, objectDB=get_default_object_db(), free_space=free_space).generate()
+    except Exception:
+        return None
+    return time.perf_counter() - start, free_space_seconds
+
+
+if __name__ == "__main__":
+    check_consistency()
+    for name in FREE_SPACE_METHODS:
+        setattr(Room, name, timed_method(getattr(Room, name)))
+    print(f"{'rooms':>6}{'polygon ms':>12}{'free space':>12}{'grid ms':>10}{'free space':>12}{'speedup':>10}")
+    for num_rooms in range(1, 9):
+        room_specs = [room_spec for room_spec in ROOM_SPEC_SAMPLER.room_specs if len(room_spec.room_type_map) == num_rooms]
+        results = {"polygon": [], "grid": []}
+        for room_spec in room_specs:
+            for seed in range(REPEATS):
+                for free_space in results:
+                    result = run(room_spec, free_space, seed)
+                    if result is not None:
+                        results[free_space].append(result)
+        polygon, grid = np.mean(results["polygon"], axis=0) * 1000, np.mean(results["grid"], axis=0) * 1000
+        print(f"{num_rooms:>6}{polygon[0]:>12.1f}{polygon[1]:>12.1f}{grid[0]:>10.1f}{grid[1]:>12.1f}{polygon[1] / grid[1]:>10.1f}")
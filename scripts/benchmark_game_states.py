@@ -0,0 +1,126 @@
+# Compare the per-step cost of JSON and binary game states, using the pure-Python stand-in client (no GPU needed).
+# It also checks that Observation.game_states decoded from the binary arrays matches the JSON game states, including for a
+# step before the first reset, whose static fields come with the response to INIT.
+from legent import Environment, ResetInfo, Action
+from legent.environment.fake_client import launch_fake_client
+from legent.protobuf.communicator_pb2 import ObservationProto
+from legent.action.observation import Observation
+from legent.action.game_states import encode_game_states
+import numpy as np
+import json
+import time
+
+STEPS = 200
+
+
+def make_scene(num_instances):
+    rng = np.random.default_rng(0)
+    instances = [{"prefab": f"prefab_{i}", "position": rng.uniform(-5, 5, 3).tolist(), "rotation": [0, float(rng.uniform(0, 360)), 0], "scale": [1, 1, 1], "type": "kinematic"} for i in range(num_instances)]
+    return {"instances": instances, "player": {"position": [0, 0.05, 0], "rotation": [0, 0, 0]}, "agent": {"position": [0, 0.05, 2], "rotation": [0, 180, 0]}}
+
+
+def assert_close(a, b):
+    if isinstance(a, dict):
+        assert a.keys() == b.keys(), (a.keys(), b.keys())
+        for key in a:
+            assert_close(a[key], b[key])
+    elif isinstance(a, list):
+        assert len(a) == len(b)
+        for x, y in zip(a, b):
+            assert_close(x, y)
+    elif isinstance(a, float):
+        assert abs(a - b) < 1e-4 * max(1, abs(a)), (a, b)
+    else:
+        assert a == b, (a, b)
+
+
+def run_episode(game_states_encoding, scene, port):
+    client = launch_fake_client(port)
+    env = Environment(env_path=None, camera_resolution_width=64, camera_resolution_height=64, frame_transport="shm", game_states_encoding=game_states_encoding, run_options={"port": port})
+    try:
+        observations = [env.step(), env.reset(ResetInfo(scene=scene))]
+        for i in range(10):
+            observations.append(env.step(Action(move_forward=1, rotate_right=7 * i, grab=i == 5)))
+        return [obs.game_states for obs in observations], observations[-1].game_states_arrays
+    finally:
+        env.close()
+        client.join()
+
+
+def check_compatibility(port):
+    scene = make_scene(50)
+    json_states, _ = run_episode("json", scene, port)
+    binary_states, arrays = run_episode("binary", scene, port + 1)
+    for a, b in zip(json_states, binary_states):
+        assert_close(a, b)
+    assert arrays.instance_positions.shape == (50, 3)
+    assert arrays.instance_prefabs == [instance["prefab"] for instance in scene["instances"]]
+    try:
+        Observation(ObservationProto(type="STEP", float_observations=arrays.instance_positions.ravel().tolist())).game_states
+        assert False, "binary game states without their static fields"
+    except ValueError:
+        pass
+    print("binary game states match the JSON game states")
+
+
+def benchmark(game_states_encoding, num_instances, port):
+    client = launch_fake_client(port)
+    env = Environment(env_path=None, camera_resolution_width=64, camera_resolution_height=64, frame_transport="shm", game_states_encoding=game_states_encoding, run_options={"port": port})
+    try:
+        env.reset(ResetInfo(scene=make_scene(num_instances)))
+        start = time.perf_counter()
+        for _ in range(STEPS):
+            obs = env.step()
+            if game_states_encoding == "binary":
+                states = obs.game_states_arrays
+                distances = np.linalg.norm((states.instance_positions - states.agent_position)[:, [0, 2]], axis=1)
+            else:
+                states = obs.game_states
+                agent = states["agent"]["position"]
+                distances = [((instance["position"]["x"] - agent["x"]) ** 2 + (instance["position"]["z"] - agent["z"]) ** 2) ** 0.5 for instance in states["instances"]]
+        elapsed = time.perf_counter() - start
+    finally:
+        env.close()
+        client.join()
+    return elapsed / STEPS * 1000
+
+
+def benchmark_decode(game_states_encoding, num_instances):
+    """Python-side cost only: parse the serialized ObservationProto and get the instance positions."""
+    from legent.environment.fake_client import FakeClient
+
+    fake = FakeClient()
+    fake.initialize({"camera_resolution_width": 8, "camera_resolution_height": 8})
+    fake.reset(make_scene(num_instances))
+    game_states = fake.game_states()
+    if game_states_encoding == "binary":
+        floats, ints, static = encode_game_states(game_states)
+        data = ObservationProto(type="STEP", float_observations=floats, int_observations=ints).SerializeToString()
+    else:
+        data = ObservationProto(type="STEP", game_states=json.dumps(game_states)).SerializeToString()
+        static = None
+    start = time.perf_counter()
+    for _ in range(STEPS):
+        obs = ObservationProto()
+        obs.ParseFromString(data)
+        obs = Observation(obs, static_game_states=static)
+        if game_states_encoding == "binary":
+            obs.game_states_arrays.instance_positions
+        else:
+            obs.game_states["instances"]
+    return (time.perf_counter() - start) / STEPS * 1000
+
+
+if __name__ == "__main__":
+    port = 50400
+    check_compatibility(port)
+    port += 2
+    results = []
+    for num_instances in [10, 100, 500]:
+        for game_states_encoding in ["json", "binary"]:
+            ms = benchmark(game_states_encoding, num_instances, port)
+            port += 1
+            results.append((num_instances, game_states_encoding, ms, benchmark_decode(game_states_encoding, num_instances)))
+    print(f"{'instances':>12}{'encoding':>12}{'ms/step':>12}{'decode ms':>12}")
+    for num_instances, game_states_encoding, ms, decode_ms in results:
+        print(f"{num_instances:>12}{game_states_encoding:>12}{ms:>12.2f}{decode_ms:>12.3f}")
@@ -0,0 +1,51 @@
+# Measure the startup of `import legent` and of the first use of some of its names, each in a fresh process, and check that
+# `import legent` stays under IMPORT_BUDGET_MS and does not import the heavy dependencies, which the public API imports on
+# first use (PEP 562). It also checks that every name of legent.__all__ resolves. The environment data is not needed.
+import subprocess
+import sys
+
+RUNS = 7
+IMPORT_BUDGET_MS = 100
+HEAVY_MODULES = ["numpy", "grpc", "requests", "pandas", "shapely", "PIL", "flask", "attr", "scipy"]
+
+STATEMENTS = {
+    "import legent": "import legent",
+    "legent.load_json": "from legent import load_json",
+    "legent.ResetInfo": "from legent import ResetInfo",
+    "legent.Environment": "from legent import Environment",
+    "legent.generate_scene": "from legent import generate_scene",
+}
+
+STARTUP = """
+import sys
+import time
+start = time.perf_counter()
+{statement}
+elapsed = (time.perf_counter() - start) * 1000
+print(elapsed, ",".join(module for module in {heavy_modules} if module in sys.modules))
+"""
+
+
+def startup(statement):
+    """The median time of the statement in a fresh process, in ms, and the heavy modules it imports."""
+    results = []
+    for _ in range(RUNS):
+        output = subprocess.run([sys.executable, "-c", STARTUP.format(statement=statement, heavy_modules=HEAVY_MODULES)], check=True, capture_output=True, text=True).stdout.split()
+        results.append((float(output[0]), output[1] if len(output) > 1 else ""))
+    return sorted(results)[RUNS // 2]
+
+
+if __name__ == "__main__":
+    print(f"{'statement':>24}{'ms':>9}  heavy modules imported")
+    for name, statement in STATEMENTS.items():
+        ms, modules = startup(statement)
+        print(f"{name:>24}{ms:>9.1f}  {modules}")
+        if name == "import legent":
+            assert ms < IMPORT_BUDGET_MS, f"import legent took {ms:.1f} ms, over the budget of {IMPORT_BUDGET_MS} ms"
+            assert not modules, f"import legent imported {modules}"
+
+    import legent
+
+    for name in legent.__all__:
+        getattr(legent, name)
+    print(f"import legent is under {IMPORT_BUDGET_MS} ms and the {len(legent.__all__)} names of legent.__all__ resolve")
@@ -0,0 +1,67 @@
+# Measure the effect of generate_scene(merge_tiles=True), which merges the floor and ceiling tiles and the walls without doors:
+# the number of instances, the size of the scene JSON and the reset latency of Environment.reset() with the pure-Python
+# stand-in client. The stand-in client does not instantiate prefabs, so the saving in the game client, which scales with the
+# number of instances, is larger. It also checks that the merged tiles and walls cover the same area and length.
+# The environment data is needed.
+from legent import Environment, ResetInfo, generate_scene
+from legent.environment.fake_client import launch_fake_client
+from legent.scene_generation.generator import DEFAULT_WALL_PREFAB
+from legent.scene_generation.objects import get_default_object_db
+import json
+import numpy as np
+import random
+import time
+
+SCENES = 10
+ROOM_NUMS = [1, 3, 5]
+
+
+def footprint(scene, prefabs):
+    """Total scaled x-z size of the instances of the prefabs: the area of the tiles and the length of the walls."""
+    total = 0.0
+    for instance in scene["instances"]:
+        if instance["prefab"] in prefabs:
+            x_size, z_size = instance["scale"][0], instance["scale"][2]
+            total += x_size * z_size if instance["prefab"] not in {DEFAULT_WALL_PREFAB} else x_size
+    return total
+
+
+def generate(seed, room_num, merge_tiles):
+    random.seed(seed)
+    np.random.seed(seed)
+    return generate_scene(room_num=room_num, merge_tiles=merge_tiles)
+
+
+def reset_ms(scenes, port):
+    client = launch_fake_client(port)
+    env = Environment(env_path=None, camera_resolution_width=64, camera_resolution_height=64, run_options={"port": port})
+    try:
+        env.reset(ResetInfo(scenes[0]))
+        start = time.perf_counter()
+        for scene in scenes:
+            env.reset(ResetInfo(scene))
+        return (time.perf_counter() - start) / len(scenes) * 1000
+    finally:
+        env.close()
+        client.join()
+
+
+if __name__ == "__main__":
+    odb = get_default_object_db()
+    floor_prefabs = set(odb.MY_OBJECTS["floor"])
+    port = 50900
+    print(f"{'rooms':>6}{'instances':>11}{'merged':>9}{'JSON KB':>9}{'merged':>9}{'reset ms':>10}{'merged':>9}")
+    for room_num in ROOM_NUMS:
+        scenes = [generate(seed, room_num, False) for seed in range(SCENES)]
+        merged_scenes = [generate(seed, room_num, True) for seed in range(SCENES)]
+        for scene, merged in zip(scenes, merged_scenes):
+            assert abs(footprint(scene, floor_prefabs) - footprint(merged, floor_prefabs)) < 1e-6
+            assert abs(footprint(scene, {DEFAULT_WALL_PREFAB}) - footprint(merged, {DEFAULT_WALL_PREFAB})) < 1e-6
+        instances = np.mean([len(scene["instances"]) for scene in scenes])
+        merged_instances = np.mean([len(scene["instances"]) for scene in merged_scenes])
+        kb = np.mean([len(json.dumps(scene)) for scene in scenes]) / 1024
+        merged_kb = np.mean([len(json.dumps(scene)) for scene in merged_scenes]) / 1024
+        port += 2
+        ms, merged_ms = reset_ms(scenes, port), reset_ms(merged_scenes, port + 1)
+        print(f"{room_num:>6}{instances:>11.1f}{merged_instances:>9.1f}{kb:>9.1f}{merged_kb:>9.1f}{ms:>10.1f}{merged_ms:>9.1f}")
+    print("the merged tiles and walls cover the same area and length")
@@ -0,0 +1,89 @@
+# Measure the startup of get_default_object_db() in a fresh process: reading the data files (as a worker did before the
+# snapshot, when addressables.json was parsed twice), building the snapshot, and loading the snapshot, with and without
+# touching every table. It also checks that the tables of the snapshot equal the tables of the data files, and that the
+# snapshot is rebuilt when a data file changes, and that threads touching a table while it is loaded all get it. The
+# environment data is needed.
+from legent.scene_generation.objects import ObjectDB, SNAPSHOT_TABLES, _get_data_fingerprint, _get_tables, get_data_path, get_object_db_snapshot_path, load_object_db_snapshot
+from concurrent.futures import ThreadPoolExecutor
+import os
+import subprocess
+import sys
+import time
+
+RUNS = 5
+
+# pandas is imported before the timing: a generating worker imports it anyway, and it would dominate the time of the small tables.
+STARTUP = """
+import time
+import pandas
+start = time.perf_counter()
+import legent.scene_generation.objects as objects
+if {legacy}:
+    objects._get_tables(), objects._get_prefabs()
+else:
+    odb = objects.get_default_object_db()
+    if {touch}:
+        for name in objects.SNAPSHOT_TABLES:
+            getattr(odb, name)
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def startup_ms(legacy=False, touch=False, remove_snapshot=False):
+    times = []
+    for _ in range(RUNS):
+        if remove_snapshot and os.path.exists(get_object_db_snapshot_path(_get_data_fingerprint())):
+            os.remove(get_object_db_snapshot_path(_get_data_fingerprint()))
+        output = subprocess.run([sys.executable, "-c", STARTUP.format(legacy=legacy, touch=touch)], check=True, capture_output=True, text=True).stdout
+        times.append(float(output.split()[-1]))
+    return sorted(times)[RUNS // 2]
+
+
+def check_concurrent_load(threads=4):
+    """Threads touching a table of a lazily loaded ObjectDB while a slow loader runs all get the table, loaded once."""
+    calls = []
+
+    def slow_loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"prefab": {}}
+
+    odb = ObjectDB(*[None] * 10, table_loaders={"PREFABS": slow_loader})
+    with ThreadPoolExecutor(threads) as executor:
+        tables = list(executor.map(lambda _: odb.PREFABS, range(threads)))
+    assert all(table is tables[0] for table in tables) and len(calls) == 1
+
+
+def equal(a, b):
+    return a.equals(b) if hasattr(a, "equals") else a == b
+
+
+if __name__ == "__main__":
+    print(f"{'startup':>28}{'ms':>9}")
+    print(f"{'read the data files':>28}{startup_ms(legacy=True):>9.1f}")
+    print(f"{'build the snapshot':>28}{startup_ms(remove_snapshot=True):>9.1f}")
+    print(f"{'load the snapshot':>28}{startup_ms():>9.1f}")
+    print(f"{'load and use every table':>28}{startup_ms(touch=True):>9.1f}")
+
+    tables = _get_tables()
+    loaders = load_object_db_snapshot(get_object_db_snapshot_path(_get_data_fingerprint()))
+    assert sorted(loaders) == sorted(SNAPSHOT_TABLES)
+    for name in SNAPSHOT_TABLES:
+        assert equal(loaders[name](), tables[name]), name
+
+    # Changing a data file (here its modification time, restored afterwards) changes the fingerprint, so a new snapshot is built.
+    file = os.path.join(get_data_path(), "addressables.json")
+    stat = os.stat(file)
+    old_path = get_object_db_snapshot_path(_get_data_fingerprint())
+    try:
+        os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        new_path = get_object_db_snapshot_path(_get_data_fingerprint())
+        assert new_path != old_path
+        startup_ms()
+        assert os.path.exists(new_path) and not os.path.exists(old_path)
+    finally:
+        os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    startup_ms()
+    print("the snapshot has the tables of the data files and is rebuilt when they change")
+    check_concurrent_load()
+    print("the threads touching a table while it is loaded all get it")
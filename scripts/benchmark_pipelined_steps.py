@@ -0,0 +1,79 @@
+# Compare Controller.collect_trajectory (pipelined: the next step is sent while the image is decoded) with the previous sequential loop,
+# using the pure-Python stand-in client (no GPU needed). It also checks that both give the same trajectories.
+from legent import Environment, ResetInfo, Controller
+from legent.dataset.controller import TrajectoryNotValidError
+from legent.dataset.trajectory import Trajectory
+from legent.dataset.eval import task_done
+from legent.environment.fake_client import launch_fake_client
+import numpy as np
+import time
+
+TRAJECTORIES = 10
+SCENE = {"instances": [], "player": {"position": [30, 0.05, 30], "rotation": [0, 0, 0]}, "agent": {"position": [0, 0.05, 0], "rotation": [0, 180, 0]}}
+TASK = {"task": "Come here.", "solution": ["goto_user()"]}
+
+
+class SequentialController(Controller):
+    def collect_trajectory(self, task_setting, traj_id=None, add_finish_action=True, return_invalid=False):
+        traj = Trajectory(traj_id, task_setting)
+
+        obs = self.env.step()
+        for i in range(40):
+            try:
+                action = self.get_next_action(obs)
+            except TrajectoryNotValidError:
+                break
+            if (action is not None) or add_finish_action:
+                traj.add_image(obs.image)
+                traj.add_action(action)
+            if action is None:
+                done = True
+                task_type = task_setting["task"].split(" ")[0].lower()
+                if task_type == "come":
+                    done, info = task_done(task_type, action, obs, task_setting)
+                if done:
+                    return traj
+                break
+            obs = self.env.step(action)
+        if return_invalid:
+            return traj
+        return None
+
+
+def collect(controller_class, resolution, port):
+    client = launch_fake_client(port)
+    env = Environment(env_path=None, camera_resolution_width=resolution, camera_resolution_height=resolution, use_animation=False, run_options={"port": port})
+    trajectories = []
+    try:
+        start = time.perf_counter()
+        for _ in range(TRAJECTORIES):
+            env.reset(ResetInfo(scene=SCENE))
+            trajectories.append(controller_class(env, TASK["solution"]).collect_trajectory(TASK))
+        elapsed = time.perf_counter() - start
+    finally:
+        env.close()
+        client.join()
+    return trajectories, elapsed
+
+
+def assert_same(a, b):
+    assert a.steps == b.steps
+    for x, y in zip(a.actions, b.actions):
+        assert vars(x) == vars(y), (vars(x), vars(y))
+    for x, y in zip(a.images, b.images):
+        assert np.array_equal(x, y)
+
+
+if __name__ == "__main__":
+    port = 50700
+    print(f"{'resolution':>12}{'loop':>14}{'steps':>8}{'ms/step':>10}")
+    for resolution in [448, 1024]:
+        results = {}
+        for name, controller_class in [("sequential", SequentialController), ("pipelined", Controller)]:
+            results[name] = collect(controller_class, resolution, port)
+            port += 1
+        for a, b in zip(results["sequential"][0], results["pipelined"][0]):
+            assert_same(a, b)
+        for name, (trajectories, elapsed) in results.items():
+            steps = sum(traj.steps for traj in trajectories)
+            print(f"{f'{resolution}x{resolution}':>12}{name:>14}{steps:>8}{elapsed / steps * 1000:>10.2f}")
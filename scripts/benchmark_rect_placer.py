@@ -0,0 +1,103 @@
+# Compare the array-backed RectPlacer with the pyqtree index it replaced, at 10, 100 and 1000 placed rectangles: the time of
+# place_rectangle (a query and an insert), of a query alone, and of a batch of CANDIDATES candidates tested with place_many
+# against the former one query per candidate until one is free. It also checks that both give the same answers, that
+# place_many places the first free candidate, and that remove undoes a placement. The environment data is not needed.
+from legent.server.rect_placer import RectPlacer
+import random
+import time
+
+import numpy as np
+from pyqtree import Index
+
+SIZES = [10, 100, 1000]
+BBOX = (0, 0, 100, 100)
+QUERIES = 2000
+CANDIDATES = 32
+
+
+class PyqtreePlacer:
+    """The former RectPlacer."""
+
+    def __init__(self, bbox):
+        self.spindex = Index(bbox=bbox)
+
+    def place_rectangle(self, name, bbox):
+        if self.spindex.intersect(bbox):
+            return False
+        self.spindex.insert(name, bbox)
+        return True
+
+    def place_many(self, name, candidates):
+        for i, bbox in enumerate(candidates):
+            if self.place_rectangle(name, tuple(bbox)):
+                return i
+        return None
+
+
+def random_rects(rng, n, size):
+    rects = []
+    for _ in range(n):
+        x, z = rng.uniform(BBOX[0], BBOX[2]), rng.uniform(BBOX[1], BBOX[3])
+        x_size, z_size = rng.uniform(0.2, 1) * size, rng.uniform(0.2, 1) * size
+        rects.append((x - x_size / 2, z - z_size / 2, x + x_size / 2, z + z_size / 2))
+    return rects
+
+
+def local_rects(rng, n, size):
+    """Candidates of size / 4 drawn in a square of 2 * size, as a caller draws them on a surface or a floor cell."""
+    x, z = rng.uniform(BBOX[0], BBOX[2] - 2 * size), rng.uniform(BBOX[1], BBOX[3] - 2 * size)
+    rects = []
+    for _ in range(n):
+        cx, cz = x + rng.uniform(0, 2 * size), z + rng.uniform(0, 2 * size)
+        rects.append((cx - size / 8, cz - size / 8, cx + size / 8, cz + size / 8))
+    return rects
+
+
+def fill(placer, rects, n):
+    """Place the rectangles until n of them are placed, returning the time per place_rectangle."""
+    placed = attempts = 0
+    start = time.perf_counter()
+    for i, bbox in enumerate(rects):
+        attempts += 1
+        placed += placer.place_rectangle(i, bbox)
+        if placed == n:
+            break
+    assert placed == n, "not enough room"
+    return (time.perf_counter() - start) / attempts * 1e6
+
+
+def timed(function, args):
+    start = time.perf_counter()
+    results = [function(*arg) for arg in args]
+    return (time.perf_counter() - start) / len(args) * 1e6, results
+
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    print(f"{'rects':>6}{'place pyqtree us':>18}{'array us':>10}{'query pyqtree us':>18}{'array us':>10}{'batch pyqtree us':>18}{'array us':>10}")
+    for n in SIZES:
+        size = 100 / np.sqrt(n) / 2  # the placed rectangles cover about a fifth of the bbox
+        rects = random_rects(rng, 20 * n, size)
+        old, new = PyqtreePlacer(BBOX), RectPlacer(BBOX)
+        old_place, new_place = fill(old, rects, n), fill(new, rects, n)
+
+        queries = [(bbox,) for bbox in random_rects(rng, QUERIES, size)]
+        old_query, old_results = timed(old.spindex.intersect, queries)
+        new_query, new_results = timed(new.intersect, queries)
+        assert [sorted(result) for result in old_results] == [sorted(result) for result in new_results]
+
+        batches = [(f"batch{i}", np.array(local_rects(rng, CANDIDATES, size))) for i in range(QUERIES // 10)]
+        old_batch, old_indices = timed(old.place_many, batches)
+        new_batch, new_indices = timed(new.place_many, batches)
+        assert old_indices == new_indices
+        print(f"{n:>6}{old_place:>18.1f}{new_place:>10.1f}{old_query:>18.1f}{new_query:>10.1f}{old_batch:>18.1f}{new_batch:>10.1f}")
+
+    # place_many places the first free candidate, free_mask tells which ones are free, remove undoes a placement.
+    placer = RectPlacer(BBOX)
+    assert placer.place_rectangle("a", (0, 0, 2, 2))
+    candidates = np.array([(1, 1, 3, 3), (2, 0, 4, 2), (5, 5, 6, 6), (7, 7, 8, 8)])
+    assert placer.free_mask(candidates).tolist() == [False, False, True, True]
+    assert placer.place_many("b", candidates) == 2 and placer.intersect((5.5, 5.5, 5.6, 5.6)) == ["b"]
+    assert placer.remove("b") and placer.place_rectangle("c", (5, 5, 6, 6)) and not placer.remove("b")
+    assert placer.remove("a", (0, 0, 2, 2)) and placer.place_rectangle("d", (1, 1, 3, 3)) and placer.spindex.intersect((0, 0, 1, 1)) == ["d"]
+    print("the array-backed RectPlacer gives the answers of pyqtree, and remove undoes a placement")
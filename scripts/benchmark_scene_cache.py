@@ -0,0 +1,65 @@
+# Compare generate_scene(seed=...) with a cold and a warm scene cache (in a temporary directory), and check that the cached
+# scenes are the same as the generated ones, that the eviction keeps the recently read scenes within max_bytes, and that
+# processes storing and reading the same keys at the same time only see complete scenes. The environment data is needed.
+from legent import generate_scene
+from legent.server.scene_cache import SceneCache, get_scene_key, set_default_scene_cache
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import tempfile
+import time
+
+SEEDS = 20
+PROCESSES = 4
+
+
+def timed(seeds, room_num):
+    start = time.perf_counter()
+    scenes = [generate_scene(room_num=room_num, seed=seed, use_cache=True) for seed in seeds]
+    return scenes, (time.perf_counter() - start) / len(seeds) * 1000
+
+
+def check_eviction(cache_dir):
+    cache = SceneCache(cache_dir, max_bytes=10 * 1024)
+    scene = {"instances": [{"prefab": "x" * 100}] * 10}  # about 1.3 KB
+    keys = [get_scene_key(seed, 1, {}, {}, "test") for seed in range(20)]
+    for i, key in enumerate(keys):
+        cache.put(key, scene)
+        time.sleep(0.01)  # distinct modification times
+        cache.get(keys[0])  # keep the first scene recently used
+    stats = cache.stats()
+    assert stats["bytes"] <= cache.max_bytes and stats["evictions"] > 0
+    assert cache.get(keys[0]) == scene and cache.get(keys[-1]) == scene and cache.get(keys[1]) is None
+    print(f"eviction: {stats['scenes']} scenes, {stats['bytes']} bytes of at most {cache.max_bytes}, {stats['evictions']} evicted")
+
+
+def hammer(cache_dir, worker):
+    cache = SceneCache(cache_dir)
+    complete = 0
+    for i in range(200):
+        key = get_scene_key(i % 5, 1, {}, {}, "test")
+        cache.put(key, {"worker": worker, "payload": "y" * (1000 * (worker + 1))})
+        scene = cache.get(key)
+        complete += scene is not None and scene["payload"] == "y" * (1000 * (scene["worker"] + 1))
+    return complete
+
+
+if __name__ == "__main__":
+    seeds = list(range(SEEDS))
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SceneCache(os.path.join(tmp, "scenes"))
+        set_default_scene_cache(cache)
+        print(f"{'rooms':>6}{'cold ms':>10}{'warm ms':>10}{'speedup':>9}")
+        for room_num in [1, 2, 4]:
+            cold, cold_ms = timed(seeds, room_num)
+            warm, warm_ms = timed(seeds, room_num)
+            assert [json.dumps(scene) for scene in cold] == [json.dumps(scene) for scene in warm]
+            print(f"{room_num:>6}{cold_ms:>10.1f}{warm_ms:>10.2f}{cold_ms / warm_ms:>9.0f}")
+        print("the cached scenes are the same as the generated ones")
+        print(cache.stats())
+
+        check_eviction(os.path.join(tmp, "eviction"))
+        with ProcessPoolExecutor(PROCESSES) as executor:
+            complete = list(executor.map(hammer, [os.path.join(tmp, "shared")] * PROCESSES, range(PROCESSES)))
+        assert complete == [200] * PROCESSES
+        print(f"{PROCESSES} processes read {sum(complete)} complete scenes while storing the same keys")
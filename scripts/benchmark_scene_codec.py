@@ -0,0 +1,56 @@
+# Compare the binary scene format of legent.utils.scene_codec with the indent=4 JSON of store_json: the size of the scene
+# files and the time to load them, for generated scenes of several room numbers. It also checks that the round trip is
+# lossless (the JSON of the decoded scene is the JSON of the scene) and that convert_scenes converts a directory both ways.
+# The environment data is needed.
+from legent import generate_scene, load_json, store_json, load_scene, store_scene
+from legent.server.scene_cache import set_default_scene_cache
+from legent.utils.scene_codec import convert_scenes
+import json
+import os
+import tempfile
+import time
+
+SCENES = 10
+ROOM_NUMS = [1, 3, 5]
+LOADS = 20
+
+
+def load_ms(files, load):
+    start = time.perf_counter()
+    for _ in range(LOADS):
+        for file in files:
+            load(file)
+    return (time.perf_counter() - start) / LOADS / len(files) * 1000
+
+
+if __name__ == "__main__":
+    set_default_scene_cache(None)
+    print(f"{'rooms':>6}{'JSON KB':>9}{'binary KB':>11}{'ratio':>7}{'load JSON ms':>14}{'binary ms':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for room_num in ROOM_NUMS:
+            json_dir = os.path.join(tmp, f"json_{room_num}")
+            binary_dir = os.path.join(tmp, f"binary_{room_num}")
+            os.makedirs(json_dir)
+            scenes = [generate_scene(room_num=room_num, seed=seed) for seed in range(SCENES)]
+            for seed, scene in enumerate(scenes):
+                store_json(scene, os.path.join(json_dir, f"scene_{seed}.json"))
+            json_files = sorted(os.path.join(json_dir, file) for file in os.listdir(json_dir))
+            binary_files = convert_scenes(json_dir, binary_dir, to="binary")
+            assert len(binary_files) == SCENES
+
+            for json_file, binary_file in zip(json_files, binary_files):
+                assert json.dumps(load_scene(binary_file)) == json.dumps(load_json(json_file))
+            for scene in scenes:
+                store_scene(scene, os.path.join(tmp, "scene.lscene"))
+                assert json.dumps(load_scene(os.path.join(tmp, "scene.lscene"))) == json.dumps(scene)
+
+            back_dir = os.path.join(tmp, f"back_{room_num}")
+            for json_file, back_file in zip(json_files, convert_scenes(binary_dir, back_dir, to="json")):
+                with open(json_file, "rb") as f, open(back_file, "rb") as g:
+                    assert f.read() == g.read()
+
+            json_kb = sum(os.path.getsize(file) for file in json_files) / SCENES / 1024
+            binary_kb = sum(os.path.getsize(file) for file in binary_files) / SCENES / 1024
+            json_ms, binary_ms = load_ms(json_files, load_json), load_ms(binary_files, load_scene)
+            print(f"{room_num:>6}{json_kb:>9.1f}{binary_kb:>11.1f}{json_kb / binary_kb:>7.1f}{json_ms:>14.3f}{binary_ms:>11.3f}")
+    print("the round trips are lossless")
@@ -0,0 +1,70 @@
+# Compare the reset latency of Environment.reset() with synchronous generate_scene() and with a ScenePrefetcher,
+# using the pure-Python stand-in client (no GPU needed, but the environment data is needed for the scene generation).
+# Each episode runs EPISODE_STEPS steps, during which the prefetcher generates the next scenes in the background.
+# It also checks that two prefetchers with the same seed give the same scenes, and that the prefetched scenes are stored in
+# the scene cache. The scene cache is not used otherwise, so that the scenes are generated.
+from legent import Environment, ScenePrefetcher, generate_scene
+from legent.environment.fake_client import launch_fake_client
+from legent.server.scene_cache import SceneCache, set_default_scene_cache
+from multiprocessing import get_context
+import json
+import os
+import tempfile
+import time
+
+EPISODES = 10
+EPISODE_STEPS = 100
+
+
+def run(scene_source, port):
+    client = launch_fake_client(port, round_trip_latency=0.01)
+    env = Environment(env_path=None, camera_resolution_width=64, camera_resolution_height=64, frame_transport="shm", scene_source=scene_source, run_options={"port": port})
+    reset_seconds = 0.0
+    try:
+        start = time.perf_counter()
+        for _ in range(EPISODES):
+            reset_start = time.perf_counter()
+            env.reset()
+            reset_seconds += time.perf_counter() - reset_start
+            for _ in range(EPISODE_STEPS):
+                env.step()
+        elapsed = time.perf_counter() - start
+    finally:
+        env.close()
+        client.join()
+    return reset_seconds / EPISODES * 1000, elapsed
+
+
+def check_determinism():
+    with ScenePrefetcher(num_workers=2, queue_size=3, seed=123, room_num=2, use_cache=False) as a, ScenePrefetcher(num_workers=1, queue_size=1, seed=123, room_num=2, use_cache=False) as b:
+        for _ in range(4):
+            assert json.dumps(a.get()) == json.dumps(b.get())
+    print("prefetchers with the same seed give the same scenes")
+
+
+def check_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SceneCache(os.path.join(tmp, "scenes"))
+        set_default_scene_cache(cache)  # inherited by the forked workers
+        try:
+            with ScenePrefetcher(num_workers=1, queue_size=1, seed=123, room_num=2, mp_context=get_context("fork")) as prefetcher:
+                scene = prefetcher.get()
+            assert json.dumps(generate_scene(room_num=2, seed=prefetcher.slot_seed(0))) == json.dumps(scene) and cache.hits == 1
+        finally:
+            set_default_scene_cache(None)
+    print("the prefetched scenes are stored in the scene cache")
+
+
+if __name__ == "__main__":
+    check_determinism()
+    check_cache()
+    port = 50800
+    print(f"{'scene source':>24}{'reset ms':>12}{'total s':>10}{'starved':>10}{'mean depth':>12}")
+    reset_ms, elapsed = run(None, port)
+    print(f"{'generate_scene':>24}{reset_ms:>12.1f}{elapsed:>10.2f}{'':>10}{'':>12}")
+    for num_workers in [1, 2]:
+        port += 1
+        with ScenePrefetcher(num_workers=num_workers, queue_size=4, seed=0, use_cache=False) as prefetcher:
+            reset_ms, elapsed = run(prefetcher, port)
+            stats = prefetcher.stats()
+        print(f"{f'ScenePrefetcher({num_workers})':>24}{reset_ms:>12.1f}{elapsed:>10.2f}{stats['starved']:>10}{stats['mean_queue_depth']:>12.2f}")
@@ -0,0 +1,169 @@
+# Compare the placement of dense object_counts (e.g. 50 oranges) by add_small_objects with the former placement, which drew
+# MAX_PLACE_ON_SURFACE_RETRIES=10 positions one by one per surface and tested each against a pyqtree of all the small objects:
+# the share of the calls that place every object (the former one raised "Failed to place object"), the number of surfaces per
+# call on which no drawn position was free (so the object went to another surface), and the time per call. It also checks
+# that the placed objects do not overlap (with their margins) and lie on the surfaces of their receptacles, including when
+# receptacle_object_counts and object_counts place objects on the same table. The environment data is needed.
+from legent.scene_generation.objects import get_default_object_db
+from legent.scene_generation import small_objects as small_objects_module
+from legent.scene_generation.small_objects import SMALL_OBJECT_MIN_MARGIN, add_small_objects, prefab_fit_surface
+import contextlib
+import io
+import random
+import time
+
+import numpy as np
+from pyqtree import Index
+
+TRIALS = 20
+RECEPTACLES = ["table", "kitchen_table", "dresser", "shelf"] * 8  # enough surfaces for the objects under MAX_OBJECT_NUM_ON_RECEPTACLE
+OBJECT_COUNTS = [10, 25, 50]
+OBJECT_TYPES = ["orange", "book"]
+MAX_PLACE_ON_SURFACE_RETRIES = 10
+SHARED_TABLE_SEEDS = 200
+
+
+def make_receptacles(odb, rng):
+    """A receptacle of each of RECEPTACLES side by side, each rotated by 0, 90, 180 or 270 degrees, as object instances of room 0."""
+    objects = []
+    for i, object_type in enumerate(RECEPTACLES):
+        prefab = rng.choice(odb.OBJECT_DICT[object_type])
+        objects.append({"prefab": prefab, "position": [i * 4, 0, 0], "rotation": [0, rng.choice([0, 90, 180, 270]), 0], "room_id": 0, "is_receptacle": True})
+    return objects
+
+
+def legacy_add_small_objects(objects, odb, object_counts, rng, np_rng):
+    """The object_counts branch of the former add_small_objects, returning the number of objects it failed to place and the
+    number of surfaces on which the retries ran out."""
+    index = Index(bbox=(-10, -10, 4 * len(RECEPTACLES) + 10, 10))
+    surfaces = [{"receptacle": receptacle, "surface": surface, "small_object_num": 0} for receptacle in objects for surface in odb.PREFABS[receptacle["prefab"]]["placeable_surfaces"]]
+    failed = exhausted = 0
+    for k, v in object_counts.items():
+        for _ in range(v):
+            rng.shuffle(surfaces)
+            prefab = odb.PREFABS[k]
+            success_flag = False
+            for surface in surfaces:
+                if prefab_fit_surface(prefab["size"], surface, surface):
+                    receptacle = surface["receptacle"]
+                    unrotated = receptacle["rotation"][1] == 0 or receptacle["rotation"][1] == 180
+                    s = surface["surface"]
+                    x_min, x_max = (s["x_min"], s["x_max"]) if unrotated else (s["z_min"], s["z_max"])
+                    z_min, z_max = (s["z_min"], s["z_max"]) if unrotated else (s["x_min"], s["x_max"])
+                    x_margin = prefab["size"]["x"] / 2 + SMALL_OBJECT_MIN_MARGIN
+                    z_margin = prefab["size"]["z"] / 2 + SMALL_OBJECT_MIN_MARGIN
+                    for _ in range(MAX_PLACE_ON_SURFACE_RETRIES):
+                        x = np_rng.uniform(x_min + receptacle["position"][0] + x_margin, x_max + receptacle["position"][0] - x_margin)
+                        z = np_rng.uniform(z_min + receptacle["position"][2] + z_margin, z_max + receptacle["position"][2] - z_margin)
+                        bbox = (x - x_margin, z - z_margin, x + x_margin, z + z_margin)
+                        if not index.intersect(bbox):
+                            index.insert(k, bbox)
+                            surface["small_object_num"] += 2  # the surface is its own receptacle in this branch
+                            success_flag = True
+                            break
+                    if success_flag:
+                        break
+                    exhausted += 1
+            failed += not success_flag
+    return failed, exhausted
+
+
+def counted_place_on_surface(*args):
+    position = place_on_surface(*args)
+    counted_place_on_surface.exhausted += position is None
+    return position
+
+
+def overlap(small_objects, odb):
+    """Whether two of the small objects overlap, with their margins."""
+    rects = []
+    for small_object in small_objects:
+        size = odb.PREFABS[small_object["prefab"]]["size"]
+        x, _, z = small_object["position"]
+        half_x, half_z = size["x"] / 2 + SMALL_OBJECT_MIN_MARGIN, size["z"] / 2 + SMALL_OBJECT_MIN_MARGIN
+        for other in rects:
+            if x - half_x <= other[2] and x + half_x >= other[0] and z - half_z <= other[3] and z + half_z >= other[1]:
+                return True
+        rects.append((x - half_x, z - half_z, x + half_x, z + half_z))
+    return False
+
+
+def shared_table_overlaps(odb):
+    """The number of seeds for which the oranges of receptacle_object_counts and of object_counts overlap on a single table of
+    about 1.2 m, given both as an object instance and as a specified receptacle instance, and the number of seeds for which
+    the orange of object_counts does not fit next to the others."""
+    prefab = min(odb.OBJECT_DICT["table"], key=lambda prefab: abs(max(odb.PREFABS[prefab]["size"]["x"], odb.PREFABS[prefab]["size"]["z"]) - 1.2))
+    table = {"prefab": prefab, "position": [0, 0, 0], "rotation": [0, 0, 0], "room_id": 0, "is_receptacle": True}
+    overlaps = failed = 0
+    for seed in range(SHARED_TABLE_SEEDS):
+        try:
+            small_objects = add_small_objects(
+                [table],
+                odb,
+                {0: None},
+                object_counts={"Orange_01": 1},
+                specified_object_instances=[dict(table, receptacle_type="table")],
+                receptacle_object_counts={"table": {"count": 1, "objects": [{"orange": 2}]}},
+                rng=random.Random(seed),
+                np_rng=np.random.RandomState(seed),
+            )
+        except Exception:  # "Failed to place object"
+            failed += 1
+            continue
+        overlaps += overlap(small_objects, odb)
+    return overlaps, failed
+
+
+def check(small_objects, objects, odb):
+    assert not overlap(small_objects, odb), "overlap"
+    for small_object in small_objects:
+        size = odb.PREFABS[small_object["prefab"]]["size"]
+        x, _, z = small_object["position"]
+        half_x, half_z = size["x"] / 2 + SMALL_OBJECT_MIN_MARGIN, size["z"] / 2 + SMALL_OBJECT_MIN_MARGIN
+        on_surface = False
+        for receptacle in (receptacle for receptacle in objects if receptacle["prefab"] == small_object["parent"]):
+            position = receptacle["position"]
+            for x_min, x_max, z_min, z_max, _ in odb.get_surface_rects(receptacle["prefab"], receptacle["rotation"][1]):
+                on_surface |= x_min + position[0] <= x - half_x + 1e-9 and x + half_x <= x_max + position[0] + 1e-9 and z_min + position[2] <= z - half_z + 1e-9 and z + half_z <= z_max + position[2] + 1e-9
+        assert on_surface, "off the surfaces"
+
+
+if __name__ == "__main__":
+    odb = get_default_object_db()
+    place_on_surface = small_objects_module.place_on_surface
+    small_objects_module.place_on_surface = counted_place_on_surface
+    print(f"{'type':>7}{'objects':>8}{'former ok':>11}{'surfaces':>10}{'ms':>7}{'new ok':>8}{'surfaces':>10}{'ms':>7}")
+    for object_type in OBJECT_TYPES:
+        for count in OBJECT_COUNTS:
+            results = {"former": [0, 0, 0.0], "new": [0, 0, 0.0]}
+            for trial in range(TRIALS):
+                prefab = random.Random(trial).choice(odb.OBJECT_DICT[object_type])
+                objects = make_receptacles(odb, random.Random(trial))
+
+                start = time.perf_counter()
+                failed, exhausted = legacy_add_small_objects(objects, odb, {prefab: count}, random.Random(trial), np.random.RandomState(trial))
+                results["former"][2] += time.perf_counter() - start
+                results["former"][0] += failed == 0
+                results["former"][1] += exhausted
+
+                counted_place_on_surface.exhausted = 0
+                start = time.perf_counter()
+                try:
+                    with contextlib.redirect_stdout(io.StringIO()):  # "Failed to place object"
+                        small_objects = add_small_objects(objects, odb, {0: None}, object_counts={prefab: count}, rng=random.Random(trial), np_rng=np.random.RandomState(trial))
+                    results["new"][0] += 1
+                except Exception:
+                    small_objects = None
+                results["new"][2] += time.perf_counter() - start
+                results["new"][1] += counted_place_on_surface.exhausted
+                if small_objects is not None:
+                    assert len(small_objects) == count
+                    check(small_objects, objects, odb)
+            row = "".join(f"{ok / TRIALS:>{w}.0%}{exhausted / TRIALS:>10.2f}{seconds / TRIALS * 1000:>7.2f}" for (ok, exhausted, seconds), w in zip(results.values(), [11, 8]))
+            print(f"{object_type:>7}{count:>8}{row}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        overlaps, failed = shared_table_overlaps(odb)
+    print(f"shared table: the third orange did not fit for {failed} of {SHARED_TABLE_SEEDS} seeds")
+    assert overlaps == 0, f"the oranges overlap on the shared table for {overlaps} of {SHARED_TABLE_SEEDS} seeds"
+    print("the placed small objects do not overlap and lie on the surfaces of their receptacles")
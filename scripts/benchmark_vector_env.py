@@ -0,0 +1,52 @@
+# Step several environments together with VectorEnvironment, using the pure-Python stand-in clients (no GPU needed). It also
+# checks that the infos give the game states of each environment and that latency_stats counts every step, including the
+# steps that end an episode.
+from legent import VectorEnvironment, Action
+from legent.environment.fake_client import launch_fake_client
+import time
+
+STEPS = 100
+BASE_PORT = 50500
+
+
+def scene_source(env_id):
+    return {"instances": [], "player": {"position": [0, 0.05, 0], "rotation": [0, 0, 0]}, "agent": {"position": [env_id, 0.05, 2], "rotation": [0, 180, 0]}}
+
+
+def benchmark(num_envs, port):
+    clients = [launch_fake_client(port + i) for i in range(num_envs)]
+    env = VectorEnvironment(num_envs, run_options={"port": port}, scene_source=scene_source, max_episode_steps=30)
+    try:
+        images, infos = env.reset()
+        assert images.shape == (num_envs, 448, 448, 3)
+        assert [info["observation"].game_states["agent"]["position"]["x"] for info in infos] == list(range(num_envs))
+        start = time.perf_counter()
+        episodes = 0
+        for _ in range(STEPS):
+            images, infos = env.step([Action(move_forward=1, rotate_right=5) for _ in range(num_envs)])
+            episodes += sum(info["done"] for info in infos)
+        elapsed = time.perf_counter() - start
+        assert episodes == num_envs * (STEPS // 30)
+        assert all(stats["count"] == STEPS for stats in env.latency_stats())
+
+        # Async mode: keep every environment busy and handle the observations as they come.
+        env.step_async({i: Action(move_forward=1) for i in range(num_envs)})
+        for _ in range(STEPS):
+            env_ids, images, infos = env.step_wait()
+            env.step_async({env_id: Action(move_forward=1) for env_id in env_ids})
+        latency = env.latency_stats()
+    finally:
+        env.close()
+        for client in clients:
+            client.join()
+    return elapsed, latency
+
+
+if __name__ == "__main__":
+    port = BASE_PORT
+    print(f"{'envs':>6}{'env steps/s':>14}{'worker ms/step (mean of workers)':>36}")
+    for num_envs in [1, 2, 4]:
+        elapsed, latency = benchmark(num_envs, port)
+        port += num_envs
+        mean_latency = sum(stats["mean"] for stats in latency) / num_envs
+        print(f"{num_envs:>6}{num_envs * STEPS / elapsed:>14.1f}{mean_latency * 1000:>36.2f}")
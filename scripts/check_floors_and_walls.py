@@ -0,0 +1,334 @@
+# Check that HouseGenerator.add_floors_and_walls emits the same instances (and the same door rectangles in the placer) as the
+# previous cell-by-cell implementation, which is copied below, on random floorplans of the ROOM_SPEC_SAMPLER specs with all the
+# combinations of add_ceiling and remove_out_walls, and compare their speed. The environment data is needed.
+from legent.scene_generation.doors import default_add_doors
+from legent.scene_generation.generator import DEFAULT_WALL_PREFAB, HouseGenerator, log
+from legent.scene_generation.objects import get_default_object_db
+from legent.scene_generation.room_spec import ROOM_SPEC_SAMPLER
+from legent.server.rect_placer import RectPlacer
+import copy
+import json
+import numpy as np
+import random
+import time
+
+HOUSES = 50
+
+
+class RecordingPlacer(RectPlacer):
+    def __init__(self, bbox):
+        super().__init__(bbox)
+        self.inserted = []
+
+    def insert(self, name, bbox):
+        self.inserted.append((name, bbox))
+        super().insert(name, bbox)
+
+
+def reference_add_floors_and_walls(
+    self,
+    house_structure,
+    room_spec,
+    odb,
+    prefabs,
+    add_ceiling = True,
+    remove_out_walls = False
+):
+    room_num = len(room_spec.room_type_map)
+    room_ids = set(room_spec.room_type_map.keys())
+    # room2wall = {i: np.random.choice(odb.MY_OBJECTS["wall"][:]) for i in room_ids}
+    room2wall = {i: DEFAULT_WALL_PREFAB for i in room_ids}
+    DOOR_PREFAB = odb.MY_OBJECTS["door"][0]
+    door_x_size = prefabs[DOOR_PREFAB]["size"]["x"]
+    door_y_size = prefabs[DOOR_PREFAB]["size"]["y"]
+    door_z_size = prefabs[DOOR_PREFAB]["size"]["z"]
+    log(
+        f"door_x_size: {door_x_size}, door_y_size: {door_y_size}, door_z_size: {door_z_size}"
+    )
+
+    WALL_PREFAB = room2wall[random.choice(list(room2wall.keys()))]
+    wall_x_size, wall_y_size, wall_z_size = (
+        prefabs[WALL_PREFAB]["size"]["x"],
+        prefabs[WALL_PREFAB]["size"]["y"],
+        prefabs[WALL_PREFAB]["size"]["z"],
+    )
+    log(
+        f"wall_x_size: {wall_x_size}, wall_y_size: {wall_y_size}, wall_z_size: {wall_z_size}"
+    )
+    room2wall.update({0: DEFAULT_WALL_PREFAB})
+    room2floor = {i: np.random.choice(odb.MY_OBJECTS["floor"]) for i in room_ids}
+    FLOOR_PREFAB = room2floor[random.choice(list(room2floor.keys()))]
+    floor_x_size, floor_y_size, floor_z_size = (
+        prefabs[FLOOR_PREFAB]["size"]["x"],
+        prefabs[FLOOR_PREFAB]["size"]["y"],
+        prefabs[FLOOR_PREFAB]["size"]["z"],
+    )
+    log(
+        f"floor_x_size: {floor_x_size}, floor_y_size: {floor_y_size}, floor_z_size: {floor_z_size}"
+    )
+    floors = house_structure.floorplan
+    # convert 1 in floors to 0
+    floors = np.where(floors == 1, 0, floors)
+    log(f"floors:\n{floors}")
+
+    doors = default_add_doors(odb, room_spec, house_structure)
+    log(f"doors: {doors}")
+    door_positions = set(doors.values())
+
+    floor_instances = []
+    # generate walls based on the 0-1 boundaries
+    for i in range(floors.shape[0]):
+        for j in range(floors.shape[1]):
+            if floors[i][j] != 0:
+                FLOOR_PREFAB = room2floor[floors[i][j]]
+
+                x, z = (i + 0.5 - 1) * self.unit_size, (
+                    j + 0.5 - 1
+                ) * self.unit_size
+                floor_instances.append(
+                    {
+                        "prefab": FLOOR_PREFAB,
+                        "position": [x, -floor_y_size / 2, z],
+                        "rotation": [0, 90, 0],
+                        "scale": [self.scale_ratio, 1, self.scale_ratio],
+                        "type": "kinematic",
+                    }
+                )
+                # add ceiling
+                if add_ceiling:
+                    floor_instances.append(
+                        {
+                            "prefab": FLOOR_PREFAB,
+                            "position": [x, wall_y_size + floor_y_size / 2, z],
+                            "rotation": [0, 90, 0],
+                            "scale": [self.scale_ratio, 1, self.scale_ratio],
+                            "type": "kinematic",
+                        }
+                    )
+
+            WALL_PREFAB = room2wall[floors[i][j]]
+            wall_x_size, wall_y_size, wall_z_size = (
+                prefabs[WALL_PREFAB]["size"]["x"],
+                prefabs[WALL_PREFAB]["size"]["y"],
+                prefabs[WALL_PREFAB]["size"]["z"],
+            )
+
+            WALL_WITH_DOOR_PREFAB = WALL_PREFAB[:-1] + "2"
+
+            DOOR_SCALE = [self.scale_ratio, 1, 1]
+            a = floors[i][j]
+            if i < floors.shape[0] - 1:
+                a_col = floors[i + 1][j]
+                if remove_out_walls and (a==0 or a_col==0):
+                    continue
+
+                if a != a_col:
+                    x = i + 1 - 1
+                    z = j + 0.5 - 1
+                    y_rot = 90
+
+                    x = x * self.unit_size
+                    z = z * self.unit_size
+
+                    left_x = x - wall_z_size / 4
+                    right_x = x + wall_z_size / 4
+
+                    left_wall_prefab = room2wall[floors[i][j]]
+                    right_wall_prefab = room2wall[floors[i + 1][j]]
+
+                    scale = [self.scale_ratio, 1, 0.5]
+                    left_scale = [
+                        self.scale_ratio,
+                        self.align_wall_height_scale(left_wall_prefab),
+                        0.5,
+                    ]
+                    right_scale = [
+                        self.scale_ratio,
+                        self.align_wall_height_scale(right_wall_prefab),
+                        0.5,
+                    ]
+
+                    left_wall_with_door_prefab = left_wall_prefab[:-1] + "2"
+                    right_wall_with_door_prefab = right_wall_prefab[:-1] + "2"
+
+                    left_rotation = 270
+                    right_rotation = 90
+                    door_rotation = 270
+
+                    door = None
+                    if ((i, j), (i + 1, j)) in door_positions:
+                        left_wall = self.format_object(
+                            left_wall_with_door_prefab,
+                            (left_x, 1.5, z),
+                            left_rotation,
+                            left_scale,
+                        )
+                        right_wall = self.format_object(
+                            right_wall_with_door_prefab,
+                            (right_x, 1.5, z),
+                            right_rotation,
+                            right_scale,
+                        )
+                        door = self.format_object(
+                            DOOR_PREFAB,
+                            (x, door_y_size / 2, z),
+                            door_rotation,
+                            DOOR_SCALE,
+                        )
+                    else:
+                        left_wall = self.format_object(
+                            left_wall_prefab,
+                            (left_x, 1.5, z),
+                            left_rotation,
+                            left_scale,
+                        )
+                        right_wall = self.format_object(
+                            right_wall_prefab,
+                            (right_x, 1.5, z),
+                            right_rotation,
+                            right_scale,
+                        )
+
+                    if floors[i][j] != 0:
+                        floor_instances.append(left_wall)
+                    if floors[i + 1][j] != 0:
+                        floor_instances.append(right_wall)
+                    if door:
+                        floor_instances.append(door)
+                        door_size = prefabs[DOOR_PREFAB]["size"]
+                        door_bbox = (
+                            x - door_size["x"] / 2 - 1.0,
+                            z - door_size["z"] / 2 - 0.3,
+                            x + door_size["x"] / 2 + 1.2,  # 1.2 is length of door
+                            z + door_size["z"] / 2 + 0.3,
+                        )
+                        self.placer.insert(DOOR_PREFAB, door_bbox)
+
+            if j < floors.shape[1] - 1:
+                a_row = floors[i][j + 1]
+                if remove_out_walls and (a==0 or a_row==0):
+                    continue
+
+                if a != a_row:
+                    x = i + 0.5 - 1
+                    z = j + 1 - 1
+                    y_rot = 0
+
+                    x = x * self.unit_size
+                    z = z * self.unit_size
+
+                    up_z = z - wall_z_size / 4
+                    down_z = z + wall_z_size / 4
+
+                    up_wall_prefab = room2wall[floors[i][j]]
+                    down_wall_prefab = room2wall[floors[i][j + 1]]
+
+                    scale = [self.scale_ratio, 1, 0.5]
+                    up_scale = [
+                        self.scale_ratio,
+                        self.align_wall_height_scale(up_wall_prefab),
+                        0.5,
+                    ]
+                    down_scale = [
+                        self.scale_ratio,
+                        self.align_wall_height_scale(down_wall_prefab),
+                        0.5,
+                    ]
+
+                    up_wall_with_door_prefab = up_wall_prefab[:-1] + "2"
+                    down_wall_with_door_prefab = down_wall_prefab[:-1] + "2"
+
+                    door = None
+
+                    up_rotation = 180
+                    down_rotation = 0
+                    door_rotation = 180
+
+                    if ((i, j), (i, j + 1)) in door_positions:
+                        up_wall = self.format_object(
+                            up_wall_with_door_prefab,
+                            (x, 1.5, up_z),
+                            up_rotation,
+                            up_scale,
+                        )
+                        down_wall = self.format_object(
+                            down_wall_with_door_prefab,
+                            (x, 1.5, down_z),
+                            down_rotation,
+                            down_scale,
+                        )
+                        door = self.format_object(
+                            DOOR_PREFAB,
+                            (x, door_y_size / 2, z),
+                            door_rotation,
+                            DOOR_SCALE,
+                        )
+                    else:
+                        up_wall = self.format_object(
+                            up_wall_prefab,
+                            (x, 1.5, up_z),
+                            up_rotation,
+                            up_scale,
+                        )
+                        down_wall = self.format_object(
+                            down_wall_prefab,
+                            (x, 1.5, down_z),
+                            down_rotation,
+                            down_scale,
+                        )
+                    if floors[i][j] != 0:
+                        floor_instances.append(up_wall)
+                    if floors[i][j + 1] != 0:
+                        floor_instances.append(down_wall)
+                    if door:
+                        floor_instances.append(door)
+                        door_size = prefabs[DOOR_PREFAB]["size"]
+                        door_bbox = (
+                            x - door_size["x"] / 2 - 0.3,
+                            z - door_size["z"] / 2 - 1.0,
+                            x + door_size["x"] / 2 + 1.2,
+                            z + door_size["z"] / 2 + 0.3,
+                        )
+                        self.placer.insert(DOOR_PREFAB, door_bbox)
+
+    return floor_instances, floors
+
+
+def run(method, generator, house_structure, room_spec, seed, **kwargs):
+    random.seed(seed)
+    np.random.seed(seed)
+    generator.placer = RecordingPlacer((-100, -100, 100, 100))
+    odb = generator.odb
+    # NOTE: default_add_doors converts the rowcol_walls of the house structure in place
+    house_structure = copy.deepcopy(house_structure)
+    start = time.perf_counter()
+    floor_instances, floors = method(generator, house_structure, room_spec, odb, odb.PREFABS, **kwargs)
+    seconds = time.perf_counter() - start
+    return json.dumps(floor_instances), floors, generator.placer.inserted, seconds
+
+
+if __name__ == "__main__":
+    odb = get_default_object_db()
+    times = {"reference": 0.0, "vectorized": 0.0}
+    for seed in range(HOUSES):
+        random.seed(seed)
+        np.random.seed(seed)
+        room_spec = ROOM_SPEC_SAMPLER.sample()
+        generator = HouseGenerator(room_spec=room_spec, objectDB=odb)
+        try:
+            house_structure = generator.generate_structure(room_spec)
+        except Exception:
+            continue
+        for add_ceiling in [True, False]:
+            for remove_out_walls in [False, True]:
+                kwargs = {"add_ceiling": add_ceiling, "remove_out_walls": remove_out_walls}
+                expected = run(reference_add_floors_and_walls, generator, house_structure, room_spec, seed, **kwargs)
+                result = run(HouseGenerator.add_floors_and_walls, generator, house_structure, room_spec, seed, **kwargs)
+                assert expected[0] == result[0], (seed, kwargs)
+                assert (expected[1] == result[1]).all() and expected[2] == result[2]
+                times["reference"] += expected[3]
+                times["vectorized"] += result[3]
+    print("add_floors_and_walls emits the same instances as the reference implementation")
+    print(f"{'implementation':>16}{'ms per house':>14}")
+    for name, seconds in times.items():
+        print(f"{name:>16}{seconds / HOUSES / 4 * 1000:>14.3f}")
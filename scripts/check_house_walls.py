@@ -0,0 +1,131 @@
+# Check that find_walls and consolidate_walls return the same rowcol_walls and boundary_groups as the previous
+# implementations, which are copied below, on random floorplans: random room ids on a grid, random rectangles of rooms and
+# the floorplans that generate_floorplan grows for the ROOM_SPEC_SAMPLER specs. It also compares their speed on large
+# houses. It does not need the environment data.
+from legent.scene_generation.constants import OUTDOOR_ROOM_ID
+from legent.scene_generation.floorplan import InvalidFloorplan, generate_floorplan
+from legent.scene_generation.house import consolidate_walls, find_walls
+from legent.scene_generation.interior_boundaries import sample_interior_boundary
+from legent.scene_generation.room_spec import ROOM_SPEC_SAMPLER
+from collections import defaultdict
+import numpy as np
+import random
+import time
+
+FLOORPLANS = 300
+SIZES = [10, 30, 100]
+
+
+def reference_find_walls(floorplan):
+    walls = defaultdict(list)
+    for row in range(len(floorplan) - 1):
+        for col in range(len(floorplan[0]) - 1):
+            a = floorplan[row, col]
+            b = floorplan[row, col + 1]
+            if a != b:
+                walls[(int(min(a, b)), int(max(a, b)))].append(((row - 1, col), (row, col)))
+            b = floorplan[row + 1, col]
+            if a != b:
+                walls[(int(min(a, b)), int(max(a, b)))].append(((row, col - 1), (row, col)))
+    return walls
+
+
+def reference_consolidate_walls(walls):
+    out = dict()
+    for wall_group_id, wall_pairs in walls.items():
+        wall_map = dict()
+        for wall in wall_pairs:
+            if wall[0] not in wall_map:
+                wall_map[wall[0]] = set()
+            wall_map[wall[0]].add(wall[1])
+
+        did_update = True
+        while did_update:
+            did_update = False
+            for w1_1 in wall_map.copy():
+                if w1_1 not in wall_map:
+                    continue
+                break_outer = False
+                for w1_2 in wall_map[w1_1]:
+                    if w1_2 in wall_map:
+                        w2_1 = w1_2
+                        for w2_2 in wall_map[w2_1]:
+                            if w1_1[0] == w1_2[0] == w2_1[0] == w2_2[0] or w1_1[1] == w1_2[1] == w2_1[1] == w2_2[1]:
+                                wall_map[w2_1].remove(w2_2)
+                                if not wall_map[w2_1]:
+                                    del wall_map[w2_1]
+
+                                wall_map[w1_1].remove(w2_1)
+                                wall_map[w1_1].add(w2_2)
+
+                                did_update = True
+                                break_outer = True
+                                break
+                        if break_outer:
+                            break
+                    if break_outer:
+                        break
+        out[wall_group_id] = set([(w1, w2) for w1 in wall_map for w2 in wall_map[w1]])
+    return out
+
+
+def random_cells(size, rooms):
+    return np.random.randint(1, rooms + 1, size=(size, size))
+
+
+def random_rectangles(size, rooms):
+    floorplan = np.full((size, size), OUTDOOR_ROOM_ID)
+    for room_id in range(1, rooms + 1):
+        r0, c0 = np.random.randint(0, size, 2)
+        r1, c1 = r0 + np.random.randint(1, size // 2 + 2), c0 + np.random.randint(1, size // 2 + 2)
+        floorplan[r0:r1, c0:c1] = room_id
+    return floorplan
+
+
+def grown_floorplans():
+    for room_spec in ROOM_SPEC_SAMPLER.room_specs:
+        interior_boundary = sample_interior_boundary(num_rooms=len(room_spec.room_type_map), dims=None)
+        try:
+            yield generate_floorplan(room_spec=room_spec, interior_boundary=interior_boundary)
+        except InvalidFloorplan:
+            continue
+
+
+def check(floorplan):
+    floorplan = np.pad(floorplan, pad_width=1, mode="constant", constant_values=OUTDOOR_ROOM_ID)
+    walls, reference_walls = find_walls(floorplan), reference_find_walls(floorplan)
+    assert list(walls.items()) == list(reference_walls.items())
+    groups, reference_groups = consolidate_walls(walls), reference_consolidate_walls(reference_walls)
+    assert list(groups) == list(reference_groups)
+    assert all(groups[k] == reference_groups[k] for k in groups)
+    # NOTE: the iteration order of the sets decides where get_wall_loop starts the room polygons
+    return all(list(groups[k]) == list(reference_groups[k]) for k in groups)
+
+
+def timed(find, consolidate, floorplans):
+    start = time.perf_counter()
+    for floorplan in floorplans:
+        consolidate(find(floorplan))
+    return (time.perf_counter() - start) / len(floorplans) * 1000
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    np.random.seed(0)
+    floorplans = []
+    for _ in range(FLOORPLANS // 3):
+        size, rooms = np.random.randint(1, 20), np.random.randint(1, 8)
+        floorplans += [random_cells(size, rooms), random_rectangles(size, rooms)]
+    while len(floorplans) < FLOORPLANS:
+        floorplans.extend(grown_floorplans())
+    same_order = sum(check(floorplan) for floorplan in floorplans)
+    print(f"{len(floorplans)} floorplans: the same rowcol_walls and boundary_groups, {same_order} with the same set order")
+
+    print(f"{'size':>6}{'layout':>12}{'walls':>8}{'before ms':>11}{'after ms':>10}{'speedup':>9}")
+    for size in SIZES:
+        for layout, make in (("rectangles", random_rectangles), ("cells", random_cells)):
+            floorplans = [np.pad(make(size, 8), pad_width=1, mode="constant", constant_values=OUTDOOR_ROOM_ID) for _ in range(3)]
+            walls = np.mean([sum(len(v) for v in find_walls(floorplan).values()) for floorplan in floorplans])
+            before = timed(reference_find_walls, reference_consolidate_walls, floorplans)
+            after = timed(find_walls, consolidate_walls, floorplans)
+            print(f"{size:>6}{layout:>12}{walls:>8.0f}{before:>11.2f}{after:>10.2f}{before / after:>9.1f}")
@@ -0,0 +1,59 @@
+# Check that generate_scene(seed=...) gives byte-identical scenes whatever the global random state, the order of the
+# scenes and the process (with different hash seeds), and that it gives the same scenes as seeding the global random
+# and np.random with the same seed, without using them. A dataset can then store the seeds instead of the scene JSON.
+# The environment data is needed.
+from legent import generate_scene
+import hashlib
+import json
+import numpy as np
+import os
+import random
+import subprocess
+import sys
+
+SEEDS = 20
+
+
+def digests(seeds, **kwargs):
+    return {seed: hashlib.md5(json.dumps(generate_scene(room_num=seed % 5, seed=seed, use_cache=False, **kwargs)).encode()).hexdigest() for seed in seeds}
+
+
+def legacy_digests(seeds):
+    out = {}
+    for seed in seeds:
+        random.seed(seed)
+        np.random.seed(seed)
+        out[seed] = hashlib.md5(json.dumps(generate_scene(room_num=seed % 5)).encode()).hexdigest()
+    return out
+
+
+def subprocess_digests(seeds, hash_seed):
+    env = dict(os.environ, PYTHONHASHSEED=str(hash_seed))
+    output = subprocess.run([sys.executable, __file__, "--worker", *map(str, seeds)], env=env, capture_output=True, text=True, check=True).stdout
+    return {int(seed): digest for seed, digest in json.loads(output.splitlines()[-1]).items()}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        random.seed(os.getpid())
+        np.random.seed(os.getpid())
+        print(json.dumps(digests([int(seed) for seed in sys.argv[2:]])))
+        sys.exit()
+
+    seeds = list(range(SEEDS))
+    state, np_state = random.getstate(), np.random.get_state()
+    expected = digests(seeds)
+    assert random.getstate() == state and all(np.array_equal(a, b) for a, b in zip(np.random.get_state(), np_state))
+    print("the global random and np.random are not used")
+    random.seed(12345)
+    np.random.seed(12345)
+    assert digests(seeds[::-1]) == expected
+    print("the same scenes after changing the global random state and the order")
+    assert legacy_digests(seeds) == expected
+    print("the same scenes as seeding the global random and np.random")
+    for hash_seed in [0, 1]:
+        assert subprocess_digests(seeds[::-1], hash_seed) == expected
+    print("the same scenes in other processes with other hash seeds")
+
+    scene_bytes = np.mean([len(json.dumps(generate_scene(room_num=seed % 5, seed=seed, use_cache=False)).encode()) for seed in seeds])
+    print(f"{scene_bytes / 1024:.1f} KB of JSON per scene, {len(str(SEEDS - 1))} bytes per seed")